@@ -0,0 +1 @@
+"""Performance benchmarks for holdem_sim.  Run with ``python -m benchmarks run``; see ``python -m benchmarks -h``."""
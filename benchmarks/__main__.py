@@ -0,0 +1,43 @@
+import argparse
+import sys
+from prettytable import PrettyTable
+from benchmarks import harness
+from benchmarks import evaluators, simulations, cli  # noqa: F401  (registers the benchmarks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run and compare holdem_sim benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="Run the benchmarks and write the results to a JSON file")
+    run.add_argument('-o', '--output', default='bench_results.json',
+                     help="Results file.  Defaults to bench_results.json")
+    run.add_argument('-k', '--filter', default=None, help="Only run benchmarks whose name contains this string")
+    compare = commands.add_parser('compare', help="Compare two results files and flag regressions")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('-t', '--threshold', type=float, default=0.15,
+                         help="Allowed relative slowdown before a benchmark counts as regressed.  Defaults to 0.15")
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = harness.run(args.filter)
+        harness.save(report, args.output)
+        print(f"Wrote {len(report['results'])} results to {args.output}")
+        return 0
+
+    rows = harness.compare(harness.load(args.baseline), harness.load(args.current), args.threshold)
+    table = PrettyTable()
+    table.field_names = ['Benchmark', 'Baseline', 'Current', 'Change %', 'Regressed']
+    for name, old, new, change, regressed in rows:
+        table.add_row([name, '' if old is None else round(old, 3), 'MISSING' if new is None else round(new, 3),
+                       '' if change is None else round(change * 100, 1), 'YES' if regressed else ''])
+    print(table)
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%} or are missing")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
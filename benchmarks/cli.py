@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+from benchmarks.harness import benchmark, best_of
+
+MAIN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'holdem_sim')
+
+
+def _main(*args):
+    subprocess.run([sys.executable, 'main.py', *args], cwd=MAIN_DIR, check=True, stdout=subprocess.DEVNULL)
+
+
+@benchmark('cli.single_player_flop', 'sec')
+def single_player_flop():
+    return best_of(lambda: _main('-c', 'As', 'Kd', '-f', 'Qh', 'Jc', '2d'))
+
+
+@benchmark('cli.multiplayer_preflop', 'sec')
+def multiplayer_preflop():
+    return best_of(lambda: _main('-m', 'As', 'Kd', '-p', '3'))
@@ -0,0 +1,198 @@
+"""
+Accuracy vs time of the sampling estimators against exact answers.
+
+Every scenario is solved once by holdem_sim.enumeration, then estimated at increasing sample counts.  For each
+estimator the RMS error over a few repeats is reported against wall time, together with the samples and milliseconds
+needed to reach each accuracy target.  Targets beyond the largest sample count are extrapolated from the last point
+assuming error falls as 1/sqrt(samples), and marked with '~'.
+
+Run from the repository root:  python -m benchmarks.convergence --csv targets.csv --curve-csv curve.csv
+"""
+import argparse
+import csv
+import math
+import time
+from prettytable import PrettyTable
+import holdem_sim.enumeration as e
+import holdem_sim.estimators as est
+import holdem_sim.simulation as s
+
+TARGETS = [0.005, 0.001, 0.0001]
+SAMPLE_COUNTS = [100, 300, 1000, 3000, 10000, 30000, 100000]
+HAND_TYPES = ['hc', 'pair', '2pair', '3ok', 'straight', 'flush', 'boat', '4ok', 'straight_flush']
+
+#  one_player scenarios are (hole, flop, turn, river); multiplayer scenarios are keyword arguments for both
+#  enumerate_multiplayer() and simulation_multiplayer()
+SCENARIOS = [
+    {'name': 'AsKd preflop', 'kind': 'one_player', 'cards': (['As', 'Kd'], [], [], [])},
+    {'name': 'AhKh on Qh Jh 2c', 'kind': 'one_player', 'cards': (['Ah', 'Kh'], ['Qh', 'Jh', '2c'], [], [])},
+    {'name': '7s7d on Kc 7h 2d 2s', 'kind': 'one_player', 'cards': (['7s', '7d'], ['Kc', '7h', '2d'], ['2s'], [])},
+    {'name': 'AsAd vs KcKd on 2c 7h Js', 'kind': 'multiplayer',
+     'cards': {'hole_one': ['As', 'Ad'], 'hole_two': ['Kc', 'Kd'], 'flop': ['2c', '7h', 'Js'], 'opponents': 2}},
+    {'name': 'AsKd vs random on Qh Jc 2d 7s', 'kind': 'multiplayer',
+     'cards': {'hole_one': ['As', 'Kd'], 'flop': ['Qh', 'Jc', '2d'], 'turn': ['7s'], 'opponents': 2}},
+]
+
+
+def one_player_probabilities(result):
+    """Return the probability of each final hand type in a SimulationResult."""
+    return [result[hand_type] / result.samples for hand_type in HAND_TYPES]
+
+
+def estimate_probabilities(estimate):
+    """Return the probability of each final hand type in an estimators.Estimate."""
+    return [estimate[hand_type] for hand_type in HAND_TYPES]
+
+
+def hero_win_probability(contestants):
+    return [contestants[0].result.wins / contestants[0].result.samples]
+
+
+def max_error(estimate, exact):
+    return max(abs(a - b) for a, b in zip(estimate, exact))
+
+
+#  estimator name -> {kind: function(cards, sims) returning a list of probabilities}
+ESTIMATORS = {
+    'monte_carlo': {
+        'one_player': lambda cards, sims: one_player_probabilities(s.simulation_one_player(*cards, sims=sims)),
+        'multiplayer': lambda cards, sims: hero_win_probability(s.simulation_multiplayer(**cards, sims=sims)),
+    },
+    'stratified': {
+        'one_player': lambda cards, sims: estimate_probabilities(est.stratified_one_player(*cards, sims=sims)),
+    },
+}
+
+EXACT = {
+    'one_player': lambda cards: one_player_probabilities(e.enumerate_one_player(*cards)),
+    'multiplayer': lambda cards: hero_win_probability(e.enumerate_multiplayer(**cards)),
+}
+
+
+def convergence_curve(estimate, exact, sample_counts, repeats):
+    """
+    Run estimate at every sample count and return [(samples, rms error, mean ms)].
+
+    Parameters
+    ----------
+    estimate : callable
+        sims -> list of probabilities
+    exact : list
+    sample_counts : list
+    repeats : int
+
+    Returns
+    -------
+    curve : list
+    """
+    curve = []
+    for sims in sample_counts:
+        squared = 0.0
+        seconds = 0.0
+        for r in range(repeats):
+            start = time.perf_counter()
+            estimated = estimate(sims)
+            seconds += time.perf_counter() - start
+            squared += max_error(estimated, exact) ** 2
+        curve.append((sims, math.sqrt(squared / repeats), seconds / repeats * 1000))
+    return curve
+
+
+def cost_to_reach(curve, target):
+    """
+    Return (samples, ms, extrapolated) needed for the error to drop to target.
+
+    Parameters
+    ----------
+    curve : list
+        as returned by convergence_curve()
+    target : float
+
+    Returns
+    -------
+    tuple[samples : int, ms : float, extrapolated : bool]
+    """
+    for sims, error, ms in curve:
+        if error <= target:
+            return sims, ms, False
+    sims, error, ms = curve[-1]
+    needed = sims * (error / target) ** 2
+    return int(math.ceil(needed)), ms * needed / sims, True
+
+
+def run(sample_counts=SAMPLE_COUNTS, repeats=5, estimators=None):
+    """
+    Measure every estimator on every scenario.
+
+    Parameters
+    ----------
+    sample_counts : list
+    repeats : int
+    estimators : list
+        optional.  Names from ESTIMATORS.  Defaults to all of them
+
+    Returns
+    -------
+    tuple[curves : list of (scenario, estimator, samples, rms error, ms),
+    targets : list of (scenario, estimator, target, samples, ms, extrapolated)]
+    """
+    curves = []
+    targets = []
+    for scenario in SCENARIOS:
+        start = time.perf_counter()
+        exact = EXACT[scenario['kind']](scenario['cards'])
+        exact_ms = (time.perf_counter() - start) * 1000
+        for target in TARGETS:
+            targets.append((scenario['name'], 'exact', target, None, exact_ms, False))
+        for name in estimators or ESTIMATORS:
+            estimator = ESTIMATORS[name].get(scenario['kind'])
+            if estimator is None:
+                continue
+            curve = convergence_curve(lambda sims: estimator(scenario['cards'], sims), exact, sample_counts, repeats)
+            curves.extend((scenario['name'], name) + point for point in curve)
+            for target in TARGETS:
+                targets.append((scenario['name'], name, target) + cost_to_reach(curve, target))
+    return curves, targets
+
+
+def write_csv(path, header, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.convergence", description=__doc__.split('\n\n')[0])
+    parser.add_argument('--max-sims', type=int, default=SAMPLE_COUNTS[-1], help="Largest sample count to run")
+    parser.add_argument('--repeats', type=int, default=5, help="Runs per sample count for the RMS error")
+    parser.add_argument('--estimator', action='append', choices=sorted(ESTIMATORS), help="Repeat to pick several")
+    parser.add_argument('--csv', help="Write the samples/ms needed per accuracy target to this file")
+    parser.add_argument('--curve-csv', help="Write the error vs time curve to this file")
+    args = parser.parse_args(argv)
+
+    sample_counts = [sims for sims in SAMPLE_COUNTS if sims <= args.max_sims]
+    curves, targets = run(sample_counts, args.repeats, args.estimator)
+
+    curve_table = PrettyTable()
+    curve_table.field_names = ['Scenario', 'Estimator', 'Samples', 'RMS Error %', 'ms']
+    for scenario, estimator, sims, error, ms in curves:
+        curve_table.add_row([scenario, estimator, sims, round(error * 100, 4), round(ms, 2)])
+    print(curve_table)
+
+    target_table = PrettyTable()
+    target_table.field_names = ['Scenario', 'Estimator', 'Target %', 'Samples', 'ms']
+    for scenario, estimator, target, sims, ms, extrapolated in targets:
+        mark = '~' if extrapolated else ''
+        target_table.add_row([scenario, estimator, target * 100, '-' if sims is None else mark + str(sims),
+                              mark + str(round(ms, 1))])
+    print(target_table)
+
+    if args.csv:
+        write_csv(args.csv, ['scenario', 'estimator', 'target', 'samples', 'ms', 'extrapolated'], targets)
+    if args.curve_csv:
+        write_csv(args.curve_csv, ['scenario', 'estimator', 'samples', 'rms_error', 'ms'], curves)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import random
+import holdem_sim.poker_functions as p
+import holdem_sim.simulation as s
+from benchmarks.harness import benchmark, best_latency
+
+CORPUS_SIZE = 500
+CALLS = 2000
+
+
+def _corpus():
+    """A fixed, seeded list of (hole, board) 7-card hands as Card lists."""
+    rng = random.Random(2023)
+    deck = p.generate_deck().deck
+    corpus = []
+    for i in range(CORPUS_SIZE):
+        cards = rng.sample(deck, 7)
+        corpus.append((cards[:2], cards[2:]))
+    return corpus
+
+
+CORPUS = _corpus()
+
+
+def _cycle(func):
+    """Return a no-argument callable that evaluates the next corpus hand with func on every call."""
+    state = {'i': 0}
+
+    def call():
+        hole, board = CORPUS[state['i'] % CORPUS_SIZE]
+        state['i'] += 1
+        func(hole, board)
+    return call
+
+
+def _register_find(func):
+    benchmark('latency.' + func.__name__, 'usec/call')(lambda: best_latency(_cycle(func), (), CALLS))
+
+
+for _func in p.HAND_REGISTRY:
+    _register_find(_func)
+
+
+@benchmark('latency.evaluate_hand', 'usec/call')
+def evaluate_hand():
+    return best_latency(_cycle(s.evaluate_hand), (), CALLS)
+
+
+@benchmark('latency.evaluate_strength', 'usec/call')
+def evaluate_strength():
+    return best_latency(_cycle(s.evaluate_strength), (), CALLS)
+
+
+@benchmark('latency.lanes_strength', 'usec/call')
+def lanes_strength():
+    masks = [p.lanes_mask(hole + board) for hole, board in CORPUS]
+    state = {'i': 0}
+
+    def call():
+        p.lanes_strength(masks[state['i'] % CORPUS_SIZE])
+        state['i'] += 1
+    return best_latency(call, (), CALLS * 10)
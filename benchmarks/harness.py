@@ -0,0 +1,138 @@
+import json
+import platform
+import time
+from datetime import datetime, timezone
+
+BENCHMARKS = []
+
+
+def benchmark(name, unit, higher_is_better=False):
+    """
+    Register a benchmark function.
+
+    The decorated function takes no arguments and returns the measured value in unit.
+
+    Parameters
+    ----------
+    name : str
+        unique name, used as the key in the results file
+    unit : str
+        e.g. 'usec/call' or 'samples/sec'
+    higher_is_better : bool
+        True for throughputs, False for latencies
+    """
+    def register(func):
+        BENCHMARKS.append({'name': name, 'unit': unit, 'higher_is_better': higher_is_better, 'func': func})
+        return func
+    return register
+
+
+def best_latency(func, args, number, repeat=5):
+    """
+    Return the best per-call latency of func(*args) in microseconds over repeat rounds of number calls.
+
+    Parameters
+    ----------
+    func : callable
+    args : tuple
+    number : int
+    repeat : int
+
+    Returns
+    -------
+    usec : float
+    """
+    best = float('inf')
+    for r in range(repeat):
+        start = time.perf_counter()
+        for i in range(number):
+            func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e6
+
+
+def best_of(func, repeat=3):
+    """Return the lowest wall time in seconds of repeat calls of func()."""
+    best = float('inf')
+    for r in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(name_filter=None):
+    """
+    Run every registered benchmark whose name contains name_filter.
+
+    Parameters
+    ----------
+    name_filter : str
+        optional.  Defaults to None (run all)
+
+    Returns
+    -------
+    report : dict
+        {'meta': {...}, 'results': {name: {'value', 'unit', 'higher_is_better'}}}
+    """
+    results = {}
+    for bench in BENCHMARKS:
+        if name_filter and name_filter not in bench['name']:
+            continue
+        value = bench['func']()
+        results[bench['name']] = {'value': value, 'unit': bench['unit'],
+                                  'higher_is_better': bench['higher_is_better']}
+        print(f"{bench['name']:<45} {value:>14.2f} {bench['unit']}")
+    meta = {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            }
+    return {'meta': meta, 'results': results}
+
+
+def save(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=0.15):
+    """
+    Compare two reports and flag benchmarks that got worse by more than threshold.
+
+    Parameters
+    ----------
+    baseline : dict
+    current : dict
+    threshold : float
+        allowed relative slowdown, e.g. 0.10 for 10%
+
+    Returns
+    -------
+    rows : list
+        one (name, baseline value, current value, relative change, regressed) tuple per benchmark in either report.
+        relative change is positive when the benchmark got better.  A benchmark missing from current (deleted or
+        crashed) has current value and change None and counts as regressed; one new in current has baseline value
+        and change None.  change is also None when the baseline value is 0.
+    """
+    rows = []
+    for name, old in baseline['results'].items():
+        new = current['results'].get(name)
+        if new is None:
+            rows.append((name, old['value'], None, None, True))
+            continue
+        if old['value'] == 0:
+            rows.append((name, old['value'], new['value'], None, False))
+            continue
+        change = (new['value'] - old['value']) / old['value']
+        if not old['higher_is_better']:
+            change = -change
+        rows.append((name, old['value'], new['value'], change, change < -threshold))
+    for name, new in current['results'].items():
+        if name not in baseline['results']:
+            rows.append((name, None, new['value'], None, False))
+    return rows
@@ -0,0 +1,32 @@
+import holdem_sim.simulation as s
+from benchmarks.harness import benchmark, best_of
+
+SIMS = 20000
+HERO = ['As', 'Kd']
+STREETS = {'preflop': ([], [], []),
+           'flop': (['Qh', 'Jc', '2d'], [], []),
+           'turn': (['Qh', 'Jc', '2d'], ['7s'], []),
+           }
+
+
+def _one_player(flop, turn, river):
+    seconds = best_of(lambda: s.simulation_one_player(HERO, flop, turn, river, sims=SIMS))
+    return SIMS / seconds
+
+
+def _multiplayer(flop, turn, river, opponents):
+    seconds = best_of(lambda: s.simulation_multiplayer(HERO, flop=flop, turn=turn, river=river, opponents=opponents,
+                                                       sims=SIMS))
+    return SIMS / seconds
+
+
+def _register_street(street, board):
+    benchmark('throughput.one_player.' + street, 'samples/sec', higher_is_better=True)(
+        lambda: _one_player(*board))
+    for players in (2, 6):
+        benchmark('throughput.multiplayer_' + str(players) + '.' + street, 'samples/sec', higher_is_better=True)(
+            lambda players=players: _multiplayer(*board, players))
+
+
+for _street, _board in STREETS.items():
+    _register_street(_street, _board)
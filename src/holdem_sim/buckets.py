@@ -0,0 +1,407 @@
+"""
+Cluster flop or turn situations into buckets by their distribution of river equity.
+
+A situation is hero's hole cards plus the board, up to suit isomorphism: situation_key() describes it by which ranks
+each suit holds in the hole and on the board, sorted, so the 24 relabellings of the suits share one key.  For every
+situation the pipeline builds a histogram of hero's river equity against one random hand over every runout (or a
+seeded sample of them).  River equities come from boards.BoardIndex, and the situations of one board are computed
+together so every river board is indexed once for all of them.
+
+Boards are spread over a process pool and each finished board is appended to a JSON-lines checkpoint, so an
+interrupted run resumes where it stopped.  The histograms are then clustered by k-means under the earth mover's
+distance, and the bucket of every situation is written to an index file that BucketIndex looks up in constant time.
+
+Usage:  python -m holdem_sim.buckets CHECKPOINT INDEX [--street flop|turn] [--boards N] [--buckets K] [--bins B]
+        [--runouts R] [--processes P]
+"""
+import argparse
+import json
+import os
+import random
+from itertools import combinations
+from multiprocessing import Pool
+import holdem_sim.boards as b
+import holdem_sim.poker_functions as p
+
+DECK = p.generate_deck().deck
+STREETS = {'flop': 3, 'turn': 4}
+
+
+#####     SUIT CANONICALIZATION     #####
+def _signature(hole_lanes, board_lanes):
+    """Return the per-suit (hole ranks, board ranks) pairs of two lanes masks, sorted so the suits do not matter."""
+    return tuple(sorted((((hole_lanes >> (16 * suit)) & p.RANK_MASK, (board_lanes >> (16 * suit)) & p.RANK_MASK)
+                         for suit in range(len(p.SUITS))), reverse=True))
+
+
+def situation_key(hole, board):
+    """
+    Return the suit-canonical key of hole cards on a board.
+
+    Two situations get the same key exactly when a relabelling of the suits turns one into the other.
+
+    Parameters
+    ----------
+    hole : list
+        two Cards or card strings
+    board : list
+        Cards or card strings
+
+    Returns
+    -------
+    key : str
+        per suit, the hole and board rank masks in hex, e.g. '1000.1/800.0/0.400/0.2'
+    """
+    signature = _signature(p.lanes_mask(hole), p.lanes_mask(board))
+    return '/'.join(f"{hole_ranks:x}.{board_ranks:x}" for hole_ranks, board_ranks in signature)
+
+
+def situation_cards(key):
+    """
+    Return a representative (hole, board) of a situation key, as card strings.
+
+    Parameters
+    ----------
+    key : str
+
+    Returns
+    -------
+    situation : tuple[hole : list, board : list]
+    """
+    hole, board = [], []
+    for suit, part in zip(p.SUITS, key.split('/')):
+        hole_ranks, board_ranks = (int(half, 16) for half in part.split('.'))
+        for index, rank in enumerate(p.RANKS):
+            if hole_ranks >> index & 1:
+                hole.append(rank + suit)
+            if board_ranks >> index & 1:
+                board.append(rank + suit)
+    return hole, board
+
+
+def canonical_boards(street='flop'):
+    """
+    Yield one board of every suit-isomorphism class for a street, as card strings.
+
+    Parameters
+    ----------
+    street : str
+        'flop' (1,755 boards) or 'turn'
+
+    Yields
+    ------
+    board : list
+    """
+    seen = set()
+    for cards in combinations(DECK, STREETS[street]):
+        signature = _signature(0, p.lanes_mask(cards))
+        if signature not in seen:
+            seen.add(signature)
+            yield [card.name for card in cards]
+
+
+#####     HISTOGRAMS     #####
+def board_histograms(board, bins=50, runouts=None, cache=None):
+    """
+    Return the river-equity histogram of every canonical situation on one board.
+
+    Runouts are walked one at a time: each river board is indexed once (see boards.BoardIndex), used by every
+    hole-card pair, and dropped before the next, so only one index is alive at a time.  The cost is one BoardIndex per
+    runout plus a binary search per situation and runout.  Runouts that share a card with the hole cards are skipped
+    for that situation.
+
+    Parameters
+    ----------
+    board : list
+        a flop or turn, as card strings
+    bins : int
+        optional.  Equal-width equity bins over [0, 1].  Defaults to 50
+    runouts : int
+        optional.  Sample this many runouts, seeded by the board, instead of all of them.  Defaults to None
+    cache : EvaluationCache
+        optional.  Look river boards up in this cache (see boards.board_index()) instead of building each index
+        afresh, e.g. to share them between boards with the same turn.  Defaults to None
+
+    Returns
+    -------
+    histograms : dict
+        situation key -> list of bins counts
+    """
+    cards = p.make_card(board)
+    stub = p.remaining_cards(cards)
+    all_runouts = list(combinations(stub, 5 - len(cards)))
+    if runouts is not None and runouts < len(all_runouts):
+        all_runouts = random.Random(p.card_mask(cards)).sample(all_runouts, runouts)
+    situations = {}  # situation key -> (hole, hole mask) of the first pair seen
+    for hole in combinations(stub, 2):
+        key = situation_key(hole, cards)
+        if key not in situations:
+            situations[key] = (hole, hole[0].mask | hole[1].mask)
+    histograms = {key: [0] * bins for key in situations}
+    for runout in all_runouts:
+        river = cards + list(runout)
+        index = b.BoardIndex(river) if cache is None else b.board_index(river, cache)
+        runout_mask = p.card_mask(runout)
+        for key, (hole, hole_mask) in situations.items():
+            if runout_mask & hole_mask:
+                continue
+            equity = index.percentile(hole)
+            histograms[key][min(int(equity * bins), bins - 1)] += 1
+    return histograms
+
+
+def _board_task(task):
+    """Worker: the histograms of one board."""
+    board, bins, runouts = task
+    return ' '.join(board), board_histograms(board, bins, runouts)
+
+
+def read_checkpoint(path):
+    """
+    Return every situation histogram stored in a checkpoint, and the boards already done.
+
+    Parameters
+    ----------
+    path : str
+
+    Returns
+    -------
+    checkpoint : tuple[histograms : dict, boards : set]
+    """
+    histograms, boards = {}, set()
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                boards.add(record['board'])
+                histograms.update(record['histograms'])
+    return histograms, boards
+
+
+def build_histograms(checkpoint, street='flop', boards=None, bins=50, runouts=None, processes=None):
+    """
+    Compute the histograms of every canonical board of a street, appending each finished board to checkpoint.
+
+    Boards already in the checkpoint are skipped, so calling this again after an interruption finishes the job.
+
+    Parameters
+    ----------
+    checkpoint : str
+        JSON-lines file, one line per board
+    street : str
+        optional.  'flop' or 'turn'.  Defaults to 'flop'
+    boards : int
+        optional.  Only the first this many canonical boards.  Defaults to None (all)
+    bins : int
+        optional.  Defaults to 50
+    runouts : int
+        optional.  Runouts sampled per board.  Defaults to None (all)
+    processes : int
+        optional.  Size of the process pool; None uses every CPU, 1 runs in this process.  Defaults to None
+
+    Returns
+    -------
+    histograms : dict
+        situation key -> histogram, for every board in the checkpoint
+    """
+    histograms, done = read_checkpoint(checkpoint)
+    todo = []
+    for n, board in enumerate(canonical_boards(street)):
+        if boards is not None and n >= boards:
+            break
+        if ' '.join(board) not in done:
+            todo.append((board, bins, runouts))
+    with open(checkpoint, 'a') as f:
+        if processes == 1:
+            results = map(_board_task, todo)
+            for board, board_results in results:
+                f.write(json.dumps({'board': board, 'histograms': board_results}) + '\n')
+                f.flush()
+                histograms.update(board_results)
+        else:
+            with Pool(processes) as pool:
+                for board, board_results in pool.imap_unordered(_board_task, todo):
+                    f.write(json.dumps({'board': board, 'histograms': board_results}) + '\n')
+                    f.flush()
+                    histograms.update(board_results)
+    return histograms
+
+
+#####     CLUSTERING     #####
+def _cdf(histogram):
+    """Return the cumulative distribution of a histogram, normalised to end at 1."""
+    total = sum(histogram) or 1
+    running = 0
+    cdf = []
+    for count in histogram:
+        running += count
+        cdf.append(running / total)
+    return cdf
+
+
+def emd(first, second):
+    """
+    Return the earth mover's distance between two histograms over the same equal-width bins, in bins.
+
+    In one dimension this is the L1 distance between the cumulative distributions.
+
+    Parameters
+    ----------
+    first : list
+    second : list
+
+    Returns
+    -------
+    distance : float
+    """
+    return sum(abs(a - b) for a, b in zip(_cdf(first), _cdf(second)))
+
+
+def kmeans_emd(histograms, k, iterations=50, seed=0):
+    """
+    Cluster histograms with k-means under the earth mover's distance.
+
+    Points are compared as cumulative distributions, where the EMD is the L1 distance, and each centroid is the mean
+    distribution of its members.  Centroids are seeded with k-means++.
+
+    Parameters
+    ----------
+    histograms : list
+    k : int
+    iterations : int
+        optional.  Most update rounds.  Defaults to 50
+    seed : int
+        optional.  Defaults to 0
+
+    Returns
+    -------
+    clusters : tuple[assignments : list, centroids : list]
+        a cluster number per histogram, and each centroid as a cumulative distribution
+    """
+    rng = random.Random(seed)
+    points = [_cdf(histogram) for histogram in histograms]
+    k = min(k, len(points))
+
+    def distance(point, centroid):
+        return sum(abs(a - b) for a, b in zip(point, centroid))
+
+    centroids = [list(rng.choice(points))]
+    nearest = [distance(point, centroids[0]) for point in points]
+    while len(centroids) < k:
+        total = sum(d * d for d in nearest)
+        if total == 0:
+            centroids.append(list(rng.choice(points)))
+        else:
+            target = rng.random() * total
+            for point, d in zip(points, nearest):
+                target -= d * d
+                if target <= 0:
+                    break
+            centroids.append(list(point))
+        nearest = [min(d, distance(point, centroids[-1])) for point, d in zip(points, nearest)]
+    assignments = None
+    for round in range(iterations):
+        updated = [min(range(k), key=lambda c: distance(point, centroids[c])) for point in points]
+        if updated == assignments:
+            break
+        assignments = updated
+        sums = [[0.0] * len(points[0]) for c in range(k)]
+        sizes = [0] * k
+        for point, c in zip(points, assignments):
+            sizes[c] += 1
+            sums[c] = [a + b for a, b in zip(sums[c], point)]
+        centroids = [[value / sizes[c] for value in sums[c]] if sizes[c] else centroids[c] for c in range(k)]
+    return assignments, centroids
+
+
+class BucketIndex:
+    """
+    Bucket of every situation, keyed by situation_key().
+
+    Parameters
+    ----------
+    street : str
+    buckets : dict
+        situation key -> bucket number
+    centroids : list
+        each bucket's centroid as a cumulative equity distribution
+    """
+    def __init__(self, street, buckets, centroids):
+        """Parameters
+        -----------
+        street: str
+        buckets: dict
+        centroids: list"""
+        self.street = street
+        self.buckets = buckets
+        self.centroids = centroids
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def bucket(self, hole, board):
+        """Return the bucket number of hole cards on a board.  KeyError if the situation was not bucketed."""
+        return self.buckets[situation_key(hole, board)]
+
+    def save(self, path):
+        """Write the index to path as JSON."""
+        with open(path, 'w') as f:
+            json.dump({'street': self.street, 'centroids': self.centroids, 'buckets': self.buckets}, f)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save()."""
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['street'], data['buckets'], data['centroids'])
+
+
+def bucket_histograms(histograms, street, k, iterations=50, seed=0):
+    """
+    Cluster a dict of situation histograms into a BucketIndex.
+
+    Buckets are numbered from the weakest centroid (lowest mean equity) to the strongest.
+
+    Parameters
+    ----------
+    histograms : dict
+        situation key -> histogram
+    street : str
+    k : int
+    iterations : int
+    seed : int
+
+    Returns
+    -------
+    index : BucketIndex
+    """
+    keys = sorted(histograms)
+    assignments, centroids = kmeans_emd([histograms[key] for key in keys], k, iterations, seed)
+    order = sorted(range(len(centroids)), key=lambda c: sum(centroids[c]), reverse=True)  # higher CDF = weaker
+    renumber = {c: n for n, c in enumerate(order)}
+    return BucketIndex(street, {key: renumber[c] for key, c in zip(keys, assignments)},
+                       [centroids[c] for c in order])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m holdem_sim.buckets", description=__doc__.split('\n\n')[0])
+    parser.add_argument('checkpoint', help="JSON-lines histogram checkpoint; resumed if it exists")
+    parser.add_argument('index', help="Bucket index file to write")
+    parser.add_argument('--street', choices=list(STREETS), default='flop', help="Defaults to flop")
+    parser.add_argument('--boards', type=int, help="Only the first N canonical boards.  Defaults to all")
+    parser.add_argument('--buckets', type=int, default=50, help="Number of buckets.  Defaults to 50")
+    parser.add_argument('--bins', type=int, default=50, help="Histogram bins.  Defaults to 50")
+    parser.add_argument('--runouts', type=int, help="Runouts sampled per board.  Defaults to all")
+    parser.add_argument('--processes', type=int, help="Worker processes.  Defaults to the number of CPUs")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for k-means.  Defaults to 0")
+    args = parser.parse_args(argv)
+
+    histograms = build_histograms(args.checkpoint, args.street, args.boards, args.bins, args.runouts, args.processes)
+    index = bucket_histograms(histograms, args.street, args.buckets, seed=args.seed)
+    index.save(args.index)
+    print(f"{len(index):,} situations in {len(index.centroids)} buckets written to {args.index}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
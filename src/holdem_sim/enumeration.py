@@ -0,0 +1,225 @@
+import random
+import time
+from itertools import combinations
+from math import comb
+import holdem_sim.poker_functions as p
+import holdem_sim.simulation as s
+
+
+def enumerate_one_player(hole, flop=[], turn=[], river=[]):
+    """
+    Deal every possible completion of the board once and count the final hand types exactly.
+
+    The exact counterpart of simulation_one_player().  Each of the C(n, k) runouts is one sample, so the result holds
+    exact frequencies rather than estimates.
+
+    Parameters
+    ----------
+    hole : list
+    flop : list
+    turn : list
+    river : list
+
+    Returns
+    -------
+    result : SimulationResult
+    """
+    start = time.perf_counter()
+    known = p.make_card(hole) + p.make_card(flop) + p.make_card(turn) + p.make_card(river)
+    stub_lanes = [card.lanes for card in p.remaining_cards(known)]
+    known_lanes = p.lanes_mask(known)
+    lanes_strength = p.lanes_strength
+    result = s.SimulationResult()
+    counts = result.counts
+    samples = 0
+    for runout in combinations(stub_lanes, 7 - len(known)):
+        lanes = known_lanes
+        for card_lanes in runout:
+            lanes |= card_lanes
+        counts[lanes_strength(lanes) >> 20] += 1
+        samples += 1
+    counts[s.SAMPLES] = samples
+    counts[s.ELAPSED] = time.perf_counter() - start
+    return result
+
+
+def hole_assignments(cards, players):
+    """
+    Yield every way to give two of cards to each of players players.
+
+    Players are distinguishable, so each assignment is a tuple of players two-card tuples in player order.
+
+    Parameters
+    ----------
+    cards : list
+    players : int
+
+    Yields
+    ------
+    assignment : tuple
+    """
+    if players == 0:
+        yield ()
+        return
+    for pair in combinations(cards, 2):
+        rest = [card for card in cards if card is not pair[0] and card is not pair[1]]
+        for assignment in hole_assignments(rest, players - 1):
+            yield (pair,) + assignment
+
+
+def assignment_count(cards, players):
+    """Return how many tuples hole_assignments(cards, players) yields, given the number of cards."""
+    count = 1
+    for n in range(players):
+        count *= comb(cards - 2 * n, 2)
+    return count
+
+
+def _credit_locked(contestants, locked, samples):
+    """Credit samples of a locked result: every win to the winner, hand types in exact proportion to the tallies."""
+    winner, tallies = locked
+    contestants[winner].result.counts[s.WINS] += samples
+    contestants[winner].result.counts[s.SHARES] += samples
+    for contestant, tally in zip(contestants, tallies):
+        total = sum(tally)
+        for value in range(1, 10):
+            contestant.result.counts[value] += samples * tally[value] // total
+
+
+def enumerate_multiplayer(hole_one, hole_two=[], hole_three=[], hole_four=[], hole_five=[], hole_six=[],
+                          flop=[], turn=[], river=[], opponents=2, prune=False):
+    """
+    Score every possible runout and unknown hole-card deal exactly.  Returns list of Player objects.
+
+    The exact counterpart of simulation_multiplayer(), with the same arguments except sims.  Every board completion
+    is combined with every assignment of hole cards to players without starting cards, and each combination is one
+    sample.  The cost grows quickly with unknown players and missing board cards: known hands preflop take seconds,
+    one unknown opponent is practical from the flop on.
+
+    With prune, locked results are credited without being dealt out (see simulation.locked_outcome()): first for the
+    whole hand, then for each runout whose unknown hole cards would cost more to enumerate than to bound.  Counts stay
+    exact, so river spots against several unknown opponents resolve almost instantly when someone holds the nuts.
+
+    Parameters
+    ----------
+    hole_one : list
+    hole_two : list
+    hole_three : list
+    hole_four : list
+    hole_five : list
+    hole_six : list
+    flop : list
+    turn : list
+    river : list
+    opponents : int
+    prune : bool
+        optional.  Skip the branches whose result is locked.  Defaults to False
+
+    Returns
+    -------
+    contestants : list
+    """
+    start = time.perf_counter()
+    contestant_hands = [hole_one, hole_two, hole_three, hole_four, hole_five, hole_six]
+    contestants = [s.Player(n, contestant_hands[n]) for n in range(opponents)]
+    board = p.make_card(flop) + p.make_card(turn) + p.make_card(river)
+    known = [card for contestant in contestants for card in contestant.cards]
+    stub = p.remaining_cards(known + board)
+    board_lanes = p.lanes_mask(board)
+    fixed_lanes = [p.lanes_mask(contestant.cards) for contestant in contestants]
+    unknown = [n for n, contestant in enumerate(contestants) if not contestant.starting_cards]
+    lanes_strength = p.lanes_strength
+    strengths = [0] * len(contestants)
+    samples = 0
+    hands = [None if n in unknown else fixed_lanes[n] for n in range(len(contestants))]
+    to_come = 5 - len(board)
+    locked = None
+    if prune:
+        samples = comb(len(stub), to_come) * assignment_count(len(stub) - to_come, len(unknown))
+        locked = s.locked_outcome(board_lanes, hands, [card.lanes for card in stub], to_come,
+                                  samples * len(contestants))
+        if locked is not None:
+            _credit_locked(contestants, locked, samples)
+        else:
+            samples = 0
+    for runout in combinations(stub, to_come) if locked is None else ():
+        runout_lanes = board_lanes
+        for card in runout:
+            runout_lanes |= card.lanes
+        rest = [card for card in stub if not card.lanes & runout_lanes]
+        if prune and unknown:
+            branch = assignment_count(len(rest), len(unknown))
+            branch_locked = s.locked_outcome(runout_lanes, hands, [card.lanes for card in rest], 0,
+                                             branch * len(unknown))
+            if branch_locked is not None:
+                _credit_locked(contestants, branch_locked, branch)
+                samples += branch
+                continue
+        for n in range(len(contestants)):
+            if n not in unknown:
+                strengths[n] = lanes_strength(runout_lanes | fixed_lanes[n])
+        for assignment in hole_assignments(rest, len(unknown)):
+            for n, (first, second) in zip(unknown, assignment):
+                strengths[n] = lanes_strength(runout_lanes | first.lanes | second.lanes)
+            for n, contestant in enumerate(contestants):
+                contestant.result.counts[strengths[n] >> 20] += 1
+            s.score_strengths(contestants, strengths)
+            samples += 1
+    elapsed = time.perf_counter() - start
+    for contestant in contestants:
+        contestant.result.counts[s.SAMPLES] = samples
+        contestant.result.counts[s.ELAPSED] = elapsed
+    return contestants
+
+
+def enumerate_equity(hands, board=[], sample=None, seed=None):
+    """
+    Return each known hand's exact share of the pot over every completion of the board.
+
+    A runout won by one hand gives it the whole pot; a tie among k hands gives each 1/k.  Pass sample to score that
+    many random runouts instead of all of them, e.g. for all-ins before the flop.
+
+    Parameters
+    ----------
+    hands : list
+        each item is a list of two hole cards
+    board : list
+        optional.  Known board cards.  Defaults to []
+    sample : int
+        optional.  Number of random runouts.  Defaults to None (every runout)
+    seed : int
+        optional.  Seed for sample.  Defaults to None
+
+    Returns
+    -------
+    equity : tuple[shares : list, runouts : int]
+        each hand's mean pot share, and the number of runouts scored
+    """
+    hands = [p.make_card(hand) for hand in hands]
+    board = p.make_card(board)
+    stub_lanes = [card.lanes for card in p.remaining_cards(board + [card for hand in hands for card in hand])]
+    board_lanes = p.lanes_mask(board)
+    hand_lanes = [board_lanes | p.lanes_mask(hand) for hand in hands]
+    k = 5 - len(board)
+    if sample is None:
+        runouts = combinations(stub_lanes, k)
+    else:
+        rng = random.Random(seed)
+        runouts = (rng.sample(stub_lanes, k) for n in range(sample))
+    lanes_strength = p.lanes_strength
+    shares = [0.0] * len(hands)
+    strengths = [0] * len(hands)
+    count = 0
+    for runout in runouts:
+        runout_lanes = 0
+        for card_lanes in runout:
+            runout_lanes |= card_lanes
+        for n, lanes in enumerate(hand_lanes):
+            strengths[n] = lanes_strength(lanes | runout_lanes)
+        best = max(strengths)
+        winners = strengths.count(best)
+        for n, strength in enumerate(strengths):
+            if strength == best:
+                shares[n] += 1 / winners
+        count += 1
+    return [share / count for share in shares], count
@@ -0,0 +1,446 @@
+import math
+import random
+import time
+from bisect import bisect
+from itertools import accumulate, combinations
+import holdem_sim.poker_functions as p
+import holdem_sim.simulation as s
+
+HAND_TYPES = list(p.HAND_VALUES)
+
+
+class Estimate:
+    """
+    Probabilities estimated by a variance-reduced sampler, with the variance of each estimate.
+
+    Parameters
+    ----------
+    probabilities : dict
+        key (e.g. hand type) -> estimated probability
+    variances : dict
+        key -> variance of the estimate
+    samples : int
+        number of hands evaluated
+    elapsed : float
+        seconds
+    """
+    def __init__(self, probabilities, variances, samples, elapsed=0.0):
+        """Parameters
+        -----------
+        probabilities: dict
+        variances: dict
+        samples: int
+        elapsed: float"""
+        self.probabilities = probabilities
+        self.variances = variances
+        self.samples = samples
+        self.elapsed = elapsed
+
+    def __getitem__(self, item):
+        return self.probabilities[item]
+
+    def __repr__(self):
+        return 'Estimate(samples=' + str(self.samples) + ', ' + str(self.probabilities) + ')'
+
+    def std_error(self, key):
+        """Return the standard error of the estimate for key."""
+        return math.sqrt(self.variances[key])
+
+    def interval(self, key, z=1.96):
+        """
+        Return a normal-approximation confidence interval for key.
+
+        Parameters
+        ----------
+        key : str
+        z : float
+            default = 1.96 (95%)
+
+        Returns
+        -------
+        tuple[low : float, high : float]
+        """
+        half_width = z * self.std_error(key)
+        return self.probabilities[key] - half_width, self.probabilities[key] + half_width
+
+
+#####     STRATIFIED SAMPLING     #####
+def _stratum_counts(base_lanes, rest_lanes, to_deal, sims, rng):
+    """
+    Count final hand types over sims runouts of to_deal cards from rest_lanes, or over all of them if that is fewer.
+
+    Returns (counts indexed by hand_value, samples, exhaustive).
+    """
+    counts = [0] * (len(HAND_TYPES) + 1)
+    if math.comb(len(rest_lanes), to_deal) <= sims:
+        samples = 0
+        for runout in combinations(rest_lanes, to_deal):
+            lanes = base_lanes
+            for card_lanes in runout:
+                lanes |= card_lanes
+            counts[p.lanes_strength(lanes) >> 20] += 1
+            samples += 1
+        return counts, samples, True
+    size = len(rest_lanes)
+    uniform = rng.random
+    for i in range(sims):
+        lanes = base_lanes
+        for k in range(to_deal):  # partial Fisher-Yates, as in simulation_one_player()
+            r = k + int(uniform() * (size - k))
+            card_lanes = rest_lanes[r]
+            rest_lanes[r] = rest_lanes[k]
+            rest_lanes[k] = card_lanes
+            lanes |= card_lanes
+        counts[p.lanes_strength(lanes) >> 20] += 1
+    return counts, sims, False
+
+
+def _stratum_spread(counts, samples):
+    """Return the summed Bernoulli standard deviations of the hand-type indicators in one stratum."""
+    spread = 0.0
+    for value in range(1, len(HAND_TYPES) + 1):
+        share = counts[value] / samples
+        spread += share * (1 - share)
+    return math.sqrt(spread)
+
+
+def stratified_one_player(hole, flop=[], turn=[], river=[], sims=100000, allocation='even', pilot=20, seed=None):
+    """
+    Estimate final hand type probabilities by stratifying on the next board card.
+
+    Each card that can come next is a stratum of equal weight.  Samples are split across strata evenly, or with
+    allocation='optimal' in proportion to each stratum's spread measured by a pilot run (Neyman allocation).  A
+    stratum with no more runouts than its share of samples is enumerated exactly.  The strata are combined with their
+    exact weights, so the turn card no longer contributes sampling variance.
+
+    Parameters
+    ----------
+    hole : list
+    flop : list
+    turn : list
+    river : list
+    sims : int
+        total sample budget
+    allocation : str
+        'even' or 'optimal'
+    pilot : int
+        samples per stratum used to measure spreads for allocation='optimal'
+    seed : int
+        optional.  Seed for a private random generator.  Defaults to None
+
+    Returns
+    -------
+    estimate : Estimate
+        hand type -> probability, with the variance of each probability
+    """
+    if allocation not in ('even', 'optimal'):
+        raise ValueError("allocation must be 'even' or 'optimal'")
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    known = p.make_card(hole) + p.make_card(flop) + p.make_card(turn) + p.make_card(river)
+    known_lanes = p.lanes_mask(known)
+    stub_lanes = [card.lanes for card in p.remaining_cards(known)]
+    to_deal = 7 - len(known)
+    if to_deal == 0:
+        hand_type = p.HAND_TYPES[p.lanes_strength(known_lanes) >> 20]
+        probabilities = {key: float(key == hand_type) for key in HAND_TYPES}
+        return Estimate(probabilities, dict.fromkeys(HAND_TYPES, 0.0), 1, time.perf_counter() - start)
+    strata = len(stub_lanes)
+    weight = 1 / strata
+    if allocation == 'even':
+        shares = [max(sims // strata, 2)] * strata
+    else:
+        spreads = []
+        for next_lanes in stub_lanes:
+            rest = [card_lanes for card_lanes in stub_lanes if card_lanes != next_lanes]
+            counts, samples, exhaustive = _stratum_counts(known_lanes | next_lanes, rest, to_deal - 1, pilot, rng)
+            spreads.append(0.0 if exhaustive else _stratum_spread(counts, samples))
+        total_spread = sum(spreads)
+        if total_spread == 0:
+            shares = [max(sims // strata, 2)] * strata
+        else:
+            shares = [max(int(sims * spread / total_spread), 2) for spread in spreads]
+    estimates = dict.fromkeys(HAND_TYPES, 0.0)
+    variances = dict.fromkeys(HAND_TYPES, 0.0)
+    total_samples = 0
+    for next_lanes, share in zip(stub_lanes, shares):
+        rest = [card_lanes for card_lanes in stub_lanes if card_lanes != next_lanes]
+        counts, samples, exhaustive = _stratum_counts(known_lanes | next_lanes, rest, to_deal - 1, share, rng)
+        total_samples += samples
+        for hand_type in HAND_TYPES:
+            share_of_stratum = counts[p.HAND_VALUES[hand_type]] / samples
+            estimates[hand_type] += weight * share_of_stratum
+            if not exhaustive:  # sample variance of the stratum mean
+                variances[hand_type] += weight ** 2 * share_of_stratum * (1 - share_of_stratum) / (samples - 1)
+    return Estimate(estimates, variances, total_samples, time.perf_counter() - start)
+
+
+#####     IMPORTANCE SAMPLING     #####
+def _straight_flush_targets():
+    """Suit-lane masks of every straight flush (wheel included) in every suit."""
+    targets = []
+    windows = [0b11111 << low for low in range(len(p.RANKS) - 4)] + [0b1000000001111]
+    for suit in range(len(p.SUITS)):
+        for window in windows:
+            targets.append(window << 16 * suit)
+    return targets
+
+
+def _quads_targets():
+    """Suit-lane masks of the four cards of every rank."""
+    return [0x0001000100010001 << rank_idx for rank_idx in range(len(p.RANKS))]
+
+
+IMPORTANCE_TARGETS = {'straight_flush': _straight_flush_targets,
+                      '4ok': _quads_targets,
+                      }
+
+
+def importance_one_player(hole, flop=[], turn=[], river=[], target='straight_flush', sims=10000, mix=0.5, seed=None):
+    """
+    Estimate final hand type probabilities with dealing biased toward a rare hand.
+
+    Each sample is dealt uniformly with probability 1 - mix.  Otherwise one way of completing the target hand (a
+    straight flush in one suit and window, or the four cards of one rank) that is still possible is picked in
+    proportion to its chance of coming, its missing cards are dealt, and the rest of the board is filled uniformly.
+    Every sample is weighted by p(runout) / q(runout), the ratio of its uniform probability to its probability under
+    that mixture, so all the estimates stay unbiased while far more samples land on the rare hand.
+
+    Parameters
+    ----------
+    hole : list
+    flop : list
+    turn : list
+    river : list
+    target : str
+        a key of IMPORTANCE_TARGETS ('straight_flush' or '4ok')
+    sims : int
+    mix : float
+        share of samples dealt toward the target, 0 < mix < 1.  Defaults to 0.5
+    seed : int
+        optional.  Seed for a private random generator.  Defaults to None
+
+    Returns
+    -------
+    estimate : Estimate
+        hand type -> probability, with the variance of each probability
+    """
+    if target not in IMPORTANCE_TARGETS:
+        raise ValueError("target must be one of " + ', '.join(IMPORTANCE_TARGETS))
+    if not 0 < mix < 1:
+        raise ValueError("mix must be between 0 and 1")
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    uniform = rng.random
+    known = p.make_card(hole) + p.make_card(flop) + p.make_card(turn) + p.make_card(river)
+    known_lanes = p.lanes_mask(known)
+    stub_lanes = [card.lanes for card in p.remaining_cards(known)]
+    size = len(stub_lanes)
+    to_deal = 7 - len(known)
+    #  a completion is possible if its missing cards fit in the cards still to come.  It is picked with probability
+    #  proportional to its chance under uniform dealing, so a biased sample is a draw from the uniform runouts that
+    #  contain at least one completion and q(x) / p(x) = 1 - mix + mix * (completions in x) / (sum of their chances)
+    completions = []
+    chances = []
+    for target_lanes in IMPORTANCE_TARGETS[target]():
+        missing = target_lanes & ~known_lanes
+        needed = [card_lanes for card_lanes in stub_lanes if card_lanes & missing]
+        if missing and len(needed) <= to_deal:
+            rest = [card_lanes for card_lanes in stub_lanes if not card_lanes & missing]
+            completions.append((missing, len(needed), rest))
+            chances.append(math.comb(size - len(needed), to_deal - len(needed)) / math.comb(size, to_deal))
+    if not completions:
+        mix = 0.0  # the target cannot be made (or is already made); plain sampling is exact enough
+    total_chance = sum(chances)
+    cumulative = list(accumulate(chances))
+    sums = [0.0] * (len(HAND_TYPES) + 1)
+    squares = [0.0] * (len(HAND_TYPES) + 1)
+    for i in range(sims):
+        if uniform() < mix:
+            missing, needed, cards = completions[min(bisect(cumulative, uniform() * total_chance),
+                                                     len(completions) - 1)]
+            lanes = known_lanes | missing
+            free = to_deal - needed
+        else:
+            cards = stub_lanes
+            lanes = known_lanes
+            free = to_deal
+        last = len(cards)
+        for k in range(free):  # partial Fisher-Yates over the chosen card list
+            r = k + int(uniform() * (last - k))
+            card_lanes = cards[r]
+            cards[r] = cards[k]
+            cards[k] = card_lanes
+            lanes |= card_lanes
+        matched = 0
+        for completion in completions:
+            if lanes & completion[0] == completion[0]:
+                matched += 1
+        weight = 1 / (1 - mix + mix * matched / total_chance) if matched else 1 / (1 - mix)
+        value = p.lanes_strength(lanes) >> 20
+        sums[value] += weight
+        squares[value] += weight * weight
+    probabilities = {}
+    variances = {}
+    for hand_type in HAND_TYPES:
+        value = p.HAND_VALUES[hand_type]
+        mean = sums[value] / sims
+        probabilities[hand_type] = mean
+        variances[hand_type] = max(squares[value] / sims - mean * mean, 0.0) / (sims - 1) if sims > 1 else 0.0
+    return Estimate(probabilities, variances, sims, time.perf_counter() - start)
+
+
+#####     COMMON RANDOM NUMBERS     #####
+class ScenarioComparison:
+    """
+    Hero results of several scenarios run on one shared stream of runouts, with the statistics to compare them.
+
+    Attributes
+    ----------
+    results : list
+        one SimulationResult per scenario, for the hero (first player)
+    sims : int
+    elapsed : float
+        seconds
+    """
+    def __init__(self, results, sums, products, sims, elapsed=0.0):
+        """Parameters
+        -----------
+        results: list
+        sums: list
+            per scenario, the sum of the hero's pot share over all sims
+        products: list
+            per pair of scenarios, the sum of the product of the hero's pot shares
+        sims: int
+        elapsed: float"""
+        self.results = results
+        self._sums = sums
+        self._products = products
+        self.sims = sims
+        self.elapsed = elapsed
+
+    def equity(self, i):
+        """Return the hero's mean share of the pot in scenario i (a tie among k players is worth 1/k)."""
+        return self._sums[i] / self.sims
+
+    def covariance(self, i, j):
+        """Return the sample covariance of the hero's pot share between scenarios i and j."""
+        if self.sims < 2:
+            return 0.0
+        mean_product = self._products[i][j] / self.sims
+        return (mean_product - self.equity(i) * self.equity(j)) * self.sims / (self.sims - 1)
+
+    def difference(self, i, j):
+        """
+        Return the difference in hero equity between scenarios i and j, and its standard error.
+
+        Because both scenarios saw the same runouts, the covariance between them is subtracted from the variance.
+
+        Returns
+        -------
+        tuple[difference : float, std_error : float]
+        """
+        variance = self.covariance(i, i) + self.covariance(j, j) - 2 * self.covariance(i, j)
+        return self.equity(i) - self.equity(j), math.sqrt(max(variance, 0.0) / self.sims)
+
+    def independent_std_error(self, i, j):
+        """Return the standard error the same difference would have had from two independent runs of sims each."""
+        return math.sqrt((self.covariance(i, i) + self.covariance(j, j)) / self.sims)
+
+
+def _scenario_setup(scenario):
+    """Return (board lanes, dead mask, known player lanes or None per player, cards to deal) for one scenario."""
+    board = p.make_card(scenario.get('flop', [])) + p.make_card(scenario.get('turn', [])) + \
+        p.make_card(scenario.get('river', []))
+    holes = [scenario.get(key, []) for key in ('hole_one', 'hole_two', 'hole_three', 'hole_four', 'hole_five',
+                                               'hole_six')]
+    players = []
+    dead = p.card_mask(board)
+    for n in range(scenario.get('opponents', 2)):
+        hole = p.make_card(holes[n])
+        if len(hole) == 2:
+            players.append(p.lanes_mask(hole))
+            dead |= p.card_mask(hole)
+        else:
+            players.append(None)
+    to_deal = 5 - len(board) + 2 * players.count(None)
+    return p.lanes_mask(board), dead, players, to_deal
+
+
+def compare_scenarios(scenarios, sims=10000, seed=None):
+    """
+    Run related multiplayer scenarios against one shared stream of sampled runouts.
+
+    Each scenario is a dict of simulation_multiplayer() keyword arguments (hole_one ... hole_six, flop, turn, river,
+    opponents).  Every sim draws one random ordering of the deck.  Each scenario deals from that ordering, skipping
+    its own dead cards: first the missing board cards, then the hole cards of players without starting cards, in
+    seat order.  Scenarios that differ by a hero card or an extra opponent therefore see nearly the same runouts, and
+    the differences between them are estimated with far less variance than from independent runs.
+
+    Parameters
+    ----------
+    scenarios : list
+        list of dicts
+    sims : int
+    seed : int
+        optional.  Seed for a private random generator.  Defaults to None
+
+    Returns
+    -------
+    comparison : ScenarioComparison
+    """
+    start = time.perf_counter()
+    rng = random.Random(seed)
+    uniform = rng.random
+    deck = p.generate_deck().deck
+    deck_lanes = [card.lanes for card in deck]
+    deck_masks = [card.mask for card in deck]
+    setups = [_scenario_setup(scenario) for scenario in scenarios]
+    depth = max(to_deal + bin(dead).count('1') for board_lanes, dead, players, to_deal in setups)
+    order = list(range(len(deck)))
+    results = [s.SimulationResult() for scenario in scenarios]
+    sums = [0.0] * len(scenarios)
+    products = [[0.0] * len(scenarios) for scenario in scenarios]
+    shares = [0.0] * len(scenarios)
+    for i in range(sims):
+        for k in range(depth):  # one shared partial shuffle of the whole deck per sim
+            r = k + int(uniform() * (len(order) - k))
+            order[k], order[r] = order[r], order[k]
+        for n, (board_lanes, dead, players, to_deal) in enumerate(setups):
+            dealt = []
+            for index in order:
+                if not deck_masks[index] & dead:
+                    dealt.append(deck_lanes[index])
+                    if len(dealt) == to_deal:
+                        break
+            board_cards = to_deal - 2 * players.count(None)
+            for card_lanes in dealt[:board_cards]:
+                board_lanes |= card_lanes
+            strengths = []
+            position = board_cards
+            for player_lanes in players:
+                if player_lanes is None:
+                    player_lanes = dealt[position] | dealt[position + 1]
+                    position += 2
+                strengths.append(p.lanes_strength(board_lanes | player_lanes))
+            best = max(strengths)
+            counts = results[n].counts
+            counts[strengths[0] >> 20] += 1
+            if strengths[0] == best:
+                tied = strengths.count(best)
+                counts[s.WINS if tied == 1 else s.TIES] += 1
+                shares[n] = 1 / tied
+                counts[s.SHARES] += shares[n]
+            else:
+                shares[n] = 0.0
+            sums[n] += shares[n]
+        for a in range(len(scenarios)):
+            if shares[a]:
+                row = products[a]
+                for b in range(len(scenarios)):
+                    row[b] += shares[a] * shares[b]
+    elapsed = time.perf_counter() - start
+    for result in results:
+        result.counts[s.SAMPLES] = sims
+        result.counts[s.ELAPSED] = elapsed
+    return ScenarioComparison(results, sums, products, sims, elapsed)
@@ -0,0 +1,210 @@
+"""
+Replay hand histories and compute the all-in equity and EV of every player.
+
+Hand histories are plain text, one hand per block, blocks separated by blank lines.  Each line is a keyword and its
+values; lines starting with '#' are comments:
+
+    hand 1001
+    player alice As Kd
+    player bob Qh Qc
+    board 2c 7h Js 3d 9c
+    allin flop
+    pot 200
+
+'hand' names the hand and starts a new one, 'player' gives a name and two hole cards (two to six players), 'board'
+the cards dealt by the end of the hand (optional when the all-in is preflop), 'allin' the street the money went in on
+(preflop, flop, turn or river) and 'pot' the final pot.  Only the board cards out at the all-in are known to the
+equity calculation.
+
+The file is parsed lazily and hands are scored in a process pool with at most queue_size hands in flight, and each
+result is written as one JSON line as soon as it is ready, so memory stays flat whatever the size of the input.
+
+Usage:  python -m holdem_sim.history INPUT OUTPUT [--processes P] [--queue Q] [--sample N] [--exact-limit L]
+"""
+import argparse
+import json
+import threading
+import time
+from math import comb
+from multiprocessing import Pool
+import holdem_sim.enumeration as e
+import holdem_sim.simulation as s
+
+STREETS = {'preflop': 0, 'flop': 3, 'turn': 4, 'river': 5}
+
+
+def _finish(hand, start):
+    """Check a parsed hand and return it."""
+    if 'hand' not in hand or 'allin' not in hand or 'pot' not in hand:
+        raise ValueError(f"hand ending at line {start}: needs hand, allin and pot lines")
+    if not 2 <= len(hand['players']) <= 6:
+        raise ValueError(f"hand {hand['hand']}: needs two to six players")
+    if len(hand['board']) < STREETS[hand['allin']]:
+        raise ValueError(f"hand {hand['hand']}: board is too short for an all-in on the {hand['allin']}")
+    cards = hand['board'] + [card for name, hole in hand['players'] for card in hole]
+    if s.dedupe(cards) or not s.validate_card(cards):
+        raise ValueError(f"hand {hand['hand']}: invalid or repeated cards")
+    return hand
+
+
+def parse_hands(lines):
+    """
+    Yield the hands of a hand history one at a time.
+
+    Parameters
+    ----------
+    lines : iterable
+        lines of text, e.g. an open file
+
+    Yields
+    ------
+    hand : dict
+        'hand' : str, 'players' : list of (name, [card, card]), 'board' : list, 'allin' : str, 'pot' : float
+    """
+    hand = None
+    number = 0
+    for number, line in enumerate(lines, 1):
+        words = line.split()
+        if not words or words[0].startswith('#'):
+            if hand is not None and not words:
+                yield _finish(hand, number)
+                hand = None
+            continue
+        keyword, values = words[0], words[1:]
+        if hand is not None and keyword == 'hand' and 'hand' in hand:  # a new hand without a blank line first
+            yield _finish(hand, number)
+            hand = None
+        if hand is None:
+            hand = {'players': [], 'board': []}
+        if keyword == 'hand' and len(values) == 1:
+            hand['hand'] = values[0]
+        elif keyword == 'player' and len(values) == 3:
+            hand['players'].append((values[0], values[1:]))
+        elif keyword == 'board' and len(values) <= 5:
+            hand['board'] = values
+        elif keyword == 'allin' and len(values) == 1 and values[0] in STREETS:
+            hand['allin'] = values[0]
+        elif keyword == 'pot' and len(values) == 1:
+            hand['pot'] = float(values[0])
+        else:
+            raise ValueError(f"line {number}: cannot read {line.strip()!r}")
+    if hand is not None:
+        yield _finish(hand, number)
+
+
+def allin_equity(hand, exact_limit=100000, sample=20000):
+    """
+    Return the all-in equity and EV of every player in a parsed hand.
+
+    Equity is exact (see enumeration.enumerate_equity()) when the all-in leaves at most exact_limit runouts, which
+    covers every all-in from the flop on; earlier all-ins are scored on sample random runouts, seeded by the hand.
+
+    Parameters
+    ----------
+    hand : dict
+        as yielded by parse_hands()
+    exact_limit : int
+        optional.  Most runouts to enumerate.  Defaults to 100000
+    sample : int
+        optional.  Runouts to sample past exact_limit.  Defaults to 20000
+
+    Returns
+    -------
+    result : dict
+        'hand', 'allin', 'runouts', 'exact', and 'players': a list of {'name', 'equity', 'ev'}
+    """
+    board = hand['board'][:STREETS[hand['allin']]]
+    holes = [hole for name, hole in hand['players']]
+    unseen = 52 - len(board) - 2 * len(holes)
+    exact = comb(unseen, 5 - len(board)) <= exact_limit
+    shares, runouts = e.enumerate_equity(holes, board, sample=None if exact else sample, seed=hand['hand'])
+    return {'hand': hand['hand'], 'allin': hand['allin'], 'runouts': runouts, 'exact': exact,
+            'players': [{'name': name, 'equity': share, 'ev': share * hand['pot']}
+                        for (name, hole), share in zip(hand['players'], shares)]}
+
+
+def _score(task):
+    """Worker: score one hand."""
+    hand, exact_limit, sample = task
+    return allin_equity(hand, exact_limit, sample)
+
+
+def replay(source, destination, processes=None, queue_size=1000, exact_limit=100000, sample=20000):
+    """
+    Score every all-in of a hand history file and write one JSON line per hand.
+
+    Lines are written as hands finish, so with several processes they are not in input order; each carries its hand
+    name.
+
+    Parameters
+    ----------
+    source : str
+        hand history path
+    destination : str
+        JSON-lines output path
+    processes : int
+        optional.  Size of the process pool; None uses every CPU, 1 runs in this process.  Defaults to None
+    queue_size : int
+        optional.  Most hands read but not yet written.  Defaults to 1000
+    exact_limit : int
+        optional.  See allin_equity()
+    sample : int
+        optional.  See allin_equity()
+
+    Returns
+    -------
+    summary : dict
+        'hands' and 'wall_sec'
+    """
+    start = time.perf_counter()
+    hands = 0
+    with open(source) as f, open(destination, 'w') as out:
+        if processes == 1:
+            for hand in parse_hands(f):
+                out.write(json.dumps(allin_equity(hand, exact_limit, sample)) + '\n')
+                hands += 1
+        else:
+            slots = threading.BoundedSemaphore(queue_size)
+            failures = []
+
+            def write(result):
+                out.write(json.dumps(result) + '\n')
+                slots.release()
+
+            def fail(error):
+                failures.append(error)
+                slots.release()
+
+            with Pool(processes) as pool:
+                for hand in parse_hands(f):
+                    slots.acquire()  # blocks while queue_size hands are in flight
+                    if failures:
+                        break
+                    pool.apply_async(_score, ((hand, exact_limit, sample),), callback=write, error_callback=fail)
+                    hands += 1
+                pool.close()
+                pool.join()
+            if failures:
+                raise failures[0]
+    return {'hands': hands, 'wall_sec': time.perf_counter() - start}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m holdem_sim.history", description=__doc__.split('\n\n')[0])
+    parser.add_argument('source', help="Hand history file")
+    parser.add_argument('destination', help="JSON-lines file to write")
+    parser.add_argument('--processes', type=int, help="Worker processes.  Defaults to the number of CPUs")
+    parser.add_argument('--queue', type=int, default=1000, help="Most hands in flight.  Defaults to 1000")
+    parser.add_argument('--exact-limit', type=int, default=100000,
+                        help="Enumerate all-ins with at most this many runouts.  Defaults to 100000")
+    parser.add_argument('--sample', type=int, default=20000,
+                        help="Runouts sampled for larger all-ins.  Defaults to 20000")
+    args = parser.parse_args(argv)
+
+    summary = replay(args.source, args.destination, args.processes, args.queue, args.exact_limit, args.sample)
+    print(f"Scored {summary['hands']:,} hands in {summary['wall_sec']:.1f}s wall")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
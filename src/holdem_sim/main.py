@@ -1,8 +1,25 @@
 import sys
 import simulation as s
+import variants as v
 import argparse
 from prettytable import PrettyTable
 
+
+def print_profile(stats):
+    """Print a SimulationStats as two tables: time per phase, then counters."""
+    phases = PrettyTable()
+    phases.field_names = ['Phase', 'Seconds', '% of Run']
+    for phase, seconds in stats.phases.items():
+        share = round(seconds / stats.elapsed * 100, 1) if stats.elapsed else 0.0
+        phases.add_row([phase, round(seconds, 6), share])
+    counters = PrettyTable()
+    counters.field_names = ['Samples', 'Samples/sec', 'Evaluations', 'Evaluations/sec', 'Cache Hits', 'Elapsed (s)']
+    counters.add_row([stats.samples, round(stats.samples_per_sec), stats.evaluations, round(stats.evaluations_per_sec),
+                      stats.cache_hits, round(stats.elapsed, 4)])
+    print(phases)
+    print(counters)
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
         prog="Hold 'Em Evaluator",
@@ -13,11 +30,12 @@ if __name__ == '__main__':
     parser.add_argument('-f', '--flop', nargs=3, metavar="Flop", default=[], help="The three cards for the flos.  Defaults to blank")
     parser.add_argument('-t', '--turn', nargs=1, metavar="Turn", default=[], help="The card for the turn.  Defaults to blank")
     parser.add_argument('-r', '--river', nargs=1, metavar="River", default=[], help="The card for the river.  Defaults to blank")
-    # parser.add_argument('-o', '--outs', nargs=1, metavar="Outs", default=0,
-    #                     help="Optional, instead of a hand, pass the number of outs.")
-    parser.add_argument('-m', '--multiplayer', nargs=2, metavar="Multiplayer",
+    parser.add_argument('-o', '--outs', action='store_true',
+                        help="Count exact outs for your hole cards (-c) on the flop or turn.  Known opponents' hands "
+                             "(--two ... --six) turn outs into cards that put you ahead.")
+    parser.add_argument('-m', '--multiplayer', nargs=2, metavar="Multiplayer", default=[],
                         help="Multiplayer. Your hole cards are required.  Other players' are not.")
-    parser.add_argument('-p', '--players', nargs=1, metavar="Players", dest= 'opponents', default=2,
+    parser.add_argument('-p', '--players', nargs=1, metavar="Players", dest= 'opponents', default=[2],
                         help="Number of players in multiplayer (-m) hand.  Must be <= hole card pairs.", type=int)
     parser.add_argument('--two', nargs= 2, metavar="Player two", default=[],
                         help="Player two's hole cards. '-p' value must be at least 2.")
@@ -29,6 +47,14 @@ if __name__ == '__main__':
                         help="Player five's hole cards. '-p' value must be at least 5.")
     parser.add_argument('--six', nargs=2, metavar="Player six", default=[],
                         help="Player six's hole cards. '-p' value must be at least 6.")
+    parser.add_argument('--streets', action='store_true',
+                        help="Single player.  Show the chance of each hand by the flop, the turn and the river.")
+    parser.add_argument('--breakdown', action='store_true',
+                        help="Multiplayer.  Show hero's hand type against the hand type that won.")
+    parser.add_argument('--short-deck', action='store_true',
+                        help="Short deck (6+): no 2 to 5, A-6-7-8-9 is a straight and a flush beats a full house.")
+    parser.add_argument('--profile', action='store_true',
+                        help="Print per-phase timings and counters of the simulation.")
 
     args = parser.parse_args()
 
@@ -43,12 +69,50 @@ if __name__ == '__main__':
     if not valid:
         print("At least one of your cards is not valid.  Please try again.")
         sys.exit()
+    variant = v.SHORT_DECK if args.short_deck else None
+    if variant is not None and any(card[0] not in variant.ranks for card in check):
+        print("Short deck has no 2, 3, 4 or 5.  Please try again.")
+        sys.exit()
     board_str = ''
     for card in board:
         board_str += card + ' '
 
-    if len(args.Hole_Cards) > 0:
-        sim = s.simulation_one_player(args.Hole_Cards, args.flop, args.turn, args.river)
+    if args.outs:
+        if len(args.Hole_Cards) == 0 or len(args.flop) == 0 or len(args.river) > 0:
+            print("Outs need your hole cards (-c) and a flop, with or without a turn.")
+            sys.exit()
+        opponents = [hole for hole in (args.two, args.three, args.four, args.five, args.six) if hole]
+        found = s.outs(args.Hole_Cards, args.flop + args.turn, opponents, variant=variant)
+        if found['ahead']:
+            print("You are already ahead of those hands, so there are no outs to count.")
+            sys.exit()
+        x = PrettyTable()
+        x.field_names = ['Outs', 'Turn Odds', 'River Odds', 'Turn+River Odds']
+        odds = []
+        for chance in (found['turn'], found['river'], found['turn_river']):
+            if chance is None:
+                odds.append('-')
+            elif chance == 0:
+                odds.append('0%')
+            else:
+                odds.append(f"{round(chance * 100, 1)}% ({round((1 - chance) / chance, 1)}:1)")
+        x.add_row([len(found['outs'])] + odds)
+        print(x)
+        print(' '.join(found['outs']))
+
+    elif len(args.Hole_Cards) > 0 and args.streets:
+        streets = s.simulation_streets(args.Hole_Cards, args.flop, args.turn, args.river, variant=variant)
+        by_street = PrettyTable()
+        by_street.add_column('Hand', ['High Card', 'Pair', 'Two Pair', 'Three of a Kind', 'Straight', 'Flush',
+                                      'Full House', 'Four of a Kind', 'Straight Flush'])
+        for street, result in streets.items():
+            by_street.add_column('% by ' + street.title(),
+                                 [s.percent(count, result.samples) for count in result.hand_counts().values()])
+        print(by_street)
+
+    elif len(args.Hole_Cards) > 0:
+        sim = s.simulation_one_player(args.Hole_Cards, args.flop, args.turn, args.river, profile=args.profile,
+                                      variant=variant)
         hc_pct = s.percent(sim[1], sim[0])
         hc_ratio = s.ratio(sim[1], sim[0])
         pair_pct = s.percent(sim[2], sim[0])
@@ -83,18 +147,22 @@ if __name__ == '__main__':
         print(table)
         print("We ran your hand and board 100,000 times.  Here's the odds:\n")
         print(odds)
-
-    # elif args.outs != []:
-    #     outs = args.outs[0]
-    #     x = PrettyTable()
-    #     x.field_names = ['Outs', 'Turn Odds', 'River Odds', 'Turn+River Odds']
-    #     x.add_row([outs, s.outs[outs][0], s.outs[outs][1],s.outs[outs][2]])
-    #
-    #     print(x)
+        if args.profile:
+            print_profile(sim.stats)
 
     elif len(args.multiplayer) > 0:
         game = s.simulation_multiplayer(args.multiplayer, hole_two=args.two, hole_three=args.three, hole_four=args.four,
                                         hole_five=args.five, hole_six=args.six, flop=args.flop, turn=args.turn,
-                                        river=args.river, opponents=args.opponents[0])
-        win_pct = s.percent(game[0].wins,10000)
-        print(f"Hero's hand will win {win_pct} percent of the time")
+                                        river=args.river, opponents=args.opponents[0], profile=args.profile,
+                                        breakdown=args.breakdown, variant=variant)
+        hero = game[0].result
+        win_pct = s.percent(hero.wins, hero.samples)
+        tie_pct = s.percent(hero.ties, hero.samples)
+        print(f"Hero's hand will win {win_pct} percent of the time and tie {tie_pct} percent of the time")
+        print(f"Hero's equity, counting split pots, is {round(hero.equity * 100, 1)} percent")
+        if args.breakdown:
+            print(f"{'Hero':<16}" + ''.join(f"{column:>16}" for column in s.BREAKDOWN_COLUMNS))
+            for hand_type, row in s.breakdown_table(game[0].breakdown).items():
+                print(f"{hand_type:<16}" + ''.join(f"{count:>16,}" for count in row.values()))
+        if args.profile:
+            print_profile(game[0].result.stats)
@@ -0,0 +1,238 @@
+"""
+Omaha: four (PLO4) or five (PLO5) hole cards, of which a hand must use exactly two, with exactly three board cards.
+
+A player's hand is the best of C(4, 2) * C(5, 3) = 60 five-card hands (100 for PLO5), too many to evaluate one by one
+in a simulation.  Instead every five-card hand is split into a rank part and a suit part.  Unless it is a flush, the
+strength of five cards depends only on their ranks: RANK_STRENGTH holds it for every multiset of five ranks, keyed by
+the sum of the cards' RANK_KEY fields.  A flush needs the two hole cards and the three board cards all in one suit,
+and its strength is poker_functions.FLUSH_STRENGTH of their rank mask.  The board triples of a runout and the hole
+pairs of a player are each reduced to (key, suit, rank mask) once, and a hand is the best of the pair + triple
+lookups.
+
+Cards in the hot loops are deck indexes (Card.index: rank index * 4 + suit index).
+"""
+import random
+import time
+from itertools import combinations, combinations_with_replacement
+import holdem_sim.poker_functions as p
+import holdem_sim.simulation as s
+
+HOLE_CARDS = {'plo4': 4, 'plo5': 5}
+RANK_KEY = [1 << 3 * i for i in range(len(p.RANKS))]  # a 3-bit count per rank; five cards never carry into the next
+CARD_KEY = [RANK_KEY[index >> 2] for index in range(4 * len(p.RANKS))]  # by deck index
+CARD_RANK = [1 << (index >> 2) for index in range(4 * len(p.RANKS))]
+
+
+def _rank_strengths():
+    """Return {rank key: strength} for every multiset of five ranks, evaluated without a flush."""
+    table = {}
+    for ranks in combinations_with_replacement(range(len(p.RANKS)), 5):
+        if ranks[0] == ranks[4]:  # five of a rank
+            continue
+        lanes = 0
+        for n, rank_idx in enumerate(ranks):  # sorted, so equal ranks land in different suits, and no suit gets five
+            lanes |= 1 << (16 * (n % 4) + rank_idx)
+        table[sum(RANK_KEY[rank_idx] for rank_idx in ranks)] = p.lanes_strength(lanes)
+    return table
+
+
+RANK_STRENGTH = _rank_strengths()
+
+
+def _parts(indexes, size):
+    """Return the rank keys, and (suit, rank mask) of the suited ones, of every size-card subset of deck indexes."""
+    keys = []
+    suited = []
+    for subset in combinations(indexes, size):
+        key = 0
+        ranks = 0
+        suits = set()
+        for index in subset:
+            key += CARD_KEY[index]
+            ranks |= CARD_RANK[index]
+            suits.add(index & 3)
+        keys.append(key)
+        if len(suits) == 1:
+            suited.append((index & 3, ranks))
+    return keys, suited
+
+
+def _best(pairs, triples):
+    """Return the best strength of any hole pair with any board triple, each given as _parts()."""
+    pair_keys, pair_suited = pairs
+    triple_keys, triple_suited = triples
+    lookup = RANK_STRENGTH.__getitem__
+    best = max(map(lookup, [pair_key + triple_key for pair_key in pair_keys for triple_key in triple_keys]))
+    for suit, ranks in triple_suited:
+        for pair_suit, pair_ranks in pair_suited:
+            if pair_suit == suit and p.FLUSH_STRENGTH[ranks | pair_ranks] > best:
+                best = p.FLUSH_STRENGTH[ranks | pair_ranks]
+    return best
+
+
+def omaha_strength(hole, board):
+    """
+    Return the packed strength of the best Omaha hand: exactly two hole cards and exactly three board cards.
+
+    Parameters
+    ----------
+    hole : list
+        four or five Cards or card strings
+    board : list
+        three to five Cards or card strings
+
+    Returns
+    -------
+    strength : int
+        comparable with poker_functions.hand_strength(); expand with Hand.from_strength()
+    """
+    hole = p.make_card(hole)
+    board = p.make_card(board)
+    if len(hole) not in HOLE_CARDS.values() or not 3 <= len(board) <= 5:
+        raise ValueError("Omaha needs four or five hole cards and three to five board cards")
+    return _best(_parts([card.index for card in hole], 2), _parts([card.index for card in board], 3))
+
+
+def _hole_size(hole):
+    """Return the number of hole cards in a hand, checking it is an Omaha hand."""
+    if len(hole) not in HOLE_CARDS.values():
+        raise ValueError("Omaha hands have four or five hole cards")
+    return len(hole)
+
+
+def _board(flop, turn, river):
+    """Return the known board as Cards, checking it is empty or three to five cards."""
+    board = p.make_card(flop) + p.make_card(turn) + p.make_card(river)
+    if len(board) not in (0, 3, 4, 5):
+        raise ValueError("the board must be empty or three to five cards")
+    return board
+
+
+def simulation_one_player(hole, flop=[], turn=[], river=[], sims=100000):
+    """
+    Simulate an Omaha hand and return the frequency of each ending hand.
+
+    Works like simulation.simulation_one_player(): the unknown board cards are dealt by partial shuffles of the deck
+    stub, and hero's best two-plus-three hand is scored on each runout.
+
+    Parameters
+    ----------
+    hole : list
+        four or five cards
+    flop : list
+    turn : list
+    river: list
+    sims : int
+
+    Returns
+    -------
+    result : SimulationResult
+        samples and the count of each final hand type
+    """
+    randint = random.randint
+    start = time.perf_counter()
+    hole = p.make_card(hole)
+    _hole_size(hole)
+    board_cards = _board(flop, turn, river)
+    if s.dedupe([card.name for card in hole + board_cards]):
+        raise ValueError("a card is dealt twice")
+    board = [card.index for card in board_cards]
+    pairs = _parts([card.index for card in hole], 2)
+    stub = [card.index for card in p.remaining_cards(hole + board_cards)]
+    k = 5 - len(board)
+    last = len(stub) - 1
+    board.extend([0] * k)
+    result = s.SimulationResult()
+    counts = result.counts
+    for i in range(sims):
+        for d in range(k):
+            r = randint(d, last)
+            stub[d], stub[r] = stub[r], stub[d]
+            board[5 - k + d] = stub[d]
+        counts[_best(pairs, _parts(board, 3)) >> 20] += 1
+    counts[s.SAMPLES] = sims
+    counts[s.ELAPSED] = time.perf_counter() - start
+    return result
+
+
+def simulation_multiplayer(hole_one, hole_two=[], hole_three=[], hole_four=[], hole_five=[], hole_six=[],
+                           flop=[], turn=[], river=[], opponents=2, sims=10000):
+    """
+    Simulate multiplayer Omaha.  Returns list of Player objects with their results.
+
+    The Omaha counterpart of simulation.simulation_multiplayer(), with the same arguments.  Hero's hand sets the game:
+    four hole cards for PLO4, five for PLO5, and every other player is dealt (or must hold) as many.  The board
+    triples are reduced once per sim and the hole pairs of known hands once per run, so each player costs one lookup
+    per pair and triple.  Wins, ties and pot shares are credited by simulation.score_strengths().
+
+    Parameters
+    ----------
+    hole_one : list
+    hole_two : list
+    hole_three : list
+    hole_four : list
+    hole_five : list
+    hole_six : list
+    flop : list
+    turn : list
+    river : list
+    opponents : int
+        total number of players, hero included
+    sims : int
+
+    Returns
+    -------
+    contestants : list
+    """
+    randint = random.randint
+    start = time.perf_counter()
+    contestant_hands = [hole_one, hole_two, hole_three, hole_four, hole_five, hole_six]
+    contestants = [s.Player(n, contestant_hands[n]) for n in range(opponents)]
+    for contestant in contestants:
+        contestant.starting_cards = len(contestant.cards) > 0  # Player only counts two cards as a holdem hand
+    size = _hole_size(contestants[0].cards)
+    for contestant in contestants:
+        if contestant.starting_cards and len(contestant.cards) != size:
+            raise ValueError("every Omaha hand needs " + str(size) + " hole cards")
+    board_cards = _board(flop, turn, river)
+    known = board_cards + [card for contestant in contestants for card in contestant.cards]
+    if s.dedupe([card.name for card in known]):
+        raise ValueError("a card is dealt twice")
+    stub = [card.index for card in p.remaining_cards(known)]
+    board = [card.index for card in board_cards]
+    k = 5 - len(board)
+    board.extend([0] * k)
+    slots = [(board, 5 - k + d) for d in range(k)]  # (buffer, position) for every card dealt in a sim
+    fixed = []  # hole pair parts of each player with starting cards, None for the dealt hands
+    for contestant in contestants:
+        if contestant.starting_cards:
+            fixed.append(_parts([card.index for card in contestant.cards], 2))
+        else:
+            contestant.cards = [0] * size
+            slots.extend((contestant.cards, c) for c in range(size))
+            fixed.append(None)
+    last = len(stub) - 1
+    strengths = [0] * opponents
+    for i in range(sims):
+        for d in range(len(slots)):
+            r = randint(d, last)
+            card = stub[r]
+            stub[r] = stub[d]
+            stub[d] = card
+            buffer, position = slots[d]
+            buffer[position] = card
+        triples = _parts(board, 3)
+        for m in range(opponents):
+            pairs = fixed[m] if fixed[m] is not None else _parts(contestants[m].cards, 2)
+            strengths[m] = _best(pairs, triples)
+            contestants[m].result.counts[strengths[m] >> 20] += 1
+        s.score_strengths(contestants, strengths)
+    elapsed = time.perf_counter() - start
+    for m, contestant in enumerate(contestants):
+        contestant.result.counts[s.SAMPLES] += sims
+        contestant.result.counts[s.ELAPSED] += elapsed
+        if sims > 0:
+            contestant.hand = p.Hand.from_strength(strengths[m])
+        if fixed[m] is None:
+            contestant.cards = []
+    return contestants
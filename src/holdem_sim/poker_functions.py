@@ -7,6 +7,8 @@ RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
 RANK_VALUE = dict(zip(RANKS, CARD_VALUES))
 VALUE_RANK = dict(zip(CARD_VALUES, RANKS))
 SUITS = ['c', 'd', 'h', 's']
+RANK_INDEX = {rank: i for i, rank in enumerate(RANKS)}
+SUIT_INDEX = {suit: i for i, suit in enumerate(SUITS)}
 HAND_VALUES = {'hc': 1,
                'pair': 2,
                '2pair': 3,
@@ -18,6 +20,8 @@ HAND_VALUES = {'hc': 1,
                'straight_flush': 9
                }
 
+HAND_TYPES = {value: hand_type for hand_type, value in HAND_VALUES.items()}
+
 HAND_REGISTRY = []
 
 #####     CLASSES     #####
@@ -36,6 +40,9 @@ class Card:
         Rank is the first character in passed string. (2-9, T, J, Q, K, A)
         Suit is the second character in passed string (c, d, h. s)
         Value is derived from the value corresponding to rank key in RANK_VALUE dict
+        Index is the card's position (0-51) in a freshly generated deck; mask is the matching single bit of a 52-bit
+        card mask.  Lanes is the card's bit in a suit-lane mask (16 bits per suit, one bit per rank) used by the packed
+        evaluator.
 
         Parameters
         -----------
@@ -46,6 +53,9 @@ class Card:
         self.suit = card_str[1]
         self.name = self.rank + self.suit
         self.value = RANK_VALUE[self.rank]
+        self.index = RANK_INDEX[self.rank] * 4 + SUIT_INDEX[self.suit]
+        self.mask = 1 << self.index
+        self.lanes = 1 << (16 * SUIT_INDEX[self.suit] + RANK_INDEX[self.rank])
 
     def __str__(self):
         return self.name
@@ -60,6 +70,8 @@ class Card:
             return self.name
         elif item == 'value':
             return self.value
+        elif item == 'index':
+            return self.index
 
 
 @dataclass()
@@ -68,9 +80,10 @@ class Hand:
     A five-card poker hand.
     value refers to the value of the hand itself and is derived from the value associated with the type key in HAND_VALUES dict
     high_rank, low_rank, kicker_rank are derived from the values of the high_value, low_value, and kicker keys in the VALUE_RANK dict.
+    strength is a single integer that orders hands at showdown: a higher strength wins, equal strengths chop.
 
     """
-    def __init__(self, type, high_value, low_value = 0, kicker=0):
+    def __init__(self, type, high_value, low_value = 0, kicker=0, strength=None, kickers=()):
         """
         Parameters
         ----------
@@ -82,6 +95,13 @@ class Hand:
             default = 0. the value of the next highest card in the hand.  The kicker.
         kicker : int
             default = 0. the value of the next highest card in the hand.  Yes, this is confusing.
+        strength : int
+            default = None. packed strength the hand was built from (see hand_strength()).  If None, it is packed from
+            type, high_value, low_value, kicker and kickers in the same layout as hand_strength().
+        kickers : list
+            default = (). values of the lower cards that hand_strength() also packs, highest first: the third kicker
+            of a pair, the fourth and fifth cards of a high card hand, the four cards under high_value of a flush.
+            Cards left out count as zero, so a Hand built without them ties or loses to the evaluated hand.
         """
         if kicker in CARD_VALUES:
             kicker_rank = VALUE_RANK[kicker]
@@ -99,10 +119,55 @@ class Hand:
         self.high_rank = VALUE_RANK[self.high_value]
         self.low_value = low_value
         self.low_rank = low_rank
+        self.kickers = list(kickers)
+        if strength is None:
+            if type in ('straight', 'straight_flush'):
+                values = [high_value]
+            elif type == 'flush':
+                values = [high_value] + self.kickers
+            elif type in ('boat', '4ok'):  # trips or quads, then the pair or the kicker
+                values = [high_value, low_value]
+            else:
+                values = [high_value, low_value, kicker] + self.kickers
+            strength = self.hand_value << 20
+            for shift, value in zip((16, 12, 8, 4, 0), values):
+                strength |= value << shift
+        self.strength = strength
 
     def __str__(self):
         return self.type + '-' + self.high_rank
 
+    @classmethod
+    def from_strength(cls, strength):
+        """
+        Build a Hand from a packed strength returned by hand_strength().
+
+        Parameters
+        ----------
+        strength : int
+
+        Returns
+        -------
+        hand : Hand
+        """
+        hand_type = HAND_TYPES[strength >> 20]
+        high_value = strength >> 16 & 15
+        low_value = strength >> 12 & 15
+        kicker = strength >> 8 & 15
+        kickers = []
+        if hand_type == 'flush':
+            kickers = [strength >> shift & 15 for shift in (12, 8, 4, 0)]
+        elif hand_type == 'pair':
+            kickers = [strength >> 4 & 15]
+        elif hand_type == 'hc':
+            kickers = [strength >> 4 & 15, strength & 15]
+        if hand_type in ('straight', 'flush', 'straight_flush'):
+            low_value = 0
+            kicker = 0
+        elif hand_type in ('boat', '4ok'):
+            kicker = 0
+        return cls(hand_type, high_value, low_value=low_value, kicker=kicker, strength=strength, kickers=kickers)
+
     def __getitem__(self, item):
         if item == 'type':
             return self.type
@@ -120,6 +185,8 @@ class Hand:
             return self.low_value
         elif item == 'low_rank':
             return self.low_rank
+        elif item == 'strength':
+            return self.strength
 
 
 class Deck(list):
@@ -159,6 +226,31 @@ class Deck(list):
         self.deck.pop(i)
         return card, self
 
+    def deal_hole(self, count=2):
+        """Deal count random cards from the deck: 2 for holdem, 4 or 5 for Omaha.  Return the cards and the deck
+
+        Parameters
+        ----------
+        count : int
+            optional.  Defaults to 2
+
+        Returns
+        -------
+        cards : list
+        self : Deck
+
+        Examples:
+        ---------
+        hole, deck = deck.deal_hole(4)
+        """
+        if not 0 < count <= len(self):
+            raise ValueError("cannot deal " + str(count) + " cards from " + str(len(self)))
+        cards = []
+        for n in range(count):
+            card, deck = self.deal_card()
+            cards.append(card)
+        return cards, self
+
     def update_deck(self, card):
         """
         Remove passed card from deck
@@ -216,17 +308,45 @@ def make_card(input_list):
         return card_list
 
 
-def generate_deck():
+def card_mask(cards):
+    """
+    Pack a collection of cards into a 52-bit integer with one bit set per card.
+
+    The mask does not depend on the order of the cards, so it identifies a set of cards and can be used as a cache key.
+
+    Parameters
+    ----------
+    cards : list
+        list of Cards or card strings
+
+    Returns
+    -------
+    mask : int
+    """
+    mask = 0
+    for card in make_card(cards):
+        mask |= card.mask
+    return mask
+
+
+def generate_deck(ranks=None):
     """
     Create a full deck of cards.
 
+    Parameters
+    ----------
+    ranks : list
+        optional.  The ranks in the deck, e.g. RANKS[4:] for a short deck.  Defaults to every rank
+
     Returns
     -------
     deck : Deck
-        list-like object of 52 Card objects
+        list-like object of Card objects, four Cards per rank in ranks
     """
+    if ranks is None:
+        ranks = RANKS
     deck = []
-    for rank in RANKS:
+    for rank in ranks:
         for suit in SUITS:
             card_str = rank + suit
             _card = Card(card_str)
@@ -235,6 +355,27 @@ def generate_deck():
     return deck
 
 
+def remaining_cards(known, ranks=None):
+    """
+    Return the cards of a full deck that are not in known, in deck order.
+
+    Parameters
+    ----------
+    known : list
+        list of Cards or card strings
+    ranks : list
+        optional.  The ranks in the deck (see generate_deck()).  Defaults to every rank
+
+    Returns
+    -------
+    stub : list
+        list of Card objects
+    """
+    known_mask = card_mask(known)
+    stub = [card for card in generate_deck(ranks) if not card.mask & known_mask]
+    return stub
+
+
 #####     POKER     #####
 def find_multiple(hand, board, n=2):
     """
@@ -264,14 +405,15 @@ def find_multiple(hand, board, n=2):
     total_hand = hand + board
     values = [card.value for card in total_hand]
     c = Counter(values)
-    for value in set(values):
+    for value in sorted(set(values), reverse=True):  # highest multiple first
         if c[value] == 2 and n == 2:
             multiple = True
             hand_type = 'pair'
             high_value = value
             low_value = max([value for value in values if value != high_value])
             kicker = max([value for value in values if value not in [high_value, low_value]])
-            multiple_hand = Hand(hand_type, high_value, low_value=low_value, kicker=kicker)
+            last = max([value for value in values if value not in [high_value, low_value, kicker]], default=0)
+            multiple_hand = Hand(hand_type, high_value, low_value=low_value, kicker=kicker, kickers=[last])
             return multiple_hand
         elif c[value] == 3 and n == 3:
             multiple = True
@@ -360,7 +502,7 @@ def find_straight_flush(hand, board):
         flush_hand = [card.value for card in total_hand if card.suit == flush_suit]
         straight_flush, straight_hand = evaluate_straight(flush_hand)
         if straight_flush:
-            high_value = max(straight_hand)
+            high_value = straight_hand[0]  # evaluate_straight() lists values high to low, so a wheel is 5 high
             hand_type = 'straight_flush'
             straight_flush_hand = Hand(hand_type,high_value)
             return straight_flush_hand
@@ -416,11 +558,11 @@ def find_full_house(hand, board):
     total_hand = hand + board
     values = [card.value for card in total_hand]
     c = Counter(values)
-    for value in set(values):
+    for value in sorted(set(values), reverse=True):  # highest set first
         if c[value] == 3:
             high_value = value
             c.pop(value)
-            for value in set(values):
+            for value in sorted(set(values), reverse=True):  # highest remaining pair (or set) plays
                 if c[value] > 1:
                     low_value = value
                     kicker = max([value for value in values if value != high_value and value != low_value])
@@ -460,8 +602,9 @@ def find_flush(hand, board):
             flush = True
     if flush:
         flush_cards = [card for card in total_hand if card.suit == c.most_common(1)[0][0]]
-        high_value = max([card.value for card in flush_cards])
-        flush_hand = Hand('flush', high_value)
+        flush_values = sorted([card.value for card in flush_cards], reverse=True)
+        high_value = flush_values[0]
+        flush_hand = Hand('flush', high_value, kickers=flush_values[1:5])
         return flush_hand
     else:
         return flush
@@ -501,11 +644,7 @@ def find_straight(hand, board):
         straight, straight_hand_values = evaluate_straight(values)
         if straight:
             hand_type = 'straight'
-            if 14 in straight_hand_values:  # all([5,14]) does not work here so using nested ifs.
-                if 5 in straight_hand_values:
-                    high_value = 5
-            else:
-                high_value = max(straight_hand_values)
+            high_value = straight_hand_values[0]  # values run high to low; a wheel is listed 5, 4, 3, 2, 14
             straight_hand = Hand(hand_type, high_value)
             return straight_hand
         else:
@@ -555,11 +694,11 @@ def find_two_pair(hand, board):
     total_hand = hand + board
     values = [card.value for card in total_hand]
     c = Counter(values)
-    for value in values:
+    for value in sorted(values, reverse=True):  # the two highest pairs play
         if c[value] > 1:
             pair1 = Hand('pair', value)
             c.pop(value)
-            for value in values:
+            for value in sorted(values, reverse=True):
                 if c[value] > 1:
                     pair2 = Hand('pair', value)
                     kicker = max([value for value in values if value != pair1.high_value and value != pair2.high_value])
@@ -613,5 +752,148 @@ def find_high_card(hand, board):
     high_value = total_hand_values[-1]
     low_value = total_hand_values[-2]
     kicker = total_hand_values[-3]
-    high_card_hand = Hand('hc', high_value,low_value=low_value, kicker=kicker)
+    high_card_hand = Hand('hc', high_value,low_value=low_value, kicker=kicker, kickers=total_hand_values[-4:-6:-1])
     return high_card_hand
+
+
+
+#####     PACKED STRENGTH     #####
+#  A strength is hand_value << 20 followed by up to five 4-bit card values, most significant first:
+#  hc: five cards | pair: pair, three kickers | 2pair: top pair, bottom pair, kicker | 3ok: trips, two kickers
+#  straight: high card | flush: five cards | boat: trips, pair | 4ok: quads, kicker | straight_flush: high card
+#  Cards are passed as a suit-lane mask, the OR of Card.lanes: bits 0-12 are the clubs ranks 2-A, 16-28 diamonds, etc.
+
+RANK_MASK = (1 << len(RANKS)) - 1
+
+
+def _top_values(mask):
+    """Pack the values of the five highest ranks in a 13-bit rank mask into nibbles, highest first."""
+    packed = 0
+    shift = 16
+    for rank_idx in reversed(range(len(RANKS))):
+        if mask >> rank_idx & 1 and shift >= 0:
+            packed |= (rank_idx + 2) << shift
+            shift -= 4
+    return packed
+
+
+def _straight_high(mask):
+    """Return the value of the highest straight in a 13-bit rank mask, 5 for a wheel, or 0."""
+    for high_idx in reversed(range(4, len(RANKS))):
+        window = 0b11111 << (high_idx - 4)
+        if mask & window == window:
+            return high_idx + 2
+    wheel = 0b1000000001111  # A, 2, 3, 4, 5
+    if mask & wheel == wheel:
+        return 5
+    return 0
+
+
+TOP_VALUES = [_top_values(mask) for mask in range(1 << len(RANKS))]
+STRAIGHT_HIGH = [_straight_high(mask) for mask in range(1 << len(RANKS))]
+FLUSH_STRENGTH = [0] * (1 << len(RANKS))  # strength of a suit holding these ranks, 0 if fewer than 5
+for _mask in range(1 << len(RANKS)):
+    if bin(_mask).count('1') >= 5:
+        if STRAIGHT_HIGH[_mask]:
+            FLUSH_STRENGTH[_mask] = HAND_VALUES['straight_flush'] << 20 | STRAIGHT_HIGH[_mask] << 16
+        else:
+            FLUSH_STRENGTH[_mask] = HAND_VALUES['flush'] << 20 | TOP_VALUES[_mask]
+del _mask
+
+_PAIR = HAND_VALUES['pair'] << 20
+_TWO_PAIR = HAND_VALUES['2pair'] << 20
+_TRIPS = HAND_VALUES['3ok'] << 20
+_STRAIGHT = HAND_VALUES['straight'] << 20
+_BOAT = HAND_VALUES['boat'] << 20
+_QUADS = HAND_VALUES['4ok'] << 20
+_HIGH_CARD = HAND_VALUES['hc'] << 20
+
+
+def lanes_mask(cards):
+    """
+    OR together the suit-lane bits of a collection of cards.
+
+    Parameters
+    ----------
+    cards : list
+        list of Cards or card strings
+
+    Returns
+    -------
+    lanes : int
+    """
+    lanes = 0
+    for card in make_card(cards):
+        lanes |= card.lanes
+    return lanes
+
+
+def lanes_strength(lanes):
+    """
+    Return the packed strength of the best hand in a suit-lane mask of 5 to 7 cards.
+
+    No Hand object is built.  Use Hand.from_strength() when the names and ranks are needed.
+
+    Parameters
+    ----------
+    lanes : int
+
+    Returns
+    -------
+    strength : int
+    """
+    clubs = lanes & RANK_MASK
+    diamonds = lanes >> 16 & RANK_MASK
+    hearts = lanes >> 32 & RANK_MASK
+    spades = lanes >> 48
+    flush = FLUSH_STRENGTH[clubs] or FLUSH_STRENGTH[diamonds] or FLUSH_STRENGTH[hearts] or FLUSH_STRENGTH[spades]
+    if flush:  # with 7 cards or fewer a flush rules out quads and full houses
+        return flush
+    # bit-sliced count of each rank across the four suits
+    ones = clubs ^ diamonds ^ hearts ^ spades
+    cd = clubs & diamonds
+    hs = hearts & spades
+    low_carry = (clubs ^ diamonds) & (hearts ^ spades)
+    twos = cd ^ hs ^ low_carry
+    quads = cd & hs
+    ranks = clubs | diamonds | hearts | spades
+    if quads:
+        quad_idx = quads.bit_length() - 1
+        return _QUADS | (quad_idx + 2) << 16 | (TOP_VALUES[ranks ^ 1 << quad_idx] >> 4 & 0xF000)
+    trips = twos & ones
+    pairs = twos & ~ones
+    if trips:
+        trip_idx = trips.bit_length() - 1
+        rest = trips ^ 1 << trip_idx | pairs
+        if rest:
+            return _BOAT | (trip_idx + 2) << 16 | rest.bit_length() + 1 << 12
+    straight = STRAIGHT_HIGH[ranks]
+    if straight:
+        return _STRAIGHT | straight << 16
+    if trips:
+        return _TRIPS | (trip_idx + 2) << 16 | (TOP_VALUES[ranks ^ 1 << trip_idx] >> 4 & 0xFF00)
+    if pairs:
+        high_idx = pairs.bit_length() - 1
+        pairs ^= 1 << high_idx
+        if pairs:
+            low_idx = pairs.bit_length() - 1
+            rest = ranks ^ 1 << high_idx ^ 1 << low_idx
+            return _TWO_PAIR | (high_idx + 2) << 16 | (low_idx + 2) << 12 | (TOP_VALUES[rest] >> 8 & 0xF00)
+        return _PAIR | (high_idx + 2) << 16 | (TOP_VALUES[ranks ^ 1 << high_idx] >> 4 & 0xFFF0)
+    return _HIGH_CARD | TOP_VALUES[ranks]
+
+
+def hand_strength(cards):
+    """
+    Return the packed strength of the best five-card hand in 5 to 7 cards.
+
+    Parameters
+    ----------
+    cards : list
+        list of Cards or card strings
+
+    Returns
+    -------
+    strength : int
+    """
+    return lanes_strength(lanes_mask(cards))
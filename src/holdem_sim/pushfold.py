@@ -0,0 +1,262 @@
+"""
+Push/fold equilibrium ranges for short stacks.
+
+Everyone starts with the same stack (in big blinds), posts the blinds and an optional ante, and each player may only
+move all in or fold.  Folded to a player, they shove or fold; facing a shove, the players behind call or fold in
+turn, and the first call ends the action heads up (overcalls are not modelled).  Payoffs are in chips.
+
+Equities come from a 169 x 169 class matrix built once from sampled boards (see preflop_matrix()), kept in memory and
+optionally on disk, so the fictitious-play loop in solve() only does dot products over the 169 hand classes.
+"""
+import json
+import os
+import random
+from operator import mul
+import holdem_sim.poker_functions as p
+import holdem_sim.ranges as r
+
+RANKS = p.RANKS[::-1]  # ace first
+CLASSES = [RANKS[i] + RANKS[j] + ('' if i == j else 's' if suited else 'o')
+           for i in range(len(RANKS)) for j in range(i, len(RANKS))
+           for suited in ((True,) if i == j else (True, False))]
+CLASS_INDEX = {name: n for n, name in enumerate(CLASSES)}
+POSITIONS = ['UTG', 'HJ', 'CO', 'BTN', 'SB', 'BB']
+
+
+def hand_class(hole):
+    """
+    Return the class name of two hole cards, e.g. 'AKs', 'T9o' or '77'.
+
+    Parameters
+    ----------
+    hole : list
+        two Cards or card strings
+
+    Returns
+    -------
+    name : str
+    """
+    first, second = sorted(p.make_card(hole), key=lambda card: -card.value)
+    if first.rank == second.rank:
+        return first.rank + second.rank
+    return first.rank + second.rank + ('s' if first.suit == second.suit else 'o')
+
+
+class PreflopMatrix:
+    """
+    Heads-up preflop equities between hand classes.
+
+    Parameters
+    ----------
+    equity : list
+        169 rows of 169 floats; equity[a][b] is class a's equity against class b, ties counting half
+    weight : list
+        169 rows of 169 floats; weight[a][b] is how many combos of class b are possible against one combo of class a
+    boards : int
+        sampled boards behind the equities
+    seed : int
+        optional.  Seed the boards were sampled with, if known.  Defaults to None
+    """
+    def __init__(self, equity, weight, boards, seed=None):
+        """Parameters
+        -----------
+        equity: list
+        weight: list
+        boards: int
+        seed: int"""
+        self.equity = equity
+        self.weight = weight
+        self.boards = boards
+        self.seed = seed
+
+    def __getitem__(self, item):
+        hero, villain = item
+        return self.equity[CLASS_INDEX[hero]][CLASS_INDEX[villain]]
+
+    def save(self, path):
+        """Write the matrix to path as JSON."""
+        with open(path, 'w') as f:
+            json.dump({'classes': CLASSES, 'boards': self.boards, 'seed': self.seed, 'equity': self.equity,
+                       'weight': self.weight}, f)
+
+    @classmethod
+    def load(cls, path):
+        """Read a matrix written by save()."""
+        with open(path) as f:
+            data = json.load(f)
+        if data['classes'] != CLASSES:
+            raise ValueError(f"{path} was written for a different class order")
+        return cls(data['equity'], data['weight'], data['boards'], data.get('seed'))
+
+
+_MATRICES = {}  # (boards, seed) -> PreflopMatrix
+MAX_BOARDS = (1 << r.FIELD_BITS - 1) - 1  # a win adds 2 to a pair's counter, which must not carry into the next
+
+
+def preflop_matrix(boards=1000, seed=0, path=None):
+    """
+    Return the class equity matrix, building it on first use.
+
+    Every combo is scored against every other on the same boards sampled boards with ranges._accumulate(), which
+    evaluates each board once for all combos.  Combo pairs are then pooled into classes.  The result is kept in memory
+    per (boards, seed), and in path if one is given: an existing file is loaded instead of building, and must have been
+    built with the same boards and seed.
+
+    Per-pair counters are ranges.FIELD_BITS wide and a win counts 2, so boards is limited to MAX_BOARDS.
+
+    Parameters
+    ----------
+    boards : int
+        optional.  Number of random boards, at most MAX_BOARDS.  Defaults to 1000 (several seconds to build)
+    seed : int
+        optional.  Seed for the boards.  Defaults to 0
+    path : str
+        optional.  JSON file to load from, or save to after building.  Defaults to None
+
+    Returns
+    -------
+    matrix : PreflopMatrix
+    """
+    if not 0 < boards <= MAX_BOARDS:
+        raise ValueError(f"boards must be 1 to {MAX_BOARDS}")
+    key = (boards, seed)
+    if key in _MATRICES:
+        return _MATRICES[key]
+    if path is not None and os.path.exists(path):
+        matrix = PreflopMatrix.load(path)
+        if (matrix.boards, matrix.seed) != key:
+            raise ValueError(f"{path} holds {matrix.boards} boards with seed {matrix.seed}, not {boards} with {seed}")
+        _MATRICES[key] = matrix
+        return matrix
+    rng = random.Random(seed)
+    deck = list(range(len(r.DECK)))
+    sampled = [tuple(rng.sample(deck, 5)) for b in range(boards)]
+    live = list(range(len(r.COMBOS)))
+    wins = r._accumulate((0, live, sampled))
+    spread = [1 << (r.FIELD_BITS * n) for n in live]
+    every = sum(spread)
+    touching = {index: [n for n, combo in enumerate(r.COMBOS) if index in combo] for index in deck}
+    seen = [0] * len(r.COMBOS)
+    for board in sampled:
+        blocked = set()
+        for index in board:
+            blocked.update(touching[index])
+        row = every - sum(spread[n] for n in blocked)
+        for n in live:
+            if n not in blocked:
+                seen[n] += row
+    classes = [CLASS_INDEX[hand_class([r.DECK[a], r.DECK[b]])] for a, b in r.COMBOS]
+    masks = [r.DECK[a].mask | r.DECK[b].mask for a, b in r.COMBOS]
+    won = [[0] * len(CLASSES) for c in CLASSES]
+    played = [[0] * len(CLASSES) for c in CLASSES]
+    pairs = [[0] * len(CLASSES) for c in CLASSES]
+    combos = [0] * len(CLASSES)
+    width = r.FIELD_BITS // 8 * len(r.COMBOS)
+    for a in live:
+        combos[classes[a]] += 1
+        win_row = wins[a].to_bytes(width, 'little')
+        seen_row = seen[a].to_bytes(width, 'little')
+        won_a, played_a, pairs_a = won[classes[a]], played[classes[a]], pairs[classes[a]]
+        for b in live:
+            if not masks[a] & masks[b]:
+                played_a[classes[b]] += int.from_bytes(seen_row[2 * b:2 * b + 2], 'little')
+                won_a[classes[b]] += int.from_bytes(win_row[2 * b:2 * b + 2], 'little')
+                pairs_a[classes[b]] += 1
+    equity = [[won[a][b] / (2 * played[a][b]) if played[a][b] else 0.5 for b in range(len(CLASSES))]
+              for a in range(len(CLASSES))]
+    weight = [[pairs[a][b] / combos[a] for b in range(len(CLASSES))] for a in range(len(CLASSES))]
+    matrix = PreflopMatrix(equity, weight, boards, seed)
+    if path is not None:
+        matrix.save(path)
+    _MATRICES[key] = matrix
+    return matrix
+
+
+def _dot(row, vector):
+    """Return the dot product of two equal-length lists."""
+    return sum(map(mul, row, vector))
+
+
+def solve(stack, players=2, iterations=500, ante=0.0, matrix=None):
+    """
+    Find push/fold equilibrium ranges by fictitious play over the 169 hand classes.
+
+    Each iteration computes every seat's best response (shove or fold first in, call or fold facing each earlier
+    seat's shove) to the average strategies so far, then folds it into the averages.  Card removal between the two
+    hands in a showdown is taken into account through the matrix weights.
+
+    Parameters
+    ----------
+    stack : float
+        starting stack of every player, in big blinds
+    players : int
+        optional.  2 to 6.  Defaults to 2
+    iterations : int
+        optional.  Fictitious-play iterations.  Defaults to 500
+    ante : float
+        optional.  Ante per player, in big blinds.  Defaults to 0.0
+    matrix : PreflopMatrix
+        optional.  Defaults to preflop_matrix()
+
+    Returns
+    -------
+    solution : dict
+        'push' : {seat: {class: frequency}}, 'call' : {(shover, caller): {class: frequency}}, and 'push_range' /
+        'call_range' with the classes played at least half the time
+    """
+    if not 2 <= players <= len(POSITIONS):
+        raise ValueError(f"players must be 2 to {len(POSITIONS)}")
+    if matrix is None:
+        matrix = preflop_matrix()
+    seats = POSITIONS[-players:]
+    blinds = [0.0] * players
+    blinds[-2], blinds[-1] = 0.5, 1.0
+    posted = [blind + ante for blind in blinds]
+    total = sum(posted)
+    size = len(CLASSES)
+    equity, weight = matrix.equity, matrix.weight
+    weighted_equity = [[weight[a][b] * equity[a][b] for b in range(size)] for a in range(size)]
+    #  weight of shover class a from caller class b's side, and caller's equity, for the caller's best response
+    caller_weight = [[weight[b][a] for a in range(size)] for b in range(size)]
+    caller_equity = [[weight[b][a] * (1 - equity[a][b]) for a in range(size)] for b in range(size)]
+    weight_total = [sum(row) for row in weight]
+    push = {i: [1.0] * size for i in range(players - 1)}
+    call = {(i, j): [1.0] * size for i in range(players - 1) for j in range(i + 1, players)}
+    for t in range(iterations):
+        best_push = {}
+        for i in push:
+            response = [0.0] * size
+            for a in range(size):
+                reach = 1.0
+                ev = 0.0
+                for j in range(i + 1, players):
+                    calls = call[(i, j)]
+                    called = _dot(weight[a], calls) / weight_total[a]
+                    if called:
+                        pot = 2 * stack + total - posted[i] - posted[j]
+                        ev += reach * (_dot(weighted_equity[a], calls) / weight_total[a] * pot - called * stack)
+                    reach *= 1 - called
+                ev += reach * (total - posted[i])
+                response[a] = 1.0 if ev > -posted[i] else 0.0
+            best_push[i] = response
+        best_call = {}
+        for (i, j), calls in call.items():
+            pushes = push[i]
+            pot = 2 * stack + total - posted[i] - posted[j]
+            response = list(calls)
+            for b in range(size):
+                mass = _dot(caller_weight[b], pushes)
+                if mass:
+                    ev = _dot(caller_equity[b], pushes) / mass * pot - stack
+                    response[b] = 1.0 if ev > -posted[j] else 0.0
+            best_call[(i, j)] = response
+        step = 1 / (t + 2)
+        for i, response in best_push.items():
+            push[i] = [old + (new - old) * step for old, new in zip(push[i], response)]
+        for key, response in best_call.items():
+            call[key] = [old + (new - old) * step for old, new in zip(call[key], response)]
+    push_freq = {seats[i]: dict(zip(CLASSES, frequencies)) for i, frequencies in push.items()}
+    call_freq = {(seats[i], seats[j]): dict(zip(CLASSES, frequencies)) for (i, j), frequencies in call.items()}
+    return {'push': push_freq, 'call': call_freq,
+            'push_range': {seat: [name for name, f in freq.items() if f >= 0.5] for seat, freq in push_freq.items()},
+            'call_range': {key: [name for name, f in freq.items() if f >= 0.5] for key, freq in call_freq.items()}}
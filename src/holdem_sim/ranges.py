@@ -0,0 +1,274 @@
+"""
+Equity of every starting hand against every other on a fixed board.
+
+The 1,326 two-card combos are numbered in deck order (see COMBOS).  equity_matrix() fills a 1326 x 1326 float32
+matrix whose entry [hero][villain] is hero's all-in equity heads up, ties counting half, with NaN wherever the two
+combos share a card or either one uses a board card.
+"""
+import random
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import combinations
+from math import comb
+from multiprocessing import Pool
+import holdem_sim.poker_functions as p
+
+DECK = p.generate_deck().deck
+COMBOS = list(combinations(range(len(DECK)), 2))  # pairs of deck indexes; a card's index is Card.index
+COMBO_INDEX = {combo: n for n, combo in enumerate(COMBOS)}
+FIELD_BITS = 16  # width of one pair's counter in a packed row
+
+
+def combo_index(hole):
+    """
+    Return the row / column of a two-card combo in the matrix.
+
+    Parameters
+    ----------
+    hole : list
+        two Cards or card strings, in any order
+
+    Returns
+    -------
+    index : int
+    """
+    first, second = sorted(card.index for card in p.make_card(hole))
+    return COMBO_INDEX[(first, second)]
+
+
+def combo_name(index):
+    """Return the card string of combo index, e.g. 'AsAh'."""
+    first, second = COMBOS[index]
+    return DECK[first].name + DECK[second].name
+
+
+class EquityMatrix:
+    """
+    Heads-up equities of every combo against every combo on one board.
+
+    Parameters
+    ----------
+    board : list
+        card strings
+    values : array
+        array('f') of len(COMBOS) ** 2 equities, row-major by hero combo
+    runouts : int
+        board completions behind each entry
+    elapsed : float
+        seconds
+    """
+    def __init__(self, board, values, runouts, elapsed=0.0):
+        """Parameters
+        -----------
+        board: list
+        values: array
+        runouts: int
+        elapsed: float"""
+        self.board = board
+        self.values = values
+        self.runouts = runouts
+        self.elapsed = elapsed
+
+    def row(self, hero):
+        """Return hero's equity against every combo, as an array('f') in combo order."""
+        start = combo_index(hero) * len(COMBOS)
+        return self.values[start:start + len(COMBOS)]
+
+    def equity(self, hero, villain):
+        """Return hero's equity against villain; NaN if the hands collide with each other or the board."""
+        return self.values[combo_index(hero) * len(COMBOS) + combo_index(villain)]
+
+
+def _accumulate(task):
+    """
+    Score a share of the runouts for every live combo at once.
+
+    Each combo keeps one big integer with a FIELD_BITS counter per opposing combo.  Within a runout the combos are
+    sorted by strength, and walking them upward keeps the packed sum of every combo below, so a combo's counters
+    for a whole runout (2 per combo beaten, 1 per combo tied) are added with one integer addition.
+    """
+    board_lanes, live, runouts = task
+    lanes_strength = p.lanes_strength
+    combo_lanes = [DECK[a].lanes | DECK[b].lanes for a, b in COMBOS]
+    combo_masks = [DECK[a].mask | DECK[b].mask for a, b in COMBOS]
+    spread = [1 << (FIELD_BITS * n) for n in range(len(COMBOS))]
+    totals = [0] * len(COMBOS)
+    for runout in runouts:
+        runout_mask = 0
+        lanes = board_lanes
+        for index in runout:
+            runout_mask |= DECK[index].mask
+            lanes |= DECK[index].lanes
+        entries = sorted((lanes_strength(lanes | combo_lanes[n]), n) for n in live if not combo_masks[n] & runout_mask)
+        below = 0
+        i = 0
+        while i < len(entries):
+            j = i
+            tied = 0
+            while j < len(entries) and entries[j][0] == entries[i][0]:
+                tied += spread[entries[j][1]]
+                j += 1
+            value = 2 * below + tied
+            for m in range(i, j):
+                totals[entries[m][1]] += value
+            below += tied
+            i = j
+    return totals
+
+
+def equity_matrix(board, processes=1, chunks=None):
+    """
+    Build the heads-up equity matrix of every combo against every combo on a flop, turn or river.
+
+    Each runout is evaluated once for all the combos that do not collide with it, and the win and tie counts of every
+    pair are derived from the sorted strengths (see _accumulate()).  A turn takes under half a second in one process.
+    A flop has 1,176 runouts and takes a few seconds; pass processes to spread them over a pool.
+
+    Parameters
+    ----------
+    board : list
+        three to five Cards or card strings
+    processes : int
+        optional.  Size of the process pool; None uses every CPU.  Defaults to 1 (run in this process)
+    chunks : int
+        optional.  Number of tasks the runouts are split into.  Defaults to 1 inline, 4 per pool process
+
+    Returns
+    -------
+    matrix : EquityMatrix
+    """
+    start = time.perf_counter()
+    board = p.make_card(board)
+    if not 3 <= len(board) <= 5:
+        raise ValueError("equity_matrix needs a flop, turn or river")
+    board_mask = p.card_mask(board)
+    unseen = [card.index for card in DECK if not card.mask & board_mask]
+    live = [n for n, (a, b) in enumerate(COMBOS) if not (DECK[a].mask | DECK[b].mask) & board_mask]
+    runouts = list(combinations(unseen, 5 - len(board)))
+    if chunks is None:
+        chunks = 4 * (processes or 1) if processes != 1 else 1
+    tasks = [(p.lanes_mask(board), live, runouts[n::chunks]) for n in range(chunks)]
+    if processes == 1:
+        results = [_accumulate(task) for task in tasks]
+    else:
+        with Pool(processes) as pool:
+            results = pool.map(_accumulate, tasks)
+    per_pair = comb(len(unseen) - 4, 5 - len(board))
+    scale = 1 / (2 * per_pair)
+    nan = float('nan')
+    values = array('f', [nan]) * (len(COMBOS) * len(COMBOS))
+    width = FIELD_BITS // 8 * len(COMBOS)
+    for n in live:
+        counts = array('H', sum(result[n] for result in results).to_bytes(width, 'little'))
+        if sys.byteorder == 'big':
+            counts.byteswap()
+        row = n * len(COMBOS)
+        mask = DECK[COMBOS[n][0]].mask | DECK[COMBOS[n][1]].mask
+        for m in live:
+            a, b = COMBOS[m]
+            if not (DECK[a].mask | DECK[b].mask) & mask:
+                values[row + m] = counts[m] * scale
+    return EquityMatrix([card.name for card in board], values, per_pair, time.perf_counter() - start)
+
+
+def sweep(board, opponents=1, sims=20000, runouts=50, seed=None):
+    """
+    Rank every hero combo on a board by its equity against random opponents, sharing one set of samples.
+
+    Runouts are enumerated when there are at most runouts of them, and sampled otherwise.  Within a runout all combos
+    are evaluated once and sorted, then sims / runouts opponent deals are drawn.  Each deal is credited to every combo
+    at once with a binary search for the opponents' best hand and a difference array over the sorted order: combos
+    above it win, combos equal to it split the pot.  Combos holding one of the dealt opponent cards are taken back out
+    of that deal, so each combo is only scored against deals it could face.  The cost is close to a single
+    simulation_multiplayer() run of sims sims.
+
+    Parameters
+    ----------
+    board : list
+        three to five Cards or card strings
+    opponents : int
+        number of random opponents, 1 to 5
+    sims : int
+        optional.  Total opponent deals.  Defaults to 20000
+    runouts : int
+        optional.  Most runouts to use.  Defaults to 50
+    seed : int
+        optional.  Seed for a private random generator.  Defaults to None
+
+    Returns
+    -------
+    table : list
+        (combo string, equity) for every combo that does not use a board card, best first
+    """
+    board = p.make_card(board)
+    if not 3 <= len(board) <= 5:
+        raise ValueError("sweep needs a flop, turn or river")
+    if not 1 <= opponents <= 5:
+        raise ValueError("opponents must be 1 to 5")
+    rng = random.Random(seed)
+    lanes_strength = p.lanes_strength
+    board_mask = p.card_mask(board)
+    board_lanes = p.lanes_mask(board)
+    unseen = [card.index for card in DECK if not card.mask & board_mask]
+    live = [n for n, (a, b) in enumerate(COMBOS) if not (DECK[a].mask | DECK[b].mask) & board_mask]
+    combo_masks = [DECK[a].mask | DECK[b].mask for a, b in COMBOS]
+    by_card = {index: [n for n in live if COMBOS[n][0] == index or COMBOS[n][1] == index] for index in unseen}
+    k = 5 - len(board)
+    if comb(len(unseen), k) <= runouts:
+        chosen = list(combinations(unseen, k))
+    else:
+        chosen = [tuple(rng.sample(unseen, k)) for r in range(runouts)]
+    deals = max(1, sims // len(chosen))
+    equity = [0.0] * len(COMBOS)
+    samples = [0] * len(COMBOS)
+    for runout in chosen:
+        lanes = board_lanes
+        runout_mask = 0
+        for index in runout:
+            lanes |= DECK[index].lanes
+            runout_mask |= DECK[index].mask
+        entries = sorted((lanes_strength(lanes | DECK[COMBOS[n][0]].lanes | DECK[COMBOS[n][1]].lanes), n)
+                         for n in live if not combo_masks[n] & runout_mask)
+        strengths = [strength for strength, n in entries]
+        position = {n: m for m, (strength, n) in enumerate(entries)}
+        credit = [0.0] * (len(entries) + 1)  # difference array over the sorted combos
+        stub = [index for index in unseen if index not in runout]
+        last = len(stub) - 1
+        for deal in range(deals):
+            best = 0
+            dealt = []
+            for d in range(0, 2 * opponents, 2):
+                for e in (d, d + 1):
+                    r = rng.randint(e, last)
+                    stub[e], stub[r] = stub[r], stub[e]
+                strength = lanes_strength(lanes | DECK[stub[d]].lanes | DECK[stub[d + 1]].lanes)
+                if strength > best:
+                    best, tied = strength, 1
+                elif strength == best:
+                    tied += 1
+                dealt.append(stub[d])
+                dealt.append(stub[d + 1])
+            low = bisect_left(strengths, best)
+            high = bisect_right(strengths, best)
+            share = 1 / (tied + 1)
+            credit[high] += 1
+            credit[low] += share
+            credit[high] -= share
+            blocked = set()
+            for index in dealt:
+                blocked.update(by_card[index])
+            for n in blocked:
+                if n in position:
+                    m = position[n]
+                    equity[n] -= 1 if m >= high else share if m >= low else 0
+                    samples[n] -= 1
+        running = 0.0
+        for m, (strength, n) in enumerate(entries):
+            running += credit[m]
+            equity[n] += running
+            samples[n] += deals
+    table = [(combo_name(n), equity[n] / samples[n]) for n in live if samples[n]]
+    table.sort(key=lambda row: row[1], reverse=True)
+    return table
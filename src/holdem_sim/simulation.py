@@ -1,13 +1,300 @@
+import random
+import time
 import holdem_sim.poker_functions as p
+from array import array
 from fractions import Fraction
-from collections import Counter
+from collections import Counter, OrderedDict
+from itertools import combinations
+from math import comb
+
+
+#####     RESULTS     #####
+RESULT_FIELDS = ['samples', 'hc', 'pair', '2pair', '3ok', 'straight', 'flush', 'boat', '4ok', 'straight_flush',
+                 'wins', 'ties', 'elapsed', 'shares']  # new fields go last, so older to_bytes() payloads still load
+RESULT_INDEX = {field: i for i, field in enumerate(RESULT_FIELDS)}
+SAMPLES = RESULT_INDEX['samples']
+WINS = RESULT_INDEX['wins']
+TIES = RESULT_INDEX['ties']
+SHARES = RESULT_INDEX['shares']
+ELAPSED = RESULT_INDEX['elapsed']
+STANDARD_VALUES = list(range(len(p.HAND_VALUES) + 1))  # strength >> 20 -> Hand.hand_value; see Variant.hand_values
+
+
+class SimulationResult:
+    """
+    Counts collected by a simulation, stored in one fixed-length array of doubles.
+
+    The layout is RESULT_FIELDS: samples, one count per hand type (indexed by Hand.hand_value, so the first ten
+    entries match the tuple simulation_one_player() used to return), wins, ties, elapsed seconds and pot shares.  A
+    win is worth a share of 1 and a k-way tie 1 / k, so equity (shares per sample) counts split pots.  Results from
+    separate chunks, processes or cached runs are combined with merge() or +, and to_bytes() packs a result into
+    8 bytes per field.
+
+    stats holds a SimulationStats when the simulation was run with profile=True, else None.  It is not merged or
+    serialized.
+
+    Parameters
+    ----------
+    counts : iterable
+        optional.  Initial values in RESULT_FIELDS order.  Defaults to all zeros
+    """
+    __slots__ = ('counts', 'stats')
+
+    def __init__(self, counts=None):
+        """Parameters
+        -----------
+        counts: iterable"""
+        self.stats = None
+        if counts is None:
+            self.counts = array('d', bytes(8 * len(RESULT_FIELDS)))
+        else:
+            self.counts = array('d', counts)
+            if len(self.counts) != len(RESULT_FIELDS):
+                raise ValueError("expected " + str(len(RESULT_FIELDS)) + " counts, got " + str(len(self.counts)))
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            item = RESULT_INDEX[item]
+        return self.counts[item]
+
+    def __eq__(self, other):
+        if not isinstance(other, SimulationResult):
+            return NotImplemented
+        return self.counts == other.counts
+
+    def __add__(self, other):
+        if not isinstance(other, SimulationResult):
+            return NotImplemented
+        return self.copy().merge(other)
+
+    def __radd__(self, other):
+        if other == 0:  # lets sum() start from its default of 0
+            return self.copy()
+        return self.__add__(other)
+
+    def __repr__(self):
+        return 'SimulationResult(samples=' + str(self.samples) + ', wins=' + str(self.wins) + ', ties=' + \
+            str(self.ties) + ', equity=' + str(round(self.equity, 4)) + ')'
+
+    def copy(self):
+        """Return an independent copy of the result."""
+        return SimulationResult(self.counts)
+
+    def merge(self, other):
+        """
+        Add the counts (and elapsed time) of other into this result, in place.
+
+        Parameters
+        ----------
+        other : SimulationResult
+
+        Returns
+        -------
+        self : SimulationResult
+        """
+        counts = self.counts
+        for i, value in enumerate(other.counts):
+            counts[i] += value
+        return self
+
+    @property
+    def samples(self):
+        return int(self.counts[SAMPLES])
+
+    @property
+    def wins(self):
+        return int(self.counts[WINS])
+
+    @property
+    def ties(self):
+        return int(self.counts[TIES])
+
+    @property
+    def losses(self):
+        return self.samples - self.wins - self.ties
+
+    @property
+    def shares(self):
+        return self.counts[SHARES]
+
+    @property
+    def win_rate(self):
+        return self.wins / self.samples if self.samples else 0.0
+
+    @property
+    def tie_rate(self):
+        return self.ties / self.samples if self.samples else 0.0
+
+    @property
+    def equity(self):
+        """Share of the pot won per sample: wins count 1, a tie between k players 1 / k."""
+        return self.shares / self.samples if self.samples else 0.0
+
+    @property
+    def elapsed(self):
+        return self.counts[ELAPSED]
+
+    def hand_counts(self):
+        """
+        Return the number of samples that ended in each hand type.
+
+        Returns
+        -------
+        hand_counts : dict
+            hand type (HAND_VALUES key) -> count
+        """
+        return {hand_type: int(self.counts[value]) for hand_type, value in p.HAND_VALUES.items()}
+
+    def to_bytes(self):
+        """Pack the counts into bytes.  Reverse with SimulationResult.from_bytes()."""
+        return self.counts.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Rebuild a result packed by to_bytes().
+
+        Payloads packed before 'shares' was added have one field less.  Their shares are taken as wins plus half the
+        ties, which is exact heads-up.
+
+        Parameters
+        ----------
+        data : bytes
+
+        Returns
+        -------
+        result : SimulationResult
+        """
+        counts = array('d')
+        counts.frombytes(data)
+        if len(counts) == SHARES:
+            counts.append(counts[WINS] + counts[TIES] / 2)
+        return cls(counts)
+
+
+#  Columns of a hero breakdown: hero won, the hand type of the opponent who won (or the best of several tied), tied
+BREAKDOWN_COLUMNS = ['win'] + list(p.HAND_VALUES) + ['tie']
+BREAKDOWN_TIE = len(BREAKDOWN_COLUMNS) - 1
+
+
+def breakdown_table(breakdown):
+    """
+    Expand a hero breakdown array from simulation_multiplayer(breakdown=True) into nested dicts.
+
+    The array has one row per hero hand value and one column per BREAKDOWN_COLUMNS entry, so
+    breakdown[value * len(BREAKDOWN_COLUMNS) + column] counts the sims where hero ended with that hand value and the
+    pot went to column.
+
+    Parameters
+    ----------
+    breakdown : array
+
+    Returns
+    -------
+    table : dict
+        hero hand type -> {column: count}, for the hand types hero made at least once
+    """
+    width = len(BREAKDOWN_COLUMNS)
+    table = {}
+    for hand_type, value in p.HAND_VALUES.items():
+        row = breakdown[value * width:(value + 1) * width]
+        if any(row):
+            table[hand_type] = {column: int(count) for column, count in zip(BREAKDOWN_COLUMNS, row)}
+    return table
+
+
+#####     PROFILING     #####
+PHASES = ['convert', 'deck', 'deal', 'evaluate', 'score']
+BLOCK_SIZE = 1024  # samples per phase block; phase timers are read once per block, never per sample
+
+
+class SimulationStats:
+    """
+    Per-phase timings and counters of one simulation run.
+
+    Simulations run their samples in blocks of BLOCK_SIZE, each block passing through the deal, evaluate and score
+    phases in turn, so a phase is timed with two clock reads per block.  convert (card strings to Cards) and deck
+    (building the deck stub) happen once per run.
+
+    Attributes
+    ----------
+    phases : dict
+        phase name -> seconds
+    samples : int
+    evaluations : int
+        number of hands evaluated (or looked up in the cache)
+    cache_hits : int
+    cache_misses : int
+    elapsed : float
+        wall time of the whole run in seconds
+    """
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.samples = 0
+        self.evaluations = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.elapsed = 0.0
+
+    @property
+    def samples_per_sec(self):
+        if self.elapsed == 0:
+            return 0.0
+        return self.samples / self.elapsed
+
+    @property
+    def evaluations_per_sec(self):
+        if self.phases['evaluate'] == 0:
+            return 0.0
+        return self.evaluations / self.phases['evaluate']
+
+    def merge(self, other):
+        """
+        Add the timings and counters of other into these stats, in place.
+
+        Parameters
+        ----------
+        other : SimulationStats
+
+        Returns
+        -------
+        self : SimulationStats
+        """
+        for phase, seconds in other.phases.items():
+            self.phases[phase] += seconds
+        self.samples += other.samples
+        self.evaluations += other.evaluations
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.elapsed += other.elapsed
+        return self
+
+    def as_dict(self):
+        """
+        Return the stats as a flat dict, phase times keyed as '<phase>_sec'.
+
+        Returns
+        -------
+        stats : dict
+        """
+        stats = {phase + '_sec': seconds for phase, seconds in self.phases.items()}
+        stats.update({'samples': self.samples,
+                      'evaluations': self.evaluations,
+                      'cache_hits': self.cache_hits,
+                      'cache_misses': self.cache_misses,
+                      'elapsed_sec': self.elapsed,
+                      'samples_per_sec': self.samples_per_sec,
+                      'evaluations_per_sec': self.evaluations_per_sec,
+                      })
+        return stats
 
 
 class Player:
     """
     Class meant to designate a participant in a simulated game. Number acts as the identifier for the player.
     Hole cards can be associated with the player if passed.  If they are passed, then starting_cards is set to True.
-    If not passed, starting_cards is set to False.
+    If not passed, starting_cards is set to False.  Wins, ties and hand types seen in a simulation are counted in the
+    player's SimulationResult.
 
     Parameters
     -----------
@@ -26,12 +313,131 @@ class Player:
         self.number = number
         self.cards = cards
         self.hand = None
-        self.starting_cards = None
-        self.wins = 0
+        self.starting_cards = len(cards) == 2
+        self.result = SimulationResult()
+        self.breakdown = None
 
     def __str__(self):
         return "player_" + str(self.number)
 
+    @property
+    def wins(self):
+        return self.result.wins
+
+    @wins.setter
+    def wins(self, value):
+        self.result.counts[WINS] = value
+
+    @property
+    def equity(self):
+        return self.result.equity
+
+
+class EvaluationCache:
+    """
+    Bounded memo of packed hand strengths, keyed by the suit-lane mask of the cards evaluated.
+
+    The simulations, evaluate_strength() and cached_strength() all key entries by poker_functions.lanes_mask(), which
+    has one of 52 bits set per card, so they share entries.  The lane mask is used rather than the card mask
+    (Card.mask) because it is what lanes_strength() takes, so a hit needs no conversion.
+    The cache does not look at what it stores, and boards.board_index() keeps BoardIndex objects in one the same way.
+
+    The least recently used entry is evicted once capacity is reached.  Hits, misses and evictions are counted so the
+    hit rate of a simulation can be measured.  Pass an instance to evaluate_hand() or to either simulation to switch
+    caching on for that run.
+
+    Parameters
+    ----------
+    capacity : int
+        maximum number of strengths kept
+    """
+    def __init__(self, capacity=65536):
+        """Parameters
+        -----------
+        capacity: int"""
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._strengths = OrderedDict()
+
+    def __len__(self):
+        return len(self._strengths)
+
+    def __contains__(self, lanes):
+        return lanes in self._strengths
+
+    def get(self, lanes):
+        """
+        Return the strength stored for lanes, or None.  A hit marks the entry as most recently used.
+
+        Parameters
+        ----------
+        lanes : int
+            suit-lane mask (see poker_functions.lanes_mask())
+
+        Returns
+        -------
+        None | int
+        """
+        strength = self._strengths.get(lanes)
+        if strength is None:
+            self.misses += 1
+            return None
+        self._strengths.move_to_end(lanes)
+        self.hits += 1
+        return strength
+
+    def put(self, lanes, strength):
+        """
+        Store strength under lanes, evicting the least recently used entry if the cache is full.
+
+        Parameters
+        ----------
+        lanes : int
+            suit-lane mask (see poker_functions.lanes_mask())
+        strength : int
+            packed strength (see poker_functions.lanes_strength())
+        """
+        self._strengths[lanes] = strength
+        self._strengths.move_to_end(lanes)
+        if len(self._strengths) > self.capacity:
+            self._strengths.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        self._strengths.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        """Fraction of lookups answered from the cache.  0.0 before the first lookup."""
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / lookups
+
+    def stats(self):
+        """
+        Return a summary of cache usage.
+
+        Returns
+        -------
+        stats : dict
+        """
+        return {'capacity': self.capacity,
+                'size': len(self._strengths),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hit_rate,
+                }
+
 
 def dedupe(board):
     """
@@ -81,40 +487,44 @@ def validate_card(check):
     return valid
 
 
-def convert_and_update(deck, cards):
+#####     SIMULATIONS     #####
+def evaluate_strength(hole_cards, flop=[], turn=[], river=[], cache=None):
     """
-    Convert card strings to Card objects and remove them from Deck.
+    Evaluate hole cards and board.  Return the packed strength of the best hand.
 
-    Deck object and card list are passed in.  If the card list is empty, then both parameters are returned unchanged.
-    If the card list is not empty, elements are converted to Cards and removed from the passed Deck.
+    Works like evaluate_hand() but returns the integer from poker_functions.lanes_strength() instead of a Hand, so
+    nothing but the integer is created.  If an EvaluationCache is passed, the suit-lane mask of hole cards and board
+    is looked up first and the cards are only evaluated on a miss.
 
     Parameters
     ----------
-    deck : Deck
-    cards : list
+    hole_cards : list
+    flop : list
+    turn : list
+    river : list
+    cache : EvaluationCache
+        optional.  Defaults to None (no caching)
 
     Returns
     --------
-    tuple[deck : Deck
-    cards : list]
+    None | int
     """
-    if len(cards) == 0:
-        return deck, cards
-    else:
-        cards = p.make_card(cards)
-        for card in cards:
-            deck.update_deck(card)
-        return deck, cards
+    cards = p.make_card(hole_cards + flop + turn + river)
+    if len(cards) < 5:
+        return None
+    lanes = p.lanes_mask(cards)
+    if cache is None:
+        return p.lanes_strength(lanes)
+    return cached_strength(cache, lanes)
 
 
-#####     SIMULATIONS     #####
-def evaluate_hand(hole_cards, flop=[], turn=[], river=[]):
+def evaluate_hand(hole_cards, flop=[], turn=[], river=[], cache=None):
     """
     Evaluate hole cards and board.  Return best hand as Hand object.
 
     Hole cards, flop, turn, and river are evaluated.  If the combined number of cards is < 5, then a None is returned.
-    If > 5, then the cards are passed to each function in the HAND_REGISTRY from highest hand value to lowest.  The
-    highest hand is returned.
+    Otherwise the packed strength of the best hand is computed by evaluate_strength() and expanded into a Hand.  The
+    find_* functions in the HAND_REGISTRY give the same hand types and remain the readable reference.
 
     Parameters
     ----------
@@ -122,31 +532,82 @@ def evaluate_hand(hole_cards, flop=[], turn=[], river=[]):
     flop : list
     turn : list
     river : list
+    cache : EvaluationCache
+        optional.  Defaults to None (no caching)
 
     Returns
     --------
    None | Hand
     """
-    board = flop + turn + river
-    hand = None
-    if len(hole_cards + board) < 5:
-        return hand
+    strength = evaluate_strength(hole_cards, flop, turn, river, cache=cache)
+    if strength is None:
+        return None
+    return p.Hand.from_strength(strength)
+
+
+def cached_strength(cache, lanes, evaluate=p.lanes_strength):
+    """
+    Return the strength of the cards in a suit-lane mask, looking it up in cache first.
+
+    Parameters
+    ----------
+    cache : EvaluationCache
+    lanes : int
+        suit-lane mask (see poker_functions.lanes_mask())
+    evaluate : function
+        optional.  Evaluator used on a miss, e.g. a Variant's.  Defaults to poker_functions.lanes_strength
+
+    Returns
+    -------
+    strength : int
+    """
+    strength = cache.get(lanes)
+    if strength is None:
+        strength = evaluate(lanes)
+        cache.put(lanes, strength)
+    return strength
+
+
+def score_strengths(contestants, strengths):
+    """
+    Credit a win to the contestant with the highest strength, or a tie to everyone sharing it.
+
+    The pot is credited to shares as well: 1 to a sole winner, 1 / k to each of k tied players.
+
+    Parameters
+    ----------
+    contestants : list
+    strengths : list
+        packed strength of each contestant's hand, in the same order
+
+    Returns
+    -------
+    contestants : list
+    """
+    best = max(strengths)
+    tied = strengths.count(best)
+    if tied == 1:
+        counts = contestants[strengths.index(best)].result.counts
+        counts[WINS] += 1
+        counts[SHARES] += 1
     else:
-        for func in p.HAND_REGISTRY:
-            func = func(hole_cards, board)
-            if not func:
-                continue
-            else:
-                return func
+        share = 1 / tied
+        for player, strength in zip(contestants, strengths):
+            if strength == best:
+                counts = player.result.counts
+                counts[TIES] += 1
+                counts[SHARES] += share
+    return contestants
 
 
 def score_game(contestants):
-    #  TODO make this more elegant by functionizing repeated code.
     """
     Application will credit a win to the player with the highest hand.
 
     The hand of every player in contestants will be scored.  If more than one player has the highest valued hand,
-    then high, low, and kicker are compared to determine the actual winner.  If all are equal, then no win is awarded.
+    then high, low, and kicker are compared to determine the actual winner.  If all are equal, then no win is awarded
+    and a tie (and an equal share of the pot) is recorded for every player sharing the best hand.  All of this is a
+    comparison of Hand.strength.
 
     Parameters
     ----------
@@ -156,74 +617,98 @@ def score_game(contestants):
     -------
     contestants : list
     """
-    high = ['flush', 'straight', 'straight_flush']
-    kick = ['4ok']
-    hi_lo = ['boat']
-    hi_lo_kick = ['2pair', 'hc', '3ok', 'pair']
-    high_hand = max(contestants, key=lambda x: x.hand.hand_value)  # contestant with highest hand
-    same_high_hand = [player for player in contestants if player.hand.hand_value == high_hand.hand.hand_value]
-    if len(same_high_hand) == 1:
-        same_high_hand[0].wins += 1
-        return contestants
-    elif high_hand.hand.type in high:
-        high_card = max(same_high_hand, key=lambda x: x.hand.high_value)
-        same_high_card = [player for player in same_high_hand if player.hand.high_value == high_card.hand.high_value]
-        if len(same_high_card) == 1:
-            high_card.wins += 1
-            return contestants
-        else:
-            return contestants
-    elif high_hand.hand.type in hi_lo:
-        over = max(same_high_hand, key=lambda x: x.hand.high_value) # Highest pair in hand
-        same_over = [player for player in same_high_hand if player.hand.high_value == over.hand.high_value]
-        if len(same_over) == 1:
-            over.wins += 1
-            return contestants
-        else:
-            under = max(same_over, key=lambda x: x.hand.low_value) # lowest pair in hand
-            same_under = [player for player in same_over if player.hand.low_value == under.hand.low_value]
-            if len(same_under) == 1:
-                under.wins += 1
-                return contestants
-            else:
-                return contestants
-    elif high_hand.hand.type in hi_lo_kick:
-        over = max(same_high_hand, key=lambda x: x.hand.high_value)  # Highest pair in hand
-        same_over = [player for player in same_high_hand if player.hand.high_value == over.hand.high_value]
-        if len(same_over) == 1:
-            over.wins += 1
-            return contestants
-        else:
-            under = max(same_over, key=lambda x: x.hand.low_value)  # lowest pair in hand
-            same_under = [player for player in same_over if player.hand.low_value == under.hand.low_value]
-            if len(same_under) == 1:
-                under.wins += 1
-                return contestants
-            else:
-                kicker = max(same_under, key=lambda x: x.hand.kicker)
-                same_kicker = [player for player in same_under if player.hand.kicker == kicker.hand.kicker]
-                if len(same_kicker) == 1:
-                    kicker.wins += 1
-                    return contestants
-                else:
-                    return contestants
-    elif high_hand.hand.type in kick:
-        low_val = max(same_high_hand, key=lambda x: x.hand.low_value)
-        same_low_val = [player for player in same_high_hand if player.hand.low_value == low_val.hand.low_value]
-        if len(same_low_val) == 1:
-            low_val.wins += 1
-            return contestants
-        else:
-            return contestants
+    return score_strengths(contestants, [player.hand.strength for player in contestants])
+
+
+def _finish_stats(stats, start, cache, cache_hits, cache_misses):
+    """Fill in the run totals of stats at the end of a simulation."""
+    stats.elapsed = time.perf_counter() - start
+    if cache is not None:
+        stats.cache_hits = cache.hits - cache_hits
+        stats.cache_misses = cache.misses - cache_misses
+
+
+def _completion_types(lanes, stub_lanes, count, bar=None):
+    """Tally final hand types over every count-card completion of lanes; None as soon as one reaches bar."""
+    lanes_strength = p.lanes_strength
+    tally = [0] * 10
+    for completion in combinations(stub_lanes, count):
+        completed = lanes
+        for card_lanes in completion:
+            completed |= card_lanes
+        strength = lanes_strength(completed)
+        if bar is not None and strength >= bar:
+            return None
+        tally[strength >> 20] += 1
+    return tally
 
 
-def simulation_one_player(hole, flop=[], turn=[], river=[], sims=100000):
+def locked_outcome(board_lanes, hands, stub_lanes, to_come, budget):
+    """
+    Decide whether one player wins every completion of a hand, without dealing the completions one by one.
+
+    A player's current strength is a lower bound on their final strength, and the best strength any completion gives
+    another player is an upper bound.  If the best current hand beats every other player's upper bound, the others are
+    drawing dead and the result is locked.  Upper bounds are found by enumerating to_come board cards for known hands,
+    and to_come + 2 cards once for all players without starting cards, stopping as soon as anyone reaches the leader.
+    The check is skipped before the flop, and when it would cost more than budget evaluations.
+
+    Parameters
+    ----------
+    board_lanes : int
+    hands : list
+        lanes of each player's hole cards, or None for a player without starting cards
+    stub_lanes : list
+        lanes of every unseen card
+    to_come : int
+        board cards still to be dealt
+    budget : int
+        most evaluations to spend on the check
+
+    Returns
+    -------
+    locked : tuple or None
+        None if the result is open.  Otherwise (winner, tallies): the winner's index, and per player a count of final
+        hand types (indexed by hand value) over all of that player's completions
+    """
+    known = [n for n, hand in enumerate(hands) if hand is not None]
+    if not known or to_come > 2:
+        return None
+    cost = len(known) * comb(len(stub_lanes), to_come)
+    if len(known) < len(hands):
+        cost += comb(len(stub_lanes), to_come + 2)
+    if cost > budget:
+        return None
+    lows = [p.lanes_strength(board_lanes | hands[n]) for n in known]
+    bar = max(lows)
+    winner = known[lows.index(bar)]
+    tallies = [None] * len(hands)
+    for n in known:
+        tallies[n] = _completion_types(board_lanes | hands[n], stub_lanes, to_come, None if n == winner else bar)
+        if tallies[n] is None:
+            return None
+    if len(known) < len(hands):
+        shared = _completion_types(board_lanes, stub_lanes, to_come + 2, bar)
+        if shared is None:
+            return None
+        tallies = [shared if tally is None else tally for tally in tallies]
+    return winner, tallies
+
+
+def simulation_one_player(hole, flop=[], turn=[], river=[], sims=100000, cache=None, profile=False, variant=None):
     """
     Simulate a holdem hand 100000 times and return the frequency of each ending hand.
 
     Hole cards and whatever known cards from flop, turn and river are passed.  Random cards are dealt to bring card
     total to 7 and then the hand is evaluated.  Repeat for each sim.
 
+    The deck stub is built once.  Each sim deals by partially shuffling the stub in place and OR-ing the dealt cards
+    into the suit-lane mask of the known cards, which is evaluated to a packed strength without building a Hand.
+    Sims run in blocks of BLOCK_SIZE through the deal, evaluate and score phases.
+
+    A variants.Variant (e.g. variants.SHORT_DECK) changes the deck and the evaluator; its tables are built once, so a
+    sample costs the same as in standard holdem.  A cache must only be shared between runs of the same variant.
+
     Parameters
     ----------
     hole : list
@@ -231,67 +716,167 @@ def simulation_one_player(hole, flop=[], turn=[], river=[], sims=100000):
     turn : list
     river: list
     sims : int
+    cache : EvaluationCache
+        optional.  Memoize evaluations for this run.  Defaults to None
+    profile : bool
+        optional.  Attach a SimulationStats to the result.  Defaults to False
+    variant : Variant
+        optional.  Game variant.  Defaults to None (standard holdem)
 
-    Return:
-    tuple [int, int, int, int, int, int, int, int, int, int]
+    Returns
+    -------
+    result : SimulationResult
+        samples and the count of each final hand type.  result[0:10] matches the old (sims, high_cards, pairs, ...,
+        straight_flushes) tuple
     """
+    clock = time.perf_counter
+    lanes_strength = p.lanes_strength if variant is None else variant.evaluator  # local lookups in the hot loops
+    hand_values = STANDARD_VALUES if variant is None else variant.hand_values
+    randint = random.randint
     full_board = 7 # number of cards required to run sim
-    passed_cards = len(hole) + len(flop) + len(turn) + len(river)
-    passed_flop = [item for item in flop]
-    high_cards = 0
-    pairs = 0
-    two_pairs = 0
-    trips = 0
-    straights = 0
-    flushes = 0
-    boats = 0
-    quads = 0
-    straight_flushes = 0
-    invalid = 0
-    for i in range(sims):
-        deck = p.generate_deck()
-        deck, hole = convert_and_update(deck, hole)
-        deck, flop = convert_and_update(deck, flop)
-        deck, turn = convert_and_update(deck, turn)
-        deck, river = convert_and_update(deck, river)
-        j = full_board - passed_cards
-        for k in range(j):  # Add additional cards to make a full board of 7
-            deal, deck = deck.deal_card()
-            flop.append(deal)  # Adding to flop because it shouldn't matter, will revert flop back at end of loop
-        hand = evaluate_hand(hole, flop, turn, river)
-        if hand.type == 'straight_flush':
-            straight_flushes += 1
-        elif hand.type == '4ok':
-            quads += 1
-        elif hand.type == 'boat':
-            boats += 1
-        elif hand.type == 'flush':
-            flushes += 1
-        elif hand.type == 'straight':
-            straights += 1
-        elif hand.type == '3ok':
-            trips += 1
-        elif hand.type == '2pair':
-            two_pairs += 1
-        elif hand.type == 'pair':
-            pairs += 1
-        elif hand.type == 'hc':
-            high_cards += 1
+    start = clock()
+    cache_hits, cache_misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    known = p.make_card(hole) + p.make_card(flop) + p.make_card(turn) + p.make_card(river)
+    if variant is not None:
+        variant.validate(known)
+    converted = clock()
+    stub = p.remaining_cards(known, None if variant is None else variant.ranks)
+    built = clock()
+    j = full_board - len(known)
+    known_lanes = p.lanes_mask(known)
+    last = len(stub) - 1
+    result = SimulationResult()
+    counts = result.counts  # hand types are indexed by Hand.hand_value
+    lanes_block = [0] * min(sims, BLOCK_SIZE)
+    strength_block = [0] * min(sims, BLOCK_SIZE)
+    phase_times = [0.0, 0.0, 0.0]  # deal, evaluate, score
+    for block_start in range(0, sims, BLOCK_SIZE):
+        n = min(BLOCK_SIZE, sims - block_start)
+        dealing = clock()
+        for b in range(n):
+            lanes = known_lanes
+            for k in range(j):  # partial Fisher-Yates: stub[:j] becomes a uniform random draw
+                r = randint(k, last)
+                card = stub[r]
+                stub[r] = stub[k]
+                stub[k] = card
+                lanes |= card.lanes
+            lanes_block[b] = lanes
+        evaluating = clock()
+        if cache is None:
+            for b in range(n):
+                strength_block[b] = lanes_strength(lanes_block[b])
+        else:
+            for b in range(n):
+                strength_block[b] = cached_strength(cache, lanes_block[b], lanes_strength)
+        scoring = clock()
+        for b in range(n):
+            counts[hand_values[strength_block[b] >> 20]] += 1
+        phase_times[0] += evaluating - dealing
+        phase_times[1] += scoring - evaluating
+        phase_times[2] += clock() - scoring
+    counts[SAMPLES] = sims
+    counts[ELAPSED] = clock() - start
+    if profile:
+        stats = SimulationStats()
+        stats.phases.update(convert=converted - start, deck=built - converted, deal=phase_times[0],
+                            evaluate=phase_times[1], score=phase_times[2])
+        stats.samples = sims
+        stats.evaluations = sims
+        _finish_stats(stats, start, cache, cache_hits, cache_misses)
+        result.stats = stats
+    return result
+
+
+STREETS = {'flop': 5, 'turn': 6, 'river': 7}  # street -> cards hero holds once it is dealt, hole cards included
+
+
+def simulation_streets(hole, flop=[], turn=[], river=[], sims=100000, variant=None):
+    """
+    Simulate a holdem hand and return the frequency of each hand type at the flop, the turn and the river.
+
+    Each sim deals one complete runout, in street order, and evaluates hero's hand as each street is completed, so a
+    single run answers both "chance of making X by the turn" and "by the river".  Streets already on the board count
+    their one known hand for every sim.
+
+    Parameters
+    ----------
+    hole : list
+    flop : list
+    turn : list
+    river: list
+    sims : int
+    variant : Variant
+        optional.  Game variant (see simulation_one_player()).  Defaults to None (standard holdem)
+
+    Returns
+    -------
+    streets : dict
+        street name -> SimulationResult with samples and the count of each hand type at that street
+    """
+    lanes_strength = p.lanes_strength if variant is None else variant.evaluator  # local lookups in the hot loop
+    hand_values = STANDARD_VALUES if variant is None else variant.hand_values
+    randint = random.randint
+    start = time.perf_counter()
+    known = p.make_card(hole) + p.make_card(flop) + p.make_card(turn) + p.make_card(river)
+    if variant is not None:
+        variant.validate(known)
+    stub = p.remaining_cards(known, None if variant is None else variant.ranks)
+    known_lanes = p.lanes_mask(known)
+    streets = {street: SimulationResult() for street in STREETS}
+    checkpoints = {}  # cards dealt -> counts of the street completed by that card
+    for street, cards in STREETS.items():
+        dealt = cards - len(known)
+        if dealt > 0:
+            checkpoints[dealt] = streets[street].counts
         else:
-            invalid += 1
-        i += 1
-        flop = [item for item in passed_flop] # Reset flop back to original
-    return sims, high_cards, pairs, two_pairs, trips, straights, flushes, boats, quads, straight_flushes
+            streets[street].counts[hand_values[lanes_strength(p.lanes_mask(known[:cards])) >> 20]] += sims
+    j = 7 - len(known)
+    last = len(stub) - 1
+    for i in range(sims):
+        lanes = known_lanes
+        for k in range(j):
+            r = randint(k, last)
+            card = stub[r]
+            stub[r] = stub[k]
+            stub[k] = card
+            lanes |= card.lanes
+            if k + 1 in checkpoints:
+                checkpoints[k + 1][hand_values[lanes_strength(lanes) >> 20]] += 1
+    elapsed = time.perf_counter() - start
+    for result in streets.values():
+        result.counts[SAMPLES] = sims
+        result.counts[ELAPSED] = elapsed
+    return streets
 
 
 def simulation_multiplayer(hole_one, hole_two=[], hole_three=[], hole_four=[], hole_five=[], hole_six=[],
-                           flop = [], turn = [], river = [], opponents=2, sims=10000):
+                           flop = [], turn = [], river = [], opponents=2, sims=10000, cache=None, profile=False,
+                           prune=False, breakdown=False, variant=None):
     """
     Simulate multiplayer poker.  Returns list of Player objects with their number of wins.
 
+    Each Player's result holds its samples, wins, ties, final hand types and the elapsed time of the run.
+
     Hero's (hole_one) and other players' hands (hole_two, hole_three, etc) are evaluated and scored in 10000 (default)
     simulations.  Hole cards for all players except Hero are optional.  Number of players is passed as opponents.
 
+    As in simulation_one_player(), the deck stub is built once and dealt by partial shuffles in place, and sims run in
+    blocks through the deal, evaluate and score phases.  The board and the hole cards of players without starting
+    cards are preallocated and refilled every sim, and each player's hand is evaluated to a packed strength.
+    Player.hand is only built for the final sim.
+
+    With prune, the run first checks whether the result is already locked (see locked_outcome()), spending at most
+    the evaluations the sims would.  A locked run deals nothing: the winner is credited every sim, and each player's
+    hand-type counts are the exact frequencies over their completions scaled to sims, so they may be fractional.
+    Player.hand is then the player's hand on one completion.
+
+    With breakdown, hero's Player.breakdown is a fixed-size array counting, for each hand type hero ended with, whether
+    hero won, which hand type beat hero, or that hero tied (see breakdown_table()).  It costs one array add per sim.
+
+    A variants.Variant changes the deck and the evaluator as in simulation_one_player().  prune only applies to
+    standard holdem.
+
     Parameters
     ----------
     hole_one : list
@@ -302,58 +887,259 @@ def simulation_multiplayer(hole_one, hole_two=[], hole_three=[], hole_four=[], h
     hole_six : list
     opponents : int
     sims : int
+    cache : EvaluationCache
+        optional.  Memoize evaluations for this run.  Defaults to None
+    profile : bool
+        optional.  Attach a SimulationStats, shared by every player, to each Player's result.  Defaults to False
+    prune : bool
+        optional.  Skip the sims when the result is locked.  Not applied with breakdown.  Defaults to False
+    breakdown : bool
+        optional.  Count hero's hand type against the winning hand type.  Needs two or more players.  Defaults to False
+    variant : Variant
+        optional.  Game variant.  Defaults to None (standard holdem)
 
     Returns
     -------
     contestants : list
     """
+    clock = time.perf_counter
+    if variant is not None and variant.standard:
+        variant = None
+    lanes_strength = p.lanes_strength if variant is None else variant.evaluator  # local lookups in the hot loops
+    hand_values = STANDARD_VALUES if variant is None else variant.hand_values
+    randint = random.randint
+    start = clock()
+    cache_hits, cache_misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
     contestant_hands = [hole_one, hole_two, hole_three, hole_four, hole_five, hole_six]
     contestants = []
-    flop = p.make_card(flop)
-    turn = p.make_card(turn)
-    river = p.make_card(river)
-    passed_flop_stable = [card for card in flop]
+    board = p.make_card(flop) + p.make_card(turn) + p.make_card(river)
     for n in range(opponents):
-        player_name = 'opponent' + str(n+1)
-        player_name = Player(n, contestant_hands[n])
-        contestants.append(player_name)
-    i = 0
-    passed_board = len(flop) + len(turn) + len(river)
+        if len(contestant_hands[n]) not in (0, 2):
+            raise ValueError("holdem hands have two hole cards; see the omaha module for four or five")
+        contestants.append(Player(n, contestant_hands[n]))
+    known = [card for contestant in contestants for card in contestant.cards]
+    if variant is not None:
+        variant.validate(known + board)
+    converted = clock()
+    stub = p.remaining_cards(known + board, None if variant is None else variant.ranks)
+    built = clock()
+    known_lanes = p.lanes_mask(board)
     full_board = 5
-    k = full_board - passed_board
-    for i in range(sims):
-        deck = p.generate_deck()
-        for contestant in contestants:  # TODO move assigning Player.starting_cards to init
-            if len(contestant.cards) == 2:
-                contestant.starting_cards = True
-                for card in contestant.cards:
-                    deck.update_deck(card)  # remove known hole cards from deck
+    k = full_board - len(board)
+    table = None
+    if breakdown:
+        if len(contestants) < 2:
+            raise ValueError("breakdown needs at least two players")
+        width = len(BREAKDOWN_COLUMNS)
+        table = array('d', bytes(8 * (len(p.HAND_VALUES) + 1) * width))  # rows by hand value, row 0 unused
+        contestants[0].breakdown = table
+    if prune and sims > 0 and not breakdown and variant is None:
+        hands = [p.lanes_mask(contestant.cards) if contestant.starting_cards else None for contestant in contestants]
+        locked = locked_outcome(known_lanes, hands, [card.lanes for card in stub], k, sims * len(contestants))
+        if locked is not None:
+            winner, tallies = locked
+            elapsed = clock() - start
+            stats = None
+            if profile:
+                stats = SimulationStats()
+                stats.phases.update(convert=converted - start, deck=built - converted)
+                stats.samples = sims
+                _finish_stats(stats, start, cache, cache_hits, cache_misses)
+            contestants[winner].result.counts[WINS] += sims
+            contestants[winner].result.counts[SHARES] += sims
+            #  Player.hand comes from one completion, as the sampled path's comes from its last sim
+            runout_lanes = known_lanes
+            for card in stub[:k]:
+                runout_lanes |= card.lanes
+            spare = iter(stub[k:])
+            for m, contestant in enumerate(contestants):
+                hole_lanes = hands[m] if hands[m] is not None else next(spare).lanes | next(spare).lanes
+                contestant.hand = p.Hand.from_strength(lanes_strength(runout_lanes | hole_lanes))
+                counts = contestant.result.counts
+                total = sum(tallies[m])
+                for value in range(1, 10):
+                    counts[value] += sims * tallies[m][value] / total
+                counts[SAMPLES] += sims
+                counts[ELAPSED] += elapsed
+                contestant.result.stats = stats
+            return contestants
+    slots = [(board, len(board) + m) for m in range(k)]  # (buffer, position) for every card dealt in a sim
+    board.extend([None] * k)
+    for contestant in contestants:
+        if not contestant.starting_cards:
+            contestant.cards = [None, None]
+            slots.append((contestant.cards, 0))
+            slots.append((contestant.cards, 1))
+    players = len(contestants)
+    lanes_rows = [[0] * players for b in range(min(sims, BLOCK_SIZE))]
+    strength_rows = [[0] * players for b in range(min(sims, BLOCK_SIZE))]
+    phase_times = [0.0, 0.0, 0.0]  # deal, evaluate, score
+    last = len(stub) - 1
+    for block_start in range(0, sims, BLOCK_SIZE):
+        n = min(BLOCK_SIZE, sims - block_start)
+        dealing = clock()
+        for b in range(n):
+            for d in range(len(slots)):  # partial Fisher-Yates over the stub, dealing straight into the buffers
+                r = randint(d, last)
+                card = stub[r]
+                stub[r] = stub[d]
+                stub[d] = card
+                buffer, position = slots[d]
+                buffer[position] = card
+            board_lanes = known_lanes
+            for m in range(len(board) - k, len(board)):
+                board_lanes |= board[m].lanes
+            lanes_row = lanes_rows[b]
+            for m in range(players):
+                first, second = contestants[m].cards
+                lanes_row[m] = board_lanes | first.lanes | second.lanes
+        evaluating = clock()
+        for b in range(n):
+            lanes_row = lanes_rows[b]
+            strength_row = strength_rows[b]
+            if cache is None:
+                for m in range(players):
+                    strength_row[m] = lanes_strength(lanes_row[m])
             else:
-                contestant.starting_cards = False
-                hole_cards = []
-                for j in range(2):
-                    deal, deck = deck.deal_card()
-                    hole_cards.append(deal)
-                contestant.cards = hole_cards #  assign new hole cards if not passed
-        for l in range(k):  # complete the board as needed
-            deal, deck = deck.deal_card()
-            flop.append(deal)
-        for contestant in contestants:
-            hand = evaluate_hand(contestant.cards, flop, turn, river)
-            contestant.hand = hand
-        #  Compare hand values in contestants
-        contestants = score_game(contestants)
-        i += 1
-        #  Revert to starting state
-        flop = [card for card in passed_flop_stable]
-        for contestant in contestants:
-            if contestant.starting_cards is False:
-                contestant.cards = []
-        hole_cards = []
+                for m in range(players):
+                    strength_row[m] = cached_strength(cache, lanes_row[m], lanes_strength)
+        scoring = clock()
+        for b in range(n):
+            strength_row = strength_rows[b]
+            for m in range(players):
+                contestants[m].result.counts[hand_values[strength_row[m] >> 20]] += 1
+            #  Compare hand values in contestants
+            score_strengths(contestants, strength_row)
+        if table is not None:
+            for b in range(n):
+                strength_row = strength_rows[b]
+                hero = strength_row[0]
+                best = max(strength_row[1:])
+                table[hand_values[hero >> 20] * width +
+                      (0 if hero > best else BREAKDOWN_TIE if hero == best else hand_values[best >> 20])] += 1
+        phase_times[0] += evaluating - dealing
+        phase_times[1] += scoring - evaluating
+        phase_times[2] += clock() - scoring
+    elapsed = clock() - start
+    stats = None
+    if profile:
+        stats = SimulationStats()
+        stats.phases.update(convert=converted - start, deck=built - converted, deal=phase_times[0],
+                            evaluate=phase_times[1], score=phase_times[2])
+        stats.samples = sims
+        stats.evaluations = sims * players
+        _finish_stats(stats, start, cache, cache_hits, cache_misses)
+    for m, contestant in enumerate(contestants):
+        contestant.result.counts[SAMPLES] += sims
+        contestant.result.counts[ELAPSED] += elapsed
+        contestant.result.stats = stats
+        if sims > 0:
+            strength = strength_rows[(sims - 1) % BLOCK_SIZE][m]
+            contestant.hand = p.Hand.from_strength(strength) if variant is None else variant.hand(strength)
+        if contestant.starting_cards is False:
+            contestant.cards = []
     return contestants
 
 
-#  TODO for single and mult: find and return most likely hand.  Return number of outs and odds.
+#####     OUTS     #####
+def _category(lanes, evaluate=p.lanes_strength, codes=p.HAND_VALUES):
+    """Return the category (strength >> 20) of 3 to 7 cards; below five cards only pairs, trips and quads count."""
+    if bin(lanes).count('1') >= 5:
+        return evaluate(lanes) >> 20
+    counts = sorted((bin(lanes >> rank_idx & 0x1000100010001).count('1') for rank_idx in range(len(p.RANKS))),
+                    reverse=True)
+    if counts[0] == 4:
+        return codes['4ok']
+    if counts[0] == 3:
+        return codes['3ok']
+    if counts[0] == 2:
+        return codes['2pair' if counts[1] == 2 else 'pair']
+    return codes['hc']
+
+
+def _improves(hero_lanes, opponent_lanes, current, extra, board_lanes, evaluate=p.lanes_strength,
+              codes=p.HAND_VALUES):
+    """
+    Return True if the extra cards lift hero strictly ahead of every opponent or, without opponents, above hero's
+    current category and above what the board plays by itself, so the improvement uses a hole card.
+    """
+    hero = evaluate(hero_lanes | extra)
+    if opponent_lanes:
+        for lanes in opponent_lanes:
+            if evaluate(lanes | extra) >= hero:
+                return False
+        return True
+    return hero >> 20 > current and hero >> 20 > _category(board_lanes | extra, evaluate, codes)
+
+
+def outs(hole, board, opponents=[], variant=None):
+    """
+    Count hero's outs exactly by enumerating every unseen card.
+
+    Without opponents a card is an out if it improves hero to a better hand category that is not simply on the board
+    (a card that only pairs the board is not an out).  With known opponents a card is an out if it takes hero from
+    not winning to winning outright.  If hero is already ahead of them, ahead is True and there are no outs or odds.
+
+    On the flop, turn is the chance the turn card is an out, river the chance the river card completes hero given the
+    turn missed, and turn_river the chance hero has improved (or is winning) once both cards are out, runner-runner
+    included.  On the turn, only river is given.
+
+    Parameters
+    ----------
+    hole : list
+        hero's two hole cards
+    board : list
+        the flop, or flop and turn
+    opponents : list
+        optional.  Each item is a list of an opponent's two hole cards.  Defaults to []
+    variant : Variant
+        optional.  Game variant: its deck and hand rankings are used.  Defaults to None (standard holdem)
+
+    Returns
+    -------
+    outs : dict
+        'outs' : list of card strings, 'ahead' : bool, 'turn', 'river', 'turn_river' : float or None
+    """
+    hole = p.make_card(hole)
+    board = p.make_card(board)
+    if len(hole) != 2 or len(board) not in (3, 4):
+        raise ValueError("outs needs two hole cards and a flop or turn board")
+    opponents = [p.make_card(opponent) for opponent in opponents]
+    known = hole + board + [card for opponent in opponents for card in opponent]
+    evaluate, codes = p.lanes_strength, p.HAND_VALUES
+    if variant is not None:
+        variant.validate(known)
+        evaluate, codes = variant.evaluator, variant.codes
+    stub = p.remaining_cards(known, None if variant is None else variant.ranks)
+    board_lanes = p.lanes_mask(board)
+    hero_lanes = board_lanes | p.lanes_mask(hole)
+    opponent_lanes = [board_lanes | p.lanes_mask(opponent) for opponent in opponents]
+    current = evaluate(hero_lanes) >> 20
+    if opponent_lanes and _improves(hero_lanes, opponent_lanes, current, 0, board_lanes, evaluate, codes):
+        return {'outs': [], 'ahead': True, 'turn': None, 'river': None, 'turn_river': None}
+    hits = [card for card in stub
+            if _improves(hero_lanes, opponent_lanes, current, card.lanes, board_lanes, evaluate, codes)]
+    result = {'outs': [card.name for card in hits], 'ahead': False, 'turn': None, 'river': len(hits) / len(stub),
+              'turn_river': None}
+    if len(board) == 4:
+        return result
+    out_lanes = 0
+    for card in hits:
+        out_lanes |= card.lanes
+    improved = 0
+    late = 0
+    for n, first in enumerate(stub):
+        for second in stub[n + 1:]:
+            if _improves(hero_lanes, opponent_lanes, current, first.lanes | second.lanes, board_lanes, evaluate, codes):
+                improved += 1
+                late += (not first.lanes & out_lanes) + (not second.lanes & out_lanes)
+    misses = len(stub) - len(hits)
+    result['turn'] = len(hits) / len(stub)
+    result['river'] = late / (misses * (len(stub) - 1)) if misses else 0.0
+    result['turn_river'] = improved / (len(stub) * (len(stub) - 1) // 2)
+    return result
+
+
 #####     MATH     #####
 def percent(hits, sims):
     """
@@ -389,19 +1175,4 @@ def ratio(hits, sims):
 
 
 #####     REFERENCE     #####
-outs = {'1':('46:1','45:1',"22:1"),
-        '2':('22:1','22:1','11:1'),
-        '3':('15:1', '14:1', '7:1'),
-        '4':('11:1','10:1','5:1'),
-        '5':('8.5:1', '8:1','4:1'),
-        '6':('7:1','7:1','3:1'),
-        '7':('6:1','6:1','2.5:1'),
-        '8':('5:1','5:1','2.5:1'),
-        '9':('4:1','4:1','2:1'),
-        '10':('3.5:1','3.5:1','1.5:1'),
-        '11':('3.3:1','3.2:1','1.5:1'),
-        '12':('3:1','3:1','1.2:1'),
-        }
-
-
 rank_value = p.RANK_VALUE
\ No newline at end of file
@@ -0,0 +1,218 @@
+"""
+Game variants: which ranks are in the deck, which straights count and how the hand categories are ordered.
+
+Cards keep their usual Card.index, mask and lanes bits in every variant, so a short deck is simply a deck without the
+low ranks.  What changes is evaluation.  A Variant builds its own straight and flush tables, and an evaluator with the
+same shape as poker_functions.lanes_strength(), the first time it is used; the tables are cached per (ranks, order),
+so a short-deck simulation costs the same per sample as a standard one.
+
+A variant's packed strength puts the category's position in the variant's order in place of Hand.hand_value (bits 20
+and up), so strengths compare correctly within a variant.  Variant.hand_values maps it back to the standard hand value
+used to count hand types, and Variant.hand() builds the Hand.
+"""
+import holdem_sim.poker_functions as p
+
+STANDARD_ORDER = sorted(p.HAND_VALUES, key=p.HAND_VALUES.get)  # weakest first
+SHORT_DECK_ORDER = ['hc', 'pair', '2pair', '3ok', 'straight', 'boat', 'flush', '4ok', 'straight_flush']
+
+_EVALUATORS = {}  # (ranks, order) -> (evaluator, tables)
+
+#  hand type -> the types it must outrank in any order.  Seven cards that make a flush, quads or a full house can also
+#  make the types listed, and the evaluator returns those hands without looking for them; the best high card hand is
+#  taken to be the top five ranks, which could be a straight.  Otherwise straights go wherever the order puts them.
+ORDER_CONSTRAINTS = {'pair': ['hc'],
+                     '2pair': ['pair'],
+                     '3ok': ['pair'],
+                     'straight': ['hc'],
+                     'boat': ['3ok', '2pair'],
+                     '4ok': ['boat'],
+                     'flush': ['straight', '3ok', '2pair'],
+                     'straight_flush': ['flush'],
+                     }
+
+
+def _straight_table(ranks):
+    """Return the high value of the best straight in every 13-bit rank mask, for straights of five adjacent ranks."""
+    indexes = [p.RANK_INDEX[rank] for rank in ranks]
+    windows = []  # (window mask, high value), best first
+    for n in reversed(range(4, len(indexes))):
+        windows.append((sum(1 << i for i in indexes[n - 4:n + 1]), indexes[n] + 2))
+    if ranks[-1] == 'A':  # the ace also plays low, under the four lowest ranks
+        windows.append((1 << indexes[-1] | sum(1 << i for i in indexes[:4]), indexes[3] + 2))
+    table = [0] * (1 << len(p.RANKS))
+    for mask in range(1 << len(p.RANKS)):
+        for window, high in windows:
+            if mask & window == window:
+                table[mask] = high
+                break
+    return table
+
+
+def _build_evaluator(ranks, order):
+    """Build the tables of a variant and return (evaluator, tables).  See Variant.evaluator."""
+    codes = {hand_type: n + 1 for n, hand_type in enumerate(order)}
+    top_values = p.TOP_VALUES
+    straight_high = _straight_table(ranks)
+    flush_strength = [0] * (1 << len(p.RANKS))
+    for mask in range(1 << len(p.RANKS)):
+        if bin(mask).count('1') >= 5:
+            if straight_high[mask]:
+                flush_strength[mask] = codes['straight_flush'] << 20 | straight_high[mask] << 16
+            else:
+                flush_strength[mask] = codes['flush'] << 20 | top_values[mask]
+    rank_mask = p.RANK_MASK
+    pair, two_pair, trips = codes['pair'] << 20, codes['2pair'] << 20, codes['3ok'] << 20
+    straight_code, boat, quads, high_card = codes['straight'] << 20, codes['boat'] << 20, codes['4ok'] << 20, \
+        codes['hc'] << 20
+    #  with seven cards a straight can only share the hand with trips, two pair, a pair or nothing
+    straight_first = codes['straight'] > max(codes['3ok'], codes['2pair'], codes['pair'], codes['hc'])
+
+    def evaluate(lanes):
+        """Return the packed strength of the best hand in a suit-lane mask of 5 to 7 cards, in this variant."""
+        clubs = lanes & rank_mask
+        diamonds = lanes >> 16 & rank_mask
+        hearts = lanes >> 32 & rank_mask
+        spades = lanes >> 48
+        flush = flush_strength[clubs] or flush_strength[diamonds] or flush_strength[hearts] or flush_strength[spades]
+        if flush:  # with 7 cards or fewer a flush rules out quads and full houses
+            return flush
+        ones = clubs ^ diamonds ^ hearts ^ spades
+        cd = clubs & diamonds
+        hs = hearts & spades
+        low_carry = (clubs ^ diamonds) & (hearts ^ spades)
+        twos = cd ^ hs ^ low_carry
+        four = cd & hs
+        ranks = clubs | diamonds | hearts | spades
+        if four:
+            quad_idx = four.bit_length() - 1
+            return quads | (quad_idx + 2) << 16 | (top_values[ranks ^ 1 << quad_idx] >> 4 & 0xF000)
+        three = twos & ones
+        pairs = twos & ~ones
+        if three:
+            trip_idx = three.bit_length() - 1
+            rest = three ^ 1 << trip_idx | pairs
+            if rest:
+                return boat | (trip_idx + 2) << 16 | rest.bit_length() + 1 << 12
+        straight = straight_high[ranks]
+        if straight and straight_first:
+            return straight_code | straight << 16
+        if three:
+            made = trips | (trip_idx + 2) << 16 | (top_values[ranks ^ 1 << trip_idx] >> 4 & 0xFF00)
+        elif pairs:
+            high_idx = pairs.bit_length() - 1
+            pairs ^= 1 << high_idx
+            if pairs:
+                low_idx = pairs.bit_length() - 1
+                rest = ranks ^ 1 << high_idx ^ 1 << low_idx
+                made = two_pair | (high_idx + 2) << 16 | (low_idx + 2) << 12 | (top_values[rest] >> 8 & 0xF00)
+            else:
+                made = pair | (high_idx + 2) << 16 | (top_values[ranks ^ 1 << high_idx] >> 4 & 0xFFF0)
+        else:
+            made = high_card | top_values[ranks]
+        if straight:
+            return max(made, straight_code | straight << 16)
+        return made
+
+    return evaluate, {'straight_high': straight_high, 'flush_strength': flush_strength}
+
+
+class Variant:
+    """
+    A poker variant: the deck's ranks, its straights and the order of the hand categories.
+
+    Straights are five adjacent ranks of the deck, and the ace also plays below the four lowest ranks (A-2-3-4-5 in
+    a full deck, A-6-7-8-9 in a short deck).
+
+    Parameters
+    ----------
+    name : str
+    ranks : list
+        optional.  Ranks in the deck, lowest first.  Defaults to poker_functions.RANKS
+    order : list
+        optional.  The HAND_VALUES hand types, weakest first.  Defaults to STANDARD_ORDER.  Each type must come after
+        the types ORDER_CONSTRAINTS lists for it; straights can go anywhere
+    """
+    def __init__(self, name, ranks=None, order=None):
+        """Parameters
+        -----------
+        name: str
+        ranks: list
+        order: list"""
+        self.name = name
+        self.ranks = list(p.RANKS if ranks is None else ranks)
+        self.order = list(STANDARD_ORDER if order is None else order)
+        if len(self.ranks) < 5 or any(rank not in p.RANKS for rank in self.ranks):
+            raise ValueError("a deck needs at least five ranks from poker_functions.RANKS")
+        if sorted(self.order) != sorted(STANDARD_ORDER):
+            raise ValueError("order must list every hand type once")
+        for hand_type, weaker in ORDER_CONSTRAINTS.items():
+            for other in weaker:
+                if self.order.index(hand_type) < self.order.index(other):
+                    raise ValueError("order must rank " + hand_type + " above " + other)
+        self.codes = {hand_type: n + 1 for n, hand_type in enumerate(self.order)}  # hand type -> strength >> 20
+        self.hand_values = [0] + [p.HAND_VALUES[hand_type] for hand_type in self.order]  # strength >> 20 -> value
+
+    def __repr__(self):
+        return 'Variant(' + repr(self.name) + ')'
+
+    @property
+    def standard(self):
+        """True if this is ordinary holdem, which uses poker_functions.lanes_strength() itself."""
+        return self.ranks == p.RANKS and self.order == STANDARD_ORDER
+
+    @property
+    def evaluator(self):
+        """The variant's lanes_strength(lanes) function, built with its tables on first use."""
+        if self.standard:
+            return p.lanes_strength
+        key = (tuple(self.ranks), tuple(self.order))
+        if key not in _EVALUATORS:
+            _EVALUATORS[key] = _build_evaluator(self.ranks, self.order)
+        return _EVALUATORS[key][0]
+
+    def lanes_strength(self, lanes):
+        """Return the packed strength, in this variant, of the best hand in a suit-lane mask of 5 to 7 cards."""
+        return self.evaluator(lanes)
+
+    def hand_strength(self, cards):
+        """Return the packed strength, in this variant, of the best hand in 5 to 7 Cards or card strings."""
+        return self.evaluator(p.lanes_mask(cards))
+
+    def hand(self, strength):
+        """Build the Hand of a packed strength of this variant.  Hand.strength keeps the variant's strength."""
+        hand = p.Hand.from_strength(self.hand_values[strength >> 20] << 20 | strength & 0xFFFFF)
+        hand.strength = strength
+        return hand
+
+    def validate(self, cards):
+        """
+        Raise ValueError if any of cards has a rank that is not in this variant's deck.
+
+        Parameters
+        ----------
+        cards : list
+            Cards or card strings
+
+        Returns
+        -------
+        cards : list
+            the cards, as Cards
+        """
+        cards = p.make_card(cards)
+        missing = [card.name for card in cards if card.rank not in self.ranks]
+        if missing:
+            raise ValueError(' '.join(missing) + " not in the " + self.name + " deck")
+        return cards
+
+    def deck(self):
+        """Return a full Deck of this variant."""
+        return p.generate_deck(self.ranks)
+
+    def remaining_cards(self, known):
+        """Return the cards of this variant's deck that are not in known, in deck order."""
+        return p.remaining_cards(known, self.ranks)
+
+
+STANDARD = Variant('standard')
+SHORT_DECK = Variant('short_deck', ranks=p.RANKS[4:], order=SHORT_DECK_ORDER)
+VARIANTS = {variant.name: variant for variant in (STANDARD, SHORT_DECK)}
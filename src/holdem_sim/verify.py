@@ -0,0 +1,197 @@
+"""
+Cross-check the packed evaluator against the find_* functions in HAND_REGISTRY.
+
+Every 7-card hand (or a seeded random subset) is evaluated twice: by poker_functions.lanes_strength() and by the
+reference chain of find_* functions.  The reference Hand's packed strength (Hand.strength) must equal the packed
+evaluator's, so the hand type and every card that ranks the hand agree: all five flush or high cards, each kicker of a
+pair, and so on.  The work is split into chunks and spread over a process pool, and the time spent in each evaluator
+is reported, so the command doubles as an evaluator throughput benchmark.
+
+Usage:  python -m holdem_sim.verify [--sample N] [--seed S] [--processes P] [--fast-only]
+"""
+import argparse
+import random
+import time
+from itertools import combinations
+from multiprocessing import Pool
+import holdem_sim.poker_functions as p
+
+DECK = p.generate_deck().deck
+ALL_HANDS = 133784560
+
+#  number of 7-card hands of each type; a full walk with --fast-only must reproduce these
+SEVEN_CARD_COUNTS = {'hc': 23294460,
+                     'pair': 58627800,
+                     '2pair': 31433400,
+                     '3ok': 6461620,
+                     'straight': 6180020,
+                     'flush': 4047644,
+                     'boat': 3473184,
+                     '4ok': 224848,
+                     'straight_flush': 41584,
+                     }
+
+
+def reference_hand(cards):
+    """Return the best Hand found by the HAND_REGISTRY chain for a list of 7 Cards."""
+    for func in p.HAND_REGISTRY:
+        hand = func(cards[:2], cards[2:])
+        if hand:
+            return hand
+
+
+def describe(strength):
+    """Return a packed strength as readable text, e.g. 'pair-Q (0x2ca93)'."""
+    return str(p.Hand.from_strength(strength)) + ' (' + hex(strength) + ')'
+
+
+def check_hands(hands, fast_only=False, max_disagreements=10):
+    """
+    Evaluate each hand with both evaluators and collect disagreements.
+
+    Parameters
+    ----------
+    hands : list
+        list of 7-tuples of card indices (0-51, see Card.index)
+    fast_only : bool
+        skip the reference evaluator and only count hand types
+    max_disagreements : int
+        stop recording (but keep counting) disagreements after this many
+
+    Returns
+    -------
+    report : dict
+        {'hands', 'counts', 'disagreements', 'first_disagreements', 'fast_sec', 'reference_sec'}
+    """
+    lanes = [card.lanes for card in DECK]
+    start = time.perf_counter()
+    strengths = []
+    for hand in hands:
+        mask = 0
+        for i in hand:
+            mask |= lanes[i]
+        strengths.append(p.lanes_strength(mask))
+    fast_sec = time.perf_counter() - start
+    counts = dict.fromkeys(p.HAND_VALUES, 0)
+    for strength in strengths:
+        counts[p.HAND_TYPES[strength >> 20]] += 1
+    report = {'hands': len(hands), 'counts': counts, 'disagreements': 0, 'first_disagreements': [],
+              'fast_sec': fast_sec, 'reference_sec': 0.0}
+    if fast_only:
+        return report
+    start = time.perf_counter()
+    references = [reference_hand([DECK[i] for i in hand]) for hand in hands]
+    report['reference_sec'] = time.perf_counter() - start
+    for hand, strength, reference in zip(hands, strengths, references):
+        if strength != reference.strength:
+            report['disagreements'] += 1
+            if len(report['first_disagreements']) < max_disagreements:
+                report['first_disagreements'].append((' '.join(DECK[i].name for i in hand),
+                                                      describe(reference.strength), describe(strength)))
+    return report
+
+
+def _check_prefix(task):
+    """Check every 7-card hand whose three lowest cards are prefix."""
+    prefix, fast_only, max_disagreements = task
+    hands = [prefix + rest for rest in combinations(range(prefix[-1] + 1, 52), 4)]
+    return check_hands(hands, fast_only, max_disagreements)
+
+
+def _check_sample(task):
+    """Check size random hands drawn with their own seeded generator."""
+    seed, size, fast_only, max_disagreements = task
+    rng = random.Random(seed)
+    hands = [tuple(rng.sample(range(52), 7)) for i in range(size)]
+    return check_hands(hands, fast_only, max_disagreements)
+
+
+def merge_reports(reports, max_disagreements=10):
+    """Combine chunk reports into one."""
+    total = {'hands': 0, 'counts': dict.fromkeys(p.HAND_VALUES, 0), 'disagreements': 0, 'first_disagreements': [],
+             'fast_sec': 0.0, 'reference_sec': 0.0}
+    for report in reports:
+        total['hands'] += report['hands']
+        for hand_type, count in report['counts'].items():
+            total['counts'][hand_type] += count
+        total['disagreements'] += report['disagreements']
+        room = max_disagreements - len(total['first_disagreements'])
+        total['first_disagreements'].extend(report['first_disagreements'][:max(room, 0)])
+        total['fast_sec'] += report['fast_sec']
+        total['reference_sec'] += report['reference_sec']
+    return total
+
+
+def verify(sample=None, seed=0, processes=None, fast_only=False, max_disagreements=10, chunk_size=20000):
+    """
+    Run the cross-check over every 7-card hand, or over sample random hands.
+
+    Parameters
+    ----------
+    sample : int
+        optional.  Number of random hands.  Defaults to None (all 133,784,560 hands)
+    seed : int
+        seed for the random subset
+    processes : int
+        optional.  Size of the process pool.  Defaults to the number of CPUs; 1 runs in this process
+    fast_only : bool
+        only evaluate with the packed evaluator
+    max_disagreements : int
+        number of disagreements kept for the report
+    chunk_size : int
+        hands per task when sampling
+
+    Returns
+    -------
+    report : dict
+        merged report (see check_hands()) plus 'wall_sec'
+    """
+    if sample is None:
+        tasks = [(prefix, fast_only, max_disagreements) for prefix in combinations(range(48), 3)]
+        worker = _check_prefix
+    else:
+        sizes = [chunk_size] * (sample // chunk_size)
+        if sample % chunk_size:
+            sizes.append(sample % chunk_size)
+        tasks = [(seed * 1000003 + n, size, fast_only, max_disagreements) for n, size in enumerate(sizes)]
+        worker = _check_sample
+    start = time.perf_counter()
+    if processes == 1:
+        reports = [worker(task) for task in tasks]
+    else:
+        with Pool(processes) as pool:
+            reports = list(pool.imap_unordered(worker, tasks))
+    report = merge_reports(reports, max_disagreements)
+    report['wall_sec'] = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m holdem_sim.verify", description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sample', type=int, help="Check this many random hands instead of all of them")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for --sample.  Defaults to 0")
+    parser.add_argument('--processes', type=int, help="Worker processes.  Defaults to the number of CPUs")
+    parser.add_argument('--fast-only', action='store_true',
+                        help="Only run the packed evaluator (throughput and counts)")
+    parser.add_argument('--show', type=int, default=10, help="Number of disagreements to print.  Defaults to 10")
+    args = parser.parse_args(argv)
+
+    report = verify(args.sample, args.seed, args.processes, args.fast_only, args.show)
+    hands = report['hands']
+    print(f"Checked {hands:,} hands in {report['wall_sec']:.1f}s wall")
+    for hand_type, count in report['counts'].items():
+        print(f"  {hand_type:<15} {count:>12,}")
+    if args.sample is None and report['counts'] != SEVEN_CARD_COUNTS:
+        print("Hand type counts do not match the known 7-card totals")
+    print(f"packed evaluator:   {hands / report['fast_sec']:>12,.0f} hands/sec per process")
+    if not args.fast_only:
+        print(f"reference registry: {hands / report['reference_sec']:>12,.0f} hands/sec per process")
+        print(f"{report['disagreements']:,} disagreements")
+        for cards, expected, fast in report['first_disagreements']:
+            print(f"  {cards}: registry {expected} fast {fast}")
+    failed = report['disagreements'] or (args.sample is None and report['counts'] != SEVEN_CARD_COUNTS)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
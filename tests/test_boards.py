@@ -0,0 +1,84 @@
+from itertools import combinations
+import pytest
+import holdem_sim.boards as b
+import holdem_sim.poker_functions as p
+import holdem_sim.simulation as s
+
+
+def brute_force(board, hole):
+    hero = p.hand_strength(p.make_card(board + hole))
+    counts = {'beat': 0, 'tie': 0, 'lose': 0}
+    for first, second in combinations(p.remaining_cards(board + hole), 2):
+        strength = p.hand_strength(p.make_card(board) + [first, second])
+        counts['beat' if strength < hero else 'tie' if strength == hero else 'lose'] += 1
+    return counts
+
+
+@pytest.mark.parametrize('board, hole', [(['Qh', 'Jh', '2c', '7d', '7s'], ['Ah', 'Kh']),
+                                         (['Qh', 'Jh', '2c', '7d', '7s'], ['7c', '7h']),
+                                         (['As', 'Ks', 'Qs', 'Js', 'Ts'], ['2c', '3d']),
+                                         (['9c', '8d', '2h'], ['Tc', 'Jc']),
+                                         (['9c', '8d', '2h', '2s'], ['9h', '3c'])])
+def test_compare_matches_brute_force(board, hole):
+    assert b.BoardIndex(board).compare(hole) == brute_force(board, hole)
+
+
+def test_river_counts_and_nuts():
+    index = b.BoardIndex(['Qh', 'Jh', '2c', '7d', '7s'])
+    assert len(index) == 1081
+    assert index.nut_combos == ['7c7h'] and index.nut_hand.type == '4ok'
+    assert index.rank(['7c', '7h']) == 1 and index.percentile(['7c', '7h']) == 1.0
+    assert index.beating(['Ah', 'Kh'])[0] == '7c7h'
+    assert len(index.beating(['Ah', 'Kh'])) == index.compare(['Ah', 'Kh'])['lose']
+
+
+def test_board_index_cached():
+    cache = s.EvaluationCache(capacity=4)
+    first = b.board_index(['Qh', 'Jh', '2c'], cache)
+    assert b.board_index(['2c', 'Qh', 'Jh'], cache) is first and cache.hits == 1
+
+
+def test_bad_hole_cards():
+    index = b.board_index(['Qh', 'Jh', '2c'])
+    with pytest.raises(ValueError):
+        index.compare(['Qh', 'Kd'])
+    with pytest.raises(ValueError):
+        b.BoardIndex(['Qh', 'Jh'])
+
+
+def test_hand_potential_matches_brute_force():
+    hole, board = ['Ah', 'Kh'], ['Qh', '7h', '2c', '3d']
+    unseen = p.remaining_cards(board + hole)
+    hero_now = p.hand_strength(p.make_card(board + hole))
+    potential = [[0] * 3 for status in range(3)]
+    for first, second in combinations(unseen, 2):
+        now = b._status(hero_now, p.hand_strength(p.make_card(board) + [first, second]))
+        for river in unseen:
+            if river.lanes & (first.lanes | second.lanes):
+                continue
+            hero = p.hand_strength(p.make_card(board + hole) + [river])
+            potential[now][b._status(hero, p.hand_strength(p.make_card(board) + [first, second, river]))] += 1
+    totals = [sum(row) for row in potential]
+    ppot = (potential[2][0] + potential[2][1] / 2 + potential[1][0] / 2) / (totals[2] + totals[1] / 2)
+    npot = (potential[0][2] + potential[1][2] / 2 + potential[0][1] / 2) / (totals[0] + totals[1] / 2)
+    metrics = b.hand_potential(hole, board)
+    assert metrics['ppot'] == pytest.approx(ppot) and metrics['npot'] == pytest.approx(npot)
+    assert metrics['hs'] == b.board_index(board).percentile(hole)
+
+
+def test_hand_potential_sampled_and_river():
+    exact = b.hand_potential(['Ah', 'Kh'], ['Qh', '7h', '2c'], lookahead=1)
+    sampled = b.hand_potential(['Ah', 'Kh'], ['Qh', '7h', '2c'], lookahead=1, sims=20000, seed=1)
+    assert sampled['ppot'] == pytest.approx(exact['ppot'], abs=0.02)
+    river = b.hand_potential(['Ah', 'Kh'], ['Qh', '7h', '2c', '3d', '9s'])
+    assert river['ppot'] == river['npot'] == 0 and river['ehs'] == river['hs']
+    with pytest.raises(ValueError):
+        b.hand_potential(['Ah', 'Kh'], ['Qh', '7h', '2c', '3d'], lookahead=2)
+
+
+def test_hand_potential_flop_samples_by_default():
+    exact = b.hand_potential(['Ah', 'Kh'], ['Qh', '7h', '2c'], exact=True)
+    fast = b.hand_potential(['Ah', 'Kh'], ['Qh', '7h', '2c'], seed=3)
+    assert fast['hs'] == exact['hs']
+    assert fast['ppot'] == pytest.approx(exact['ppot'], abs=0.04)
+    assert fast['npot'] == pytest.approx(exact['npot'], abs=0.04)
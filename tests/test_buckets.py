@@ -0,0 +1,52 @@
+import pytest
+import holdem_sim.buckets as bk
+import holdem_sim.simulation as s
+
+
+def test_situation_key_suit_isomorphism():
+    key = bk.situation_key(['Ah', 'Kh'], ['Qh', '7d', '2c'])
+    assert key == bk.situation_key(['Ks', 'As'], ['2d', 'Qs', '7c'])
+    assert key != bk.situation_key(['Ah', 'Kd'], ['Qh', '7d', '2c'])
+    hole, board = bk.situation_cards(key)
+    assert bk.situation_key(hole, board) == key and len(hole) == 2 and len(board) == 3
+
+
+def test_canonical_flops():
+    assert sum(1 for board in bk.canonical_boards('flop')) == 1755
+
+
+def test_emd():
+    assert bk.emd([1, 0, 0], [0, 0, 1]) == 2
+    assert bk.emd([1, 1], [2, 2]) == 0
+
+
+def test_kmeans_separates_strong_and_weak():
+    histograms = [[5, 1, 0, 0], [4, 2, 0, 0], [0, 0, 1, 5], [0, 0, 2, 4]]
+    assignments, centroids = bk.kmeans_emd(histograms, 2, seed=1)
+    assert assignments[0] == assignments[1] != assignments[2] == assignments[3]
+
+
+def test_pipeline_checkpoint_and_index(tmp_path):
+    checkpoint = str(tmp_path / 'turn.jsonl')
+    histograms = bk.build_histograms(checkpoint, 'turn', boards=2, bins=10, runouts=8, processes=1)
+    assert all(sum(histogram) <= 8 for histogram in histograms.values())
+    with open(checkpoint) as f:
+        assert len(f.readlines()) == 2
+    again = bk.build_histograms(checkpoint, 'turn', boards=2, bins=10, runouts=8, processes=1)
+    with open(checkpoint) as f:
+        assert len(f.readlines()) == 2 and again == histograms
+    index = bk.bucket_histograms(histograms, 'turn', 4)
+    path = str(tmp_path / 'index.json')
+    index.save(path)
+    loaded = bk.BucketIndex.load(path)
+    hole, board = bk.situation_cards(next(iter(histograms)))
+    assert loaded.bucket(hole, board) == index.bucket(hole, board) and 0 <= loaded.bucket(hole, board) < 4
+    with pytest.raises(KeyError):
+        loaded.bucket(['Ah', 'Kh'], ['Qh', 'Jh', 'Th', '9h'])
+
+
+def test_board_histograms_cache_is_optional():
+    board = ['Ah', 'Kd', '7c', '2s']
+    cache = s.EvaluationCache(capacity=4)
+    assert bk.board_histograms(board, bins=10, runouts=8) == bk.board_histograms(board, bins=10, runouts=8, cache=cache)
+    assert len(cache) == 4
@@ -0,0 +1,60 @@
+import pytest
+import holdem_sim.enumeration as e
+import holdem_sim.simulation as s
+
+
+def test_enumerate_one_player_turn():
+    result = e.enumerate_one_player(['Ah', 'Kh'], ['Qh', 'Jh', '2c'], ['3d'])
+    assert result.samples == 46 and result['straight_flush'] == 1 and result['flush'] == 8
+
+
+def test_enumerate_one_player_flop_samples():
+    result = e.enumerate_one_player(['Ah', 'Kh'], ['Qh', 'Jh', '2c'])
+    assert result.samples == 1081 and sum(result.hand_counts().values()) == 1081
+
+
+def test_enumerate_multiplayer_river_known():
+    players = e.enumerate_multiplayer(['As', 'Ad'], ['Kc', 'Kd'], flop=['2c', '7h', 'Js'], turn=['3d'], river=['9c'])
+    assert players[0].result.samples == 1 and players[0].wins == 1
+
+
+def test_enumerate_multiplayer_random_opponent():
+    """Heads up on the turn against one random hand: 46 rivers x C(45, 2) opponent hands"""
+    players = e.enumerate_multiplayer(['As', 'Ad'], flop=['2c', '7h', 'Js'], turn=['3d'])
+    hero = players[0].result
+    assert hero.samples == 46 * 990 and hero.wins + hero.ties + hero.losses == hero.samples
+
+
+def test_enumerate_matches_simulation():
+    exact = e.enumerate_one_player(['Ah', 'Kh'], ['Qh', 'Jh', '2c'])
+    sim = s.simulation_one_player(['Ah', 'Kh'], ['Qh', 'Jh', '2c'], sims=20000)
+    assert sim['flush'] / sim.samples == pytest.approx(exact['flush'] / exact.samples, abs=0.02)
+
+
+def test_hole_assignments_count():
+    assert len(list(e.hole_assignments(list(range(6)), 2))) == 15 * 6
+
+
+def test_assignment_count():
+    assert e.assignment_count(6, 2) == len(list(e.hole_assignments(list(range(6)), 2)))
+
+
+@pytest.mark.parametrize('spot', [dict(hole_two=['2c', '2d'], flop=['Qh', 'Jh', 'Th'], turn=['3s']),
+                                  dict(hole_two=['2c', '2d'], flop=['Qh', 'Jh', 'Th']),
+                                  dict(flop=['Qh', 'Jh', 'Th'], turn=['3s']),
+                                  dict(hole_two=['Kc', 'Kd'], flop=['Qc', '7h', '2d'], turn=['Qs'])])
+def test_enumerate_prune_matches_full(spot):
+    full = e.enumerate_multiplayer(['Ah', 'Kh'], **spot)
+    pruned = e.enumerate_multiplayer(['Ah', 'Kh'], prune=True, **spot)
+    for a, b in zip(full, pruned):
+        a.result.counts[s.ELAPSED] = b.result.counts[s.ELAPSED] = 0
+        assert a.result == b.result
+
+
+def test_enumerate_prune_locked_river():
+    """Four unknown opponents on the river would be 8e8 deals; a royal flush settles them at once"""
+    players = e.enumerate_multiplayer(['Ah', 'Kh'], flop=['Qh', 'Jh', 'Th'], turn=['3s'], river=['4d'],
+                                      opponents=5, prune=True)
+    hero = players[0].result
+    assert hero.samples == e.assignment_count(45, 4) and hero.wins == hero.samples
+    assert sum(players[3].result.hand_counts().values()) == hero.samples
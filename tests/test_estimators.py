@@ -0,0 +1,79 @@
+import pytest
+import holdem_sim.enumeration as e
+import holdem_sim.estimators as est
+
+
+def test_stratified_flop_is_exact():
+    """With the flop known every turn stratum has few enough rivers to enumerate"""
+    exact = e.enumerate_one_player(['Ah', 'Kh'], ['Qh', 'Jh', '2c'])
+    estimate = est.stratified_one_player(['Ah', 'Kh'], ['Qh', 'Jh', '2c'], sims=5000)
+    assert estimate['flush'] == pytest.approx(exact['flush'] / exact.samples)
+    assert estimate.variances['flush'] == 0 and estimate.samples == 2 * exact.samples  # each runout in both orders
+
+
+def test_stratified_preflop_close_to_exact():
+    estimate = est.stratified_one_player(['As', 'Kd'], sims=20000, seed=1)
+    assert estimate['pair'] == pytest.approx(0.455723, abs=4 * estimate.std_error('pair'))
+    assert sum(estimate.probabilities.values()) == pytest.approx(1.0)
+
+
+def test_stratified_optimal_allocation():
+    estimate = est.stratified_one_player(['As', 'Kd'], sims=20000, allocation='optimal', seed=2)
+    low, high = estimate.interval('2pair', z=4)
+    assert low < estimate['2pair'] < high and estimate.variances['2pair'] > 0
+
+
+def test_stratified_complete_board():
+    estimate = est.stratified_one_player(['As', 'Kd'], ['Ac', 'Kc', '2h'], ['7s'], ['9d'])
+    assert estimate['2pair'] == 1.0 and estimate.samples == 1
+
+
+def test_stratified_bad_allocation():
+    with pytest.raises(ValueError):
+        est.stratified_one_player(['As', 'Kd'], allocation='neyman')
+
+
+def test_importance_straight_flush_flop():
+    exact = e.enumerate_one_player(['Ah', 'Kh'], ['Qh', 'Jh', '2c'])
+    estimate = est.importance_one_player(['Ah', 'Kh'], ['Qh', 'Jh', '2c'], sims=2000, seed=3)
+    expected = exact['straight_flush'] / exact.samples
+    assert estimate['straight_flush'] == pytest.approx(expected, abs=4 * estimate.std_error('straight_flush'))
+
+
+def test_importance_quads_tight_error():
+    """Exact P(quads) for AsKd is 0.0012592; uniform sampling would need millions of hands for this error bar"""
+    estimate = est.importance_one_player(['As', 'Kd'], target='4ok', sims=5000, seed=5)
+    assert estimate['4ok'] == pytest.approx(0.0012592, abs=4 * estimate.std_error('4ok'))
+    assert estimate.std_error('4ok') < 0.0001
+
+
+def test_importance_impossible_target():
+    estimate = est.importance_one_player(['As', 'Kd'], ['2c', '7h', '9s'], ['Jd'], target='4ok', sims=200, seed=1)
+    assert estimate['4ok'] == 0
+
+
+def test_importance_bad_arguments():
+    with pytest.raises(ValueError):
+        est.importance_one_player(['As', 'Kd'], target='flush')
+    with pytest.raises(ValueError):
+        est.importance_one_player(['As', 'Kd'], mix=1)
+
+
+def test_compare_scenarios_shares_runouts():
+    board = {'flop': ['Qh', 'Jh', '2c']}
+    scenarios = [dict(hole_one=['Ah', 'Kh'], opponents=3, **board), dict(hole_one=['Ah', 'Kd'], opponents=3, **board),
+                 dict(hole_one=['Ah', 'Kh'], opponents=4, **board)]
+    comparison = est.compare_scenarios(scenarios, sims=3000, seed=1)
+    assert [result.samples for result in comparison.results] == [3000] * 3
+    difference, std_error = comparison.difference(0, 1)
+    assert difference > 0 and std_error < comparison.independent_std_error(0, 1)
+    difference, std_error = comparison.difference(0, 2)
+    assert difference > 0 and std_error < comparison.independent_std_error(0, 2) / 2
+
+
+def test_compare_scenarios_matches_exact():
+    scenario = dict(hole_one=['As', 'Ad'], hole_two=['Kc', 'Kd'], flop=['2h', '7c', '9s'], opponents=2)
+    exact = e.enumerate_multiplayer(**scenario)[0]
+    comparison = est.compare_scenarios([scenario, scenario], sims=2000, seed=4)
+    assert comparison.difference(0, 1) == (0, 0)
+    assert comparison.results[0].wins / 2000 == pytest.approx(exact.wins / exact.result.samples, abs=0.03)
@@ -0,0 +1,59 @@
+import json
+import pytest
+import holdem_sim.enumeration as e
+import holdem_sim.history as h
+
+HISTORY = """# two hands
+hand 1
+player alice As Ad
+player bob Kc Kd
+board 2c 7h 9s 3d Kh
+allin flop
+pot 200
+
+hand 2
+player alice As Kd
+player bob Qh Qc
+player carol 7c 7d
+board Qs 2h 4c 9d 5s
+allin river
+pot 300.5
+"""
+
+
+def test_parse_hands():
+    hands = list(h.parse_hands(HISTORY.splitlines()))
+    assert [hand['hand'] for hand in hands] == ['1', '2']
+    assert hands[0]['players'][1] == ('bob', ['Kc', 'Kd']) and hands[1]['pot'] == 300.5
+
+
+def test_parse_errors():
+    with pytest.raises(ValueError):
+        list(h.parse_hands(['hand 3', 'player alice As Ad', 'player bob As Kd', 'allin preflop', 'pot 10']))
+    with pytest.raises(ValueError):
+        list(h.parse_hands(['hand 4', 'player alice As Ad', 'player bob Kc Kd', 'board 2c', 'allin flop', 'pot 1']))
+    with pytest.raises(ValueError):
+        list(h.parse_hands(['hand 5', 'stack 100']))
+
+
+def test_allin_equity_exact_and_sampled():
+    first, second = h.parse_hands(HISTORY.splitlines())
+    result = h.allin_equity(first)
+    shares, runouts = e.enumerate_equity([['As', 'Ad'], ['Kc', 'Kd']], ['2c', '7h', '9s'])
+    assert result['exact'] and result['runouts'] == runouts == 990
+    assert result['players'][0]['equity'] == shares[0] and result['players'][0]['ev'] == pytest.approx(shares[0] * 200)
+    assert [player['equity'] for player in h.allin_equity(second)['players']] == [0, 1, 0]
+    preflop = dict(first, allin='preflop')
+    sampled = h.allin_equity(preflop, sample=5000)
+    assert not sampled['exact'] and sampled['players'][0]['equity'] == pytest.approx(0.82, abs=0.03)
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_replay_writes_every_hand(tmp_path, processes):
+    source = tmp_path / 'hands.txt'
+    source.write_text(HISTORY * 3)
+    destination = tmp_path / 'equity.jsonl'
+    summary = h.replay(str(source), str(destination), processes=processes, queue_size=2)
+    rows = [json.loads(line) for line in destination.read_text().splitlines()]
+    assert summary['hands'] == len(rows) == 6
+    assert sorted(row['hand'] for row in rows) == ['1', '1', '1', '2', '2', '2']
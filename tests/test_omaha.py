@@ -0,0 +1,65 @@
+import random
+from itertools import combinations
+import pytest
+import holdem_sim.omaha as o
+import holdem_sim.poker_functions as p
+
+
+def brute_force(hole, board):
+    return max(p.hand_strength(list(pair) + list(triple))
+               for pair in combinations(p.make_card(hole), 2) for triple in combinations(p.make_card(board), 3))
+
+
+def test_strength_matches_brute_force():
+    rng = random.Random(7)
+    deck = p.generate_deck().deck
+    for n in range(500):
+        cards = rng.sample(deck, 10)
+        size = 4 + n % 2
+        hole, board = cards[:size], cards[size:size + 3 + n % 3]
+        assert o.omaha_strength(hole, board) == brute_force(hole, board)
+
+
+def test_must_use_two_hole_cards():
+    # four hearts on board and one in hand is not a flush; a board straight needs two hole cards to play
+    assert p.Hand.from_strength(o.omaha_strength(['Ah', 'Kc', '7d', '7s'], ['2h', '5h', '9h', 'Jh', '3c'])).type == \
+        'pair'
+    assert p.Hand.from_strength(o.omaha_strength(['Ac', 'Ad', 'Ah', 'As'], ['Kc', 'Kd', '2h', '7s', '9c'])).type == \
+        '2pair'
+    royal = p.hand_strength(['Ah', 'Kh', 'Qh', 'Jh', 'Th'])
+    assert o.omaha_strength(['Ah', 'Kh', '2c', '3c', '4d'], ['Qh', 'Jh', 'Th']) == royal
+
+
+def test_bad_hands():
+    with pytest.raises(ValueError):
+        o.omaha_strength(['Ah', 'Kh'], ['Qh', 'Jh', 'Th'])
+    with pytest.raises(ValueError):
+        o.simulation_multiplayer(['Ah', 'Kh', 'Qd', 'Jd'], ['2c', '3c'], sims=10)
+
+
+def test_one_player_counts():
+    result = o.simulation_one_player(['Ah', 'Kh', 'Qd', 'Jd'], ['Th', '2h', '3c'], sims=2000)
+    assert result.samples == 2000 and sum(result.hand_counts().values()) == 2000
+    assert result['boat'] == 0  # no pair in hand, an unpaired flop and two cards to come
+    assert result['straight'] + result['flush'] + result['straight_flush'] > 0
+
+
+def test_multiplayer_known_and_dealt():
+    players = o.simulation_multiplayer(['Ah', 'As', 'Kd', 'Qd', '2c'], ['7c', '7d', '8h', '9h', 'Ts'], opponents=3,
+                                       sims=2000)
+    assert [len(player.cards) for player in players] == [5, 5, 0]
+    assert sum(player.equity for player in players) == pytest.approx(1.0)
+    assert all(player.result.samples == 2000 for player in players)
+
+
+def test_multiplayer_river_is_exact():
+    players = o.simulation_multiplayer(['Ah', 'Kh', '2c', '3d'], ['Qs', 'Qd', '4c', '5d'], opponents=2, sims=50,
+                                       flop=['Qh', 'Jh', '9c'], turn=['7s'], river=['Th'])
+    assert players[0].wins == 50 and players[0].hand.type == 'straight_flush'
+
+
+def test_one_player_checks_board():
+    with pytest.raises(ValueError):
+        o.simulation_one_player(['Ah', 'Kh', 'Qd', 'Jd'], ['Ah'], sims=10)
+    with pytest.raises(ValueError):
+        o.simulation_one_player(['Ah', 'Kh', 'Qd', 'Jd'], ['Ah', '2c', '3c'], sims=10)
@@ -529,3 +529,80 @@ def test_boat_type(boat):
     boat = p.find_full_house(hand, board)
     assert boat.type == 'boat'
 
+
+
+def test_card_index():
+    deck = p.generate_deck()
+    assert all(card.index == i for i, card in enumerate(deck))
+
+
+def test_card_mask_order_independent():
+    assert p.card_mask(['As', 'Kd', '2c']) == p.card_mask(['2c', 'As', 'Kd']) == (1 << 51) | (1 << 45) | 1
+
+
+def test_hand_strength_type_matches_registry(boat, quads, wheel, two_pair, high_card, straight_flush):
+    for hand, board in [boat, quads, wheel, two_pair, high_card, straight_flush]:
+        expected = next(hand for hand in (func(hand, board) for func in p.HAND_REGISTRY) if hand)
+        assert p.Hand.from_strength(p.hand_strength(hand + board)).type == expected.type
+
+
+def test_from_strength_fields(three_of_a_kind):
+    hand, board = three_of_a_kind
+    strength_hand = p.Hand.from_strength(p.hand_strength(hand + board))
+    assert (strength_hand.high_value, strength_hand.low_value, strength_hand.kicker) == (14, 12, 10)
+
+
+def test_hand_strength_broadway():
+    hand = p.Hand.from_strength(p.hand_strength(['As', 'Kd', 'Qh', 'Jc', 'Tc', '2d', '3h']))
+    assert hand.type == 'straight' and hand.high_value == 14
+
+
+def test_hand_strength_wheel_loses_to_six_high():
+    wheel = p.hand_strength(['As', '2d', '3h', '4c', '5c', 'Kd', 'Jh'])
+    six_high = p.hand_strength(['6s', '2d', '3h', '4c', '5c', 'Kd', 'Jh'])
+    assert p.Hand.from_strength(wheel).high_value == 5 and six_high > wheel
+
+
+def test_hand_strength_full_kickers():
+    """Flushes and high cards are compared on all five cards"""
+    better = p.hand_strength(['Ah', 'Kh', '9h', '5h', '3h', '2c', '7d'])
+    worse = p.hand_strength(['Ah', 'Kh', '9h', '5h', '2h', '3c', '7d'])
+    assert better > worse
+
+
+def test_hand_default_strength():
+    assert p.Hand('boat', 13, 5, 9).strength == p.Hand('boat', 13, 5, 2).strength
+
+
+def test_hand_default_strength_matches_pair():
+    hand, board = ['8s', '8d'], ['Kc', 'Tc', '9h', '4d', '2s']
+    assert p.Hand('pair', 8, 13, 10, kickers=[9]).strength == p.hand_strength(hand + board)
+    assert p.find_pair(hand, board).strength == p.hand_strength(hand + board)
+    assert p.Hand('pair', 8, 13, 10).strength < p.hand_strength(hand + board)  # the third kicker is left out
+
+
+def test_hand_default_strength_matches_flush():
+    hand, board = ['Ah', '9h'], ['Kh', '7h', '4h', '3h', '2c']
+    assert p.Hand('flush', 14, kickers=[13, 9, 7, 4]).strength == p.hand_strength(hand + board)
+    assert p.find_flush(hand, board).strength == p.hand_strength(hand + board)
+    assert p.Hand('flush', 14).strength < p.hand_strength(hand + board)
+
+
+def test_hand_default_strength_matches_high_card():
+    hand, board = ['Ah', '9d'], ['Kc', '7h', '5s', '3h', '2c']
+    assert p.find_high_card(hand, board).strength == p.hand_strength(hand + board)
+
+
+def test_hand_from_strength_round_trip():
+    for cards in (['8s', '8d', 'Kc', 'Tc', '9h'], ['Ah', '9h', 'Kh', '7h', '4h'], ['Ah', '9d', 'Kc', '7h', '5s'],
+                  ['Qs', 'Qd', 'Qh', '5c', '5d'], ['7s', '7d', '7h', '7c', 'Ad']):
+        hand = p.Hand.from_strength(p.hand_strength(cards))
+        assert p.Hand(hand.type, hand.high_value, hand.low_value, hand.kicker, kickers=hand.kickers).strength == \
+            hand.strength
+
+
+def test_deck_deal_hole():
+    deck = p.generate_deck()
+    hole, deck = deck.deal_hole(5)
+    assert len(hole) == 5 and len(deck) == 47
+    assert not any(card.name == dealt.name for card in deck for dealt in hole)
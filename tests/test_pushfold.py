@@ -0,0 +1,49 @@
+import pytest
+import holdem_sim.pushfold as pf
+
+
+@pytest.fixture(scope='module')
+def matrix():
+    return pf.preflop_matrix(boards=150, seed=1)
+
+
+def test_classes():
+    assert len(pf.CLASSES) == 169 and pf.CLASSES[:3] == ['AA', 'AKs', 'AKo']
+    assert pf.hand_class(['7d', 'Ad']) == 'A7s' and pf.hand_class(['Ts', '9h']) == 'T9o'
+    assert pf.hand_class(['5c', '5h']) == '55'
+
+
+def test_matrix_equities(matrix):
+    assert matrix['AA', 'KK'] == pytest.approx(0.82, abs=0.04)
+    assert matrix['AA', 'KK'] + matrix['KK', 'AA'] == pytest.approx(1)
+    assert matrix.weight[pf.CLASS_INDEX['AA']][pf.CLASS_INDEX['AA']] == 1
+    assert pf.preflop_matrix(boards=150, seed=1) is matrix
+
+
+def test_matrix_save_load(matrix, tmp_path):
+    path = tmp_path / 'preflop.json'
+    matrix.save(path)
+    assert pf.PreflopMatrix.load(path).equity == matrix.equity
+    with pytest.raises(ValueError):
+        pf.preflop_matrix(boards=151, seed=1, path=path)  # built with 150 boards
+
+
+def test_matrix_board_limit():
+    with pytest.raises(ValueError):
+        pf.preflop_matrix(boards=pf.MAX_BOARDS + 1)
+
+
+def test_heads_up_solution(matrix):
+    solution = pf.solve(15, iterations=150, matrix=matrix)
+    assert 'AA' in solution['push_range']['SB'] and '72o' not in solution['push_range']['SB']
+    assert 'KK' in solution['call_range'][('SB', 'BB')] and '83o' not in solution['call_range'][('SB', 'BB')]
+    short = pf.solve(1.5, iterations=50, matrix=matrix)
+    assert len(short['push_range']['SB']) > len(solution['push_range']['SB'])
+
+
+def test_multiway_solution(matrix):
+    solution = pf.solve(10, players=4, iterations=40, matrix=matrix)
+    assert list(solution['push_range']) == ['CO', 'BTN', 'SB']
+    assert len(solution['push_range']['CO']) < len(solution['push_range']['SB'])
+    with pytest.raises(ValueError):
+        pf.solve(10, players=7, matrix=matrix)
@@ -0,0 +1,51 @@
+import math
+import pytest
+import holdem_sim.enumeration as e
+import holdem_sim.ranges as r
+
+
+@pytest.fixture(scope='module')
+def turn_matrix():
+    return r.equity_matrix(['Qh', 'Jh', '2c', '3d'])
+
+
+def test_combo_index_round_trip():
+    assert len(r.COMBOS) == 1326
+    assert r.combo_index(['Kh', 'Ah']) == r.combo_index(['Ah', 'Kh'])
+    assert r.combo_name(r.combo_index(['Ah', 'Kh'])) in ('AhKh', 'KhAh')
+
+
+@pytest.mark.parametrize('hero, villain', [(['Ah', 'Kh'], ['Qc', 'Qd']), (['As', 'Kd'], ['Ac', 'Kc'])])
+def test_matrix_matches_enumeration(turn_matrix, hero, villain):
+    exact = e.enumerate_multiplayer(hero, villain, flop=['Qh', 'Jh', '2c'], turn=['3d'])[0].result
+    assert turn_matrix.equity(hero, villain) == pytest.approx((exact.wins + exact.ties / 2) / exact.samples)
+
+
+def test_matrix_symmetry_and_collisions(turn_matrix):
+    assert turn_matrix.equity(['Ah', 'Kh'], ['7c', '7d']) + turn_matrix.equity(['7c', '7d'], ['Ah', 'Kh']) == \
+        pytest.approx(1)
+    assert math.isnan(turn_matrix.equity(['Ah', 'Kh'], ['Ah', 'Kd']))
+    assert math.isnan(turn_matrix.equity(['Qh', 'Kh'], ['7c', '7d']))
+    assert len(turn_matrix.row(['Ah', 'Kh'])) == 1326 and turn_matrix.runouts == 44
+
+
+def test_matrix_pool_matches_inline():
+    board = ['Qh', 'Jh', '2c', '3d', '9s']
+    inline = r.equity_matrix(board)
+    pooled = r.equity_matrix(board, processes=2, chunks=2)
+    assert inline.values.tobytes() == pooled.values.tobytes()
+
+
+def test_sweep_matches_enumeration():
+    table = dict(r.sweep(['Qh', 'Jh', '2c', '3d'], sims=20000, seed=1))
+    exact = e.enumerate_multiplayer(['Ah', 'Kh'], flop=['Qh', 'Jh', '2c'], turn=['3d'])[0].result
+    assert table[r.combo_name(r.combo_index(['Ah', 'Kh']))] == \
+        pytest.approx((exact.wins + exact.ties / 2) / exact.samples, abs=0.02)
+
+
+def test_sweep_table_sorted_and_complete():
+    table = r.sweep(['Qh', 'Jh', '2c', '3d', '9s'], opponents=2, sims=5000, seed=2)
+    assert len(table) == 1081 and sorted(table[0][0][::2]) == ['K', 'T']  # the king-high straight
+    assert all(first[1] >= second[1] for first, second in zip(table, table[1:]))
+    with pytest.raises(ValueError):
+        r.sweep(['Qh', 'Jh', '2c'], opponents=6)
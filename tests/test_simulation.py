@@ -1,6 +1,8 @@
+import tracemalloc
 import pytest
 import holdem_sim.poker_functions
 import holdem_sim.simulation as s
+import holdem_sim.enumeration as e
 
 @pytest.fixture
 def six_card_straight_board():
@@ -272,4 +274,226 @@ def test_score_game_kicker_winner(quad_showdown):
 
     foo = s.score_game(contestants)
 
-    assert foo[1].wins == 1
\ No newline at end of file
+    assert foo[1].wins == 1
+
+def test_cache_hit_returns_same_hand():
+    cache = s.EvaluationCache()
+    first = s.evaluate_hand(['As', 'Ad'], ['Kc', 'Kd', '2h'], ['7s'], ['9c'], cache=cache)
+    second = s.evaluate_hand(['Ad', 'As'], ['2h', 'Kd', 'Kc'], ['9c'], ['7s'], cache=cache)
+    assert second.strength == first.strength and cache.hits == 1 and cache.misses == 1
+
+
+def test_cache_lru_eviction():
+    cache = s.EvaluationCache(capacity=2)
+    cache.put(1, 'one')
+    cache.put(2, 'two')
+    cache.get(1)
+    cache.put(3, 'three')
+    assert 2 not in cache and 1 in cache and cache.evictions == 1
+
+
+def test_cache_hit_rate():
+    cache = s.EvaluationCache()
+    s.simulation_one_player(['As', 'Ad'], ['Kc', 'Kd', '2h'], ['7s'], ['9c'], sims=10, cache=cache)
+    assert cache.hit_rate == 0.9
+
+
+def test_cache_invalid_capacity():
+    with pytest.raises(ValueError):
+        s.EvaluationCache(capacity=0)
+
+
+def test_simulation_default_board_not_mutated():
+    """Dealing used to append to the default flop list, leaking cards into later calls"""
+    s.simulation_one_player(['Ac', '3d'], sims=5)
+    sim = s.simulation_one_player(['Ac', '3d'], sims=5)
+    assert sim[0] == 5
+
+
+def test_multiplayer_random_cards_reset():
+    foo = s.simulation_multiplayer(['As', '9d'], opponents=2, sims=5)
+    assert foo[1].cards == [] and foo[1].starting_cards is False
+
+
+def _peak_memory(func, *args, **kwargs):
+    tracemalloc.start()
+    func(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def test_simulation_memory_flat():
+    """Peak traced memory must not grow with the number of sims"""
+    short = _peak_memory(s.simulation_multiplayer, ['As', '9d'], opponents=3, sims=2 * s.BLOCK_SIZE)
+    long = _peak_memory(s.simulation_multiplayer, ['As', '9d'], opponents=3, sims=10 * s.BLOCK_SIZE)
+    assert long < short * 1.5
+
+
+def test_result_legacy_indexing():
+    sim = s.simulation_one_player(['Ac', '3d'], ['As', '5c', '4d'], sims=50)
+    assert sim[0] == 50 and sum(sim[1:10]) == 50 and sim['samples'] == sim.samples == 50
+
+
+def test_result_merge_and_add():
+    first = s.simulation_one_player(['Ac', '3d'], ['As', '5c', '4d'], sims=20)
+    second = s.simulation_one_player(['Ac', '3d'], ['As', '5c', '4d'], sims=30)
+    total = first + second
+    assert total.samples == 50 and first.samples == 20
+    assert sum([first, second]) == total
+    assert first.merge(second) == total
+
+
+def test_result_serialization_round_trip():
+    sim = s.simulation_one_player(['Ac', '3d'], ['As', '5c', '4d'], sims=20)
+    data = sim.to_bytes()
+    assert len(data) < 200 and s.SimulationResult.from_bytes(data) == sim
+
+
+def test_result_reads_payload_without_shares():
+    counts = [10, 0, 4, 3, 2, 1, 0, 0, 0, 0, 6, 2, 0.5]  # samples, hand types, wins, ties, elapsed
+    result = s.SimulationResult.from_bytes(s.array('d', counts).tobytes())
+    assert result.samples == 10 and result.wins == 6 and result.ties == 2 and result.elapsed == 0.5
+    assert result.shares == 7
+
+
+def test_result_wrong_length():
+    with pytest.raises(ValueError):
+        s.SimulationResult([1, 2, 3])
+
+
+def test_multiplayer_result_counts():
+    foo = s.simulation_multiplayer(['As', '9d'], ['Kd', 'Th'], opponents=2, sims=200)
+    hero = foo[0].result
+    assert hero.samples == 200 and hero.wins + hero.ties + hero.losses == 200
+    assert sum(hero.hand_counts().values()) == 200 and hero.elapsed > 0
+
+
+def test_score_game_records_tie():
+    player0 = s.Player(0)
+    player1 = s.Player(1)
+    player0.hand = holdem_sim.poker_functions.Hand('flush', 13)
+    player1.hand = holdem_sim.poker_functions.Hand('flush', 13)
+    foo = s.score_game([player0, player1])
+    assert foo[0].result.ties == 1 and foo[1].result.ties == 1 and foo[0].wins == 0
+
+
+def test_score_strengths_split_shares():
+    contestants = [s.Player(n) for n in range(3)]
+    s.score_strengths(contestants, [5, 9, 9])
+    s.score_strengths(contestants, [9, 5, 5])
+    assert [player.result.shares for player in contestants] == [1.0, 0.5, 0.5]
+    assert contestants[1].result.ties == 1 and contestants[0].result.wins == 1
+
+
+def test_multiplayer_equity_counts_chops():
+    """Board plays: every sim is a three-way chop"""
+    foo = s.simulation_multiplayer(['2c', '3d'], ['2d', '3c'], ['2h', '4d'], flop=['Ah', 'Kh', 'Qh'], turn=['Jh'],
+                                   river=['Th'], opponents=3, sims=30)
+    hero = foo[0].result
+    assert hero.wins == 0 and hero.tie_rate == 1.0 and hero.equity == pytest.approx(1 / 3)
+    assert sum(player.equity for player in foo) == pytest.approx(1.0)
+
+
+def test_profile_stats_attached():
+    sim = s.simulation_one_player(['Ac', '3d'], ['As', '5c', '4d'], sims=3000, profile=True)
+    stats = sim.stats
+    assert stats.samples == 3000 and stats.evaluations == 3000 and stats.samples_per_sec > 0
+    assert set(stats.phases) == set(s.PHASES) and stats.phases['evaluate'] > 0
+
+
+def test_profile_disabled_by_default():
+    sim = s.simulation_one_player(['Ac', '3d'], ['As', '5c', '4d'], sims=10)
+    assert sim.stats is None
+
+
+def test_profile_multiplayer_cache_hits():
+    cache = s.EvaluationCache()
+    foo = s.simulation_multiplayer(['As', '9d'], ['Kd', 'Th'], flop=['2c', '7h', 'Js'], turn=['3d'], river=['Qc'],
+                                   opponents=2, sims=50, cache=cache, profile=True)
+    stats = foo[0].result.stats
+    assert stats is foo[1].result.stats and stats.evaluations == 100 and stats.cache_hits == 98
+
+
+def test_outs_turn_flush_draw_against_set():
+    found = s.outs(['Ah', 'Kh'], ['Qh', '7h', '2c', '3d'], [['Qc', 'Qd']])
+    assert sorted(found['outs']) == sorted(['4h', '5h', '6h', '8h', '9h', 'Th', 'Jh'])
+    assert found['river'] == pytest.approx(7 / 44)
+    assert found['turn'] is None and found['turn_river'] is None
+
+
+def test_outs_flop_matches_enumeration():
+    hole, flop = ['Ah', 'Kh'], ['Qh', '7h', '2c']
+    found = s.outs(hole, flop, [['Qc', 'Qd']])
+    exact = e.enumerate_multiplayer(hole, ['Qc', 'Qd'], flop=flop, opponents=2)[0]
+    assert found['turn'] == pytest.approx(len(found['outs']) / 45)
+    assert found['turn_river'] == pytest.approx(exact.wins / exact.result.samples)
+
+
+def test_outs_already_ahead_and_bad_board():
+    assert s.outs(['Qc', 'Qd'], ['Qh', '7h', '2c'], [['Ah', 'Kh']]) == \
+        {'outs': [], 'ahead': True, 'turn': None, 'river': None, 'turn_river': None}
+    with pytest.raises(ValueError):
+        s.outs(['Ah', 'Kh'], ['Qh', '7h'])
+
+
+def test_outs_without_opponents_need_a_hole_card():
+    found = s.outs(['Ah', 'Kh'], ['Qh', 'Jh', '9c'])
+    assert found['ahead'] is False
+    assert not any(name[0] in 'QJ9' and name[1] != 'h' for name in found['outs'])  # pairing the board is not an out
+    assert {'Ac', 'Kd', 'Th', '2h'} <= set(found['outs'])
+
+
+def test_multiplayer_prune_locked():
+    players = s.simulation_multiplayer(['Ah', 'Kh'], flop=['Qh', 'Jh', 'Th'], turn=['3s'], opponents=3, sims=5000,
+                                       prune=True)
+    assert players[0].wins == 5000 and players[0].result['straight_flush'] == 5000
+    assert players[0].hand.type == 'straight_flush' and all(player.hand is not None for player in players)
+    assert sum(players[2].result.hand_counts().values()) == pytest.approx(5000)
+
+
+def test_multiplayer_prune_open():
+    players = s.simulation_multiplayer(['Ah', 'Kh'], flop=['Qh', 'Jh', '2c'], turn=['3s'], opponents=2, sims=2000,
+                                       prune=True)
+    hero = players[0].result
+    assert hero.samples == 2000 and 0 < hero.wins < 2000
+
+
+def test_multiplayer_breakdown():
+    players = s.simulation_multiplayer(['Ah', 'Kh'], ['7c', '7d'], flop=['Qh', 'Jh', '2c'], sims=3000, breakdown=True)
+    hero = players[0]
+    assert players[1].breakdown is None
+    assert sum(hero.breakdown) == 3000
+    table = s.breakdown_table(hero.breakdown)
+    assert sum(row['win'] for row in table.values()) == hero.wins
+    assert sum(row['tie'] for row in table.values()) == hero.result.ties
+    assert {hand_type: sum(row.values()) for hand_type, row in table.items()} == \
+        {hand_type: count for hand_type, count in hero.result.hand_counts().items() if count}
+    assert table['hc']['win'] == 0  # 77 always has at least a pair
+
+
+def test_multiplayer_breakdown_needs_opponent():
+    with pytest.raises(ValueError):
+        s.simulation_multiplayer(['Ah', 'Kh'], opponents=1, sims=10, breakdown=True)
+
+
+def test_simulation_streets_one_run():
+    streets = s.simulation_streets(['Ah', 'Kh'], ['Qh', 'Jh', '2c'], sims=20000)
+    assert list(streets) == ['flop', 'turn', 'river']
+    assert streets['flop']['hc'] == 20000
+    assert streets['turn']['flush'] / 20000 == pytest.approx(8 / 47, abs=0.015)  # Th makes a straight flush
+    exact = e.enumerate_one_player(['Ah', 'Kh'], ['Qh', 'Jh', '2c'])
+    assert streets['river']['flush'] / 20000 == pytest.approx(exact['flush'] / exact.samples, abs=0.015)
+    assert all(sum(result.hand_counts().values()) == 20000 for result in streets.values())
+
+
+def test_simulation_streets_known_river():
+    streets = s.simulation_streets(['Ah', 'Kh'], ['Qh', 'Jh', '2c'], ['3d'], ['Th'], sims=10)
+    assert streets['flop']['hc'] == 10 and streets['river']['straight_flush'] == 10
+
+
+def test_multiplayer_rejects_non_holdem_hands():
+    with pytest.raises(ValueError):
+        s.simulation_multiplayer(['Ah', 'Kh', 'Qd', 'Jd'], sims=10)
+    with pytest.raises(ValueError):
+        s.simulation_multiplayer(['Ah', 'Kh'], ['Qd', 'Jd', 'Td'], sims=10)
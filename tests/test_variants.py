@@ -0,0 +1,101 @@
+import random
+from itertools import combinations
+import pytest
+import holdem_sim.poker_functions as p
+import holdem_sim.simulation as s
+import holdem_sim.variants as v
+
+
+def short_deck_five(cards):
+    """Strength of exactly five cards under short-deck rules, from the standard evaluator"""
+    strength = p.hand_strength(cards)
+    if {card.rank for card in cards} == {'A', '6', '7', '8', '9'}:
+        hand_type = 'straight_flush' if len({card.suit for card in cards}) == 1 else 'straight'
+        strength = 9 << 16
+    else:
+        hand_type = p.HAND_TYPES[strength >> 20]
+        strength &= 0xFFFFF
+    return v.SHORT_DECK.order.index(hand_type) + 1 << 20 | strength
+
+
+def test_short_deck_matches_five_card_reference():
+    rng = random.Random(3)
+    deck = v.SHORT_DECK.deck().deck
+    for n in range(3000):
+        cards = rng.sample(deck, 7)
+        assert v.SHORT_DECK.hand_strength(cards) == max(short_deck_five(list(five)) for five in combinations(cards, 5))
+
+
+def test_short_deck_rules():
+    short = v.SHORT_DECK
+    wheel = short.hand(short.hand_strength(['Ac', '6d', '7h', '8s', '9c', 'Kd', '2h']))
+    assert wheel.type == 'straight' and wheel.high_value == 9
+    flush = short.hand_strength(['Ah', 'Jh', '9h', '7h', '6h'])
+    boat = short.hand_strength(['Kc', 'Kd', 'Kh', 'Qs', 'Qc'])
+    assert flush > boat and short.hand(boat).type == 'boat' and short.hand(flush).type == 'flush'
+    assert p.hand_strength(['Ah', 'Jh', '9h', '7h', '6h']) < p.hand_strength(['Kc', 'Kd', 'Kh', 'Qs', 'Qc'])
+    assert len(short.deck()) == 36
+
+
+def test_standard_variant_is_holdem():
+    assert v.STANDARD.standard and v.STANDARD.evaluator is p.lanes_strength
+    assert len(v.STANDARD.deck()) == 52
+    with pytest.raises(ValueError):
+        v.Variant('bad', order=['hc', 'pair'])
+
+
+@pytest.mark.parametrize('order', [['hc', 'pair', 'straight', '2pair', '3ok', 'flush', 'boat', '4ok', 'straight_flush'],
+                                   ['hc', 'pair', '3ok', '2pair', 'boat', 'straight', '4ok', 'flush', 'straight_flush']])
+def test_reordered_variant_matches_five_card_reference(order):
+    variant = v.Variant('reordered', order=order)
+    rng = random.Random(5)
+    deck = p.generate_deck().deck
+    for n in range(1500):
+        cards = rng.sample(deck, 7)
+        best = 0
+        for five in combinations(cards, 5):
+            strength = p.hand_strength(list(five))
+            best = max(best, variant.codes[p.HAND_TYPES[strength >> 20]] << 20 | strength & 0xFFFFF)
+        assert variant.hand_strength(cards) == best
+
+
+@pytest.mark.parametrize('stronger, weaker', [('straight', 'flush'), ('boat', '4ok'), ('3ok', 'boat'),
+                                              ('flush', 'straight_flush'), ('hc', 'straight')])
+def test_variant_rejects_orders_the_evaluator_cannot_honour(stronger, weaker):
+    order = list(v.STANDARD_ORDER)
+    low, high = order.index(weaker), order.index(stronger)
+    order[low], order[high] = order[high], order[low]
+    with pytest.raises(ValueError):
+        v.Variant('bad', order=order)
+
+
+def test_tables_cached_per_variant():
+    again = v.Variant('again', ranks=p.RANKS[4:], order=v.SHORT_DECK_ORDER)
+    assert again.evaluator is v.SHORT_DECK.evaluator
+
+
+def test_short_deck_simulations():
+    result = s.simulation_one_player(['Ah', 'Kh'], sims=3000, variant=v.SHORT_DECK)
+    assert result.samples == 3000 and sum(result.hand_counts().values()) == 3000
+    players = s.simulation_multiplayer(['Ah', 'Kh'], ['Qc', 'Jd'], flop=['Th', '6h', '8c'], turn=['9d'],
+                                       river=['7s'], sims=20, variant=v.SHORT_DECK)
+    assert players[1].wins == 20 and players[1].hand.type == 'straight'  # Q-high straight over AK's 6-T
+    players = s.simulation_multiplayer(['Ah', '9h'], ['Kc', 'Kd'], flop=['Qh', 'Jh', '7h'], turn=['Ks'],
+                                       river=['Qc'], sims=20, variant=v.SHORT_DECK)
+    assert players[0].wins == 20 and players[0].hand.type == 'flush'
+
+
+def test_short_deck_rejects_low_cards():
+    with pytest.raises(ValueError):
+        s.simulation_one_player(['Ah', '5h'], sims=10, variant=v.SHORT_DECK)
+    with pytest.raises(ValueError):
+        s.simulation_multiplayer(['Ah', 'Kh'], flop=['2c', '7d', '9s'], sims=10, variant=v.SHORT_DECK)
+
+
+def test_short_deck_outs_and_streets():
+    found = s.outs(['Ah', 'Kh'], ['Qh', 'Jh', '9c'], variant=v.SHORT_DECK)
+    assert not any(name[0] in '2345' for name in found['outs'])
+    assert found['turn'] == pytest.approx(len(found['outs']) / 31)
+    streets = s.simulation_streets(['Ah', 'Kh'], ['Qh', 'Jh', '9c'], sims=2000, variant=v.SHORT_DECK)
+    assert streets['flop']['hc'] == 2000
+    assert streets['turn']['flush'] / 2000 == pytest.approx(4 / 31, abs=0.03)  # 6h-9h; Th makes a straight flush
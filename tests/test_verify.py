@@ -0,0 +1,29 @@
+import holdem_sim.verify as v
+
+
+def test_sample_agrees_with_registry():
+    report = v.verify(sample=500, seed=7, processes=1, chunk_size=200)
+    assert report['hands'] == 500 and report['disagreements'] == 0
+
+
+def test_sample_is_seeded():
+    first = v.verify(sample=300, seed=3, processes=1, fast_only=True)
+    second = v.verify(sample=300, seed=3, processes=1, fast_only=True)
+    assert first['counts'] == second['counts']
+
+
+def test_lower_kicker_disagreement_is_caught(monkeypatch):
+    hand = tuple(card.index for card in v.p.make_card(['8s', '8d', 'Kc', 'Tc', '9h', '4d', '2s']))
+    assert v.check_hands([hand])['disagreements'] == 0
+    monkeypatch.setattr(v, 'reference_hand', lambda cards: v.p.Hand('pair', 8, 13, 10, kickers=[4]))
+    report = v.check_hands([hand])
+    assert report['disagreements'] == 1 and report['first_disagreements'][0][1].startswith('pair-8')
+
+
+def test_prefix_chunk():
+    report = v._check_prefix(((44, 45, 46), False, 10))
+    assert report['hands'] == 5 and report['disagreements'] == 0
+
+
+def test_seven_card_counts_total():
+    assert sum(v.SEVEN_CARD_COUNTS.values()) == v.ALL_HANDS